@@ -24,6 +24,16 @@
 # https://github.com/XBMC-Addons/script.module.xbmcswift2
 
 from resources.lib.plugin import plugin
+from resources.lib.plugin import flush_queued_changes
+from resources.lib import api
+from resources.lib import logger
 
 if __name__ == '__main__':
     plugin.run()
+    # menu is displayed. let background requests complete, before leaving
+    api.finish_prefetch()
+    flush_queued_changes()
+    api.log_stats()
+    api.save_latencies()
+    api.save_metrics()
+    logger.close()
@@ -1,16 +1,39 @@
 """Arte TV and HBB TV API communications - REST and authentication calls"""
-from collections import OrderedDict
+import functools
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from time import monotonic
 # pylint: disable=import-error
 import requests
 # pylint: disable=import-error
 from xbmcswift2 import xbmc
+# pylint: disable=import-error
+from xbmcswift2 import xbmcaddon
+from resources.lib import historymirror
 from resources.lib import hof
+from resources.lib import httpcache
+from resources.lib import jsondecoder
 from resources.lib import logger
+from resources.lib import metrics
+from resources.lib import mutationqueue
+from resources.lib import programindex
+from resources.lib import resilience
+from resources.lib import sharedcache
+from resources.lib import singleflight
+from resources.lib import storage
+from resources.lib import transport
 
 _PLUGIN_NAME = "Arte +7"
 _PLUGIN_VERSION = "1.6.0"
+# base URLs of APIs can be overridden with environment variables
+# e.g. to benchmark add-on against a local server. See tests/benchmarks/bench_routes.py
 # Arte hbbtv - deprecated API since 2022 prefer Arte TV API
-_HBBTV_URL = 'https://www.arte.tv/hbbtvv2/services/web/index.php'
+_HBBTV_URL = os.environ.get(
+    'ARTEPLUSSEPT_HBBTV_URL', 'https://www.arte.tv/hbbtvv2/services/web/index.php')
 _HBBTV_HEADERS = {
     'user-agent': f"{_PLUGIN_NAME}/{_PLUGIN_VERSION}"
 }
@@ -25,7 +48,7 @@ _HBBTV_ENDPOINTS = {
 
 
 # Arte TV API - Used on Arte TV website
-_ARTETV_URL = 'https://api.arte.tv/api'
+_ARTETV_URL = os.environ.get('ARTEPLUSSEPT_ARTETV_URL', 'https://api.arte.tv/api')
 _ARTETV_AUTH_URL = 'https://auth.arte.tv/ssologin'
 ARTETV_ENDPOINTS = {
     # POST
@@ -89,12 +112,39 @@ DEVICE_AUTH_URL = f"{_ARTETV_ID_URL}/auth/device"
 DEVICETOKEN_URL = f"{_ARTETV_ID_URL}/token"
 SMART_TV_CLIENT_ID = 'smart-tv'
 
+# concurrent requests to fetch the pages of user history
+_MAX_PAGE_WORKERS = 4
+# retries of GET requests failing with a network or server error
+_GET_RETRIES = 2
+# disk space for replies cached with their ETag or Last-Modified validators
+_HTTP_CACHE_MAX_BYTES = 10 * 1024 * 1024
+# seconds a prefetched page is kept, waiting for user to open it
+_PREFETCH_TTL = 120
+# prefetch is limited to one request at a time, without retry and with a short read timeout,
+# so that it never competes with requests for what user is waiting for
+_MAX_PREFETCH_WORKERS = 1
+_PREFETCH_READ_TIMEOUT = 5
+# seconds to let prefetch requests complete after the menu was displayed
+PREFETCH_DEADLINE = 5
+# seconds streams resolved in advance are kept, waiting for user to play them
+_STREAMS_TTL = 5 * 60
+# seconds a program is known to have no stream, without requesting it again
+_NO_STREAMS_TTL = 60 * 60
+
+# tell whether the current thread is prefetching a page
+_prefetch_state = threading.local()
+_prefetch_futures = []
+
+# every call to Arte APIs goes through the same keep-alive sessions,
+# so that they are identified as the add-on, even without explicit headers
+transport.configure(headers=_HBBTV_HEADERS)
+
 
 def get_favorites(lang, tkn, page_idx, page_size=50):
     """Retrieve favorites from a personal account."""
     url = _ARTETV_URL + ARTETV_ENDPOINTS['get_favorites'].format(
         lang=lang, page=page_idx, limit=page_size)
-    return _load_json_personal_content('artetv_getfavorites', url, tkn)
+    return _index_listing(lang, _load_json_personal_content('artetv_getfavorites', url, tkn))
 
 
 def add_favorite(tkn, program_id, language):
@@ -105,8 +155,9 @@ def add_favorite(tkn, program_id, language):
     url = _ARTETV_URL + ARTETV_ENDPOINTS['add_favorite']
     headers = _add_auth_token(tkn, ARTETV_HEADERS)
     data = {'programId': program_id, 'language': language}
-    reply = requests.put(url, data=data, headers=headers, timeout=10)
+    reply = _send('artetv_addfavorite', 'PUT', url, data=data, headers=headers)
     logger.log_json(reply, 'artetv_addfavorite')
+    _forget_shared_replies()
     return reply.status_code
 
 
@@ -117,8 +168,9 @@ def remove_favorite(tkn, program_id):
     """
     url = _ARTETV_URL + ARTETV_ENDPOINTS['remove_favorite'].format(program_id=program_id)
     headers = _add_auth_token(tkn, ARTETV_HEADERS)
-    reply = requests.delete(url, headers=headers, timeout=10)
+    reply = _send('artetv_removefavorite', 'DELETE', url, headers=headers)
     logger.log_json(reply, 'artetv_removefavorite')
+    _forget_shared_replies()
     return reply.status_code
 
 
@@ -126,16 +178,91 @@ def purge_favorites(tkn):
     """Flush user favorites"""
     url = _ARTETV_URL + ARTETV_ENDPOINTS['purge_favorites']
     headers = _add_auth_token(tkn, ARTETV_HEADERS)
-    reply = requests.patch(url, data={}, headers=headers, timeout=10)
+    reply = _send('artetv_purgefavorites', 'PATCH', url, data={}, headers=headers)
     logger.log_json(reply, 'artetv_purgefavorites')
+    _forget_shared_replies()
     return reply.status_code
 
 
+@functools.lru_cache(maxsize=None)
+def _get_mutations():
+    """Return the queue of changes of user content not sent to Arte yet"""
+    return mutationqueue.MutationQueue(storage.get_storage_path('mutations'))
+
+
+def queue_add_favorite(program_id, language):
+    """Record that content program_id should be added to user favorites. Return its key"""
+    return _get_mutations().append(f"favorite_{program_id}", 'add_favorite',
+                                   [program_id, language])
+
+
+def queue_remove_favorite(program_id):
+    """Record that content program_id should be removed from user favorites. Return its key"""
+    return _get_mutations().append(f"favorite_{program_id}", 'remove_favorite', [program_id])
+
+
+def queue_sync_last_viewed(tkn, program_id, time):
+    """
+    Record the progress time of content program_id to be synchronized in arte profile.
+    Local mirror of history is updated right now. Return its key
+    """
+    historymirror.record_progress(storage.get_storage_path('history'), tkn, program_id, time)
+    return _get_mutations().append(f"lastviewed_{program_id}", 'sync_last_viewed',
+                                   [program_id, time])
+
+
+def _get_queued_progress():
+    """Return timecode by program id of progress queued and not sent to Arte yet"""
+    return {mutation['args'][0]: mutation['args'][1] for mutation in _get_mutations().pending()
+            if mutation.get('op') == 'sync_last_viewed'}
+
+
+def has_queued_changes():
+    """Return True, if changes of user content were not sent to Arte yet"""
+    return len(_get_mutations().pending()) > 0
+
+
+def flush_queued_changes(tkn, max_workers=1):
+    """
+    Send changes of user content recorded with queue_* functions, with token tkn.
+    Return a dict with the HTTP status code of every key sent, None if it will be retried.
+    :param int max_workers: number of changes sent at the same time
+    """
+    if not tkn:
+        return {}
+    return _get_mutations().flush(
+        lambda mutation: _send_mutation(tkn, mutation), max_workers=max_workers)
+
+
+def clear_queued_changes():
+    """Forget changes of user content not sent yet e.g. on log out"""
+    _get_mutations().clear()
+
+
+def _send_mutation(tkn, mutation):
+    """Send a change recorded in queue. Return HTTP status code or None on network error"""
+    operations = {
+        'add_favorite': add_favorite,
+        'remove_favorite': remove_favorite,
+        'sync_last_viewed': sync_last_viewed,
+    }
+    operation = operations.get(mutation.get('op'))
+    if operation is None:
+        xbmc.log(f"Drop unknown change {mutation.get('op')}", level=xbmc.LOGWARNING)
+        return 400
+    try:
+        return operation(tkn, *mutation.get('args', []))
+    except requests.exceptions.RequestException as error:
+        xbmc.log(f"Unable to send {mutation.get('op')} because \"{str(error)}\". " +
+                 "Retry later", level=xbmc.LOGWARNING)
+        return None
+
+
 def get_last_viewed(lang, tkn, page_idx, page_size=50):
     """Retrieve content recently watched by a user."""
     url = _ARTETV_URL + ARTETV_ENDPOINTS['get_last_viewed'].format(
         lang=lang, page=page_idx, limit=page_size)
-    return _load_json_personal_content('artetv_lastviewed', url, tkn)
+    return _index_listing(lang, _load_json_personal_content('artetv_lastviewed', url, tkn))
 
 
 def get_last_viewed_all(lang, tkn):
@@ -143,38 +270,72 @@ def get_last_viewed_all(lang, tkn):
     Retrieve every content recently watched by a user, all pages.
     Never None. Empty list in the worst case
     """
-    all_data = []
-    next_page_idx = 1
-    while next_page_idx:
-        current_page = get_last_viewed(lang, tkn, next_page_idx)
-        if current_page is not None and isinstance(current_page, dict):
-            all_data = all_data + current_page.get('data', [])
-        next_page_idx = _get_next_page(current_page)
-    return all_data
+    return list(iter_last_viewed(lang, tkn))
 
 
-def _get_next_page(last_viewed):
-    """Return the next page idx or False, never None"""
-    if last_viewed is None:
-        return False
-    if not isinstance(last_viewed.get('meta', False), dict):
-        return False
-    current_page = last_viewed.get('meta').get('page')
-    if current_page < last_viewed.get('meta').get('pages'):
-        return int(current_page) + 1
-    return False
+def iter_last_viewed(lang, tkn, page_size=50):
+    """
+    Yield every content recently watched by a user, page after page, in page order.
+    The first page gives the number of pages. The next pages are fetched concurrently
+    with a bounded pool of workers. Pages not fetched yet are cancelled,
+    as soon as the caller stops iterating e.g. with break.
+    """
+    first_page = get_last_viewed(lang, tkn, 1, page_size)
+    if not isinstance(first_page, dict):
+        return
+    yield from first_page.get('data', [])
+    pages_count = _get_pages_count(first_page)
+    if pages_count < 2:
+        return
+    workers = min(_MAX_PAGE_WORKERS, pages_count - 1)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(get_last_viewed, lang, tkn, page_idx, page_size)
+                   for page_idx in range(2, pages_count + 1)]
+        try:
+            for future in futures:
+                page = future.result()
+                if isinstance(page, dict):
+                    yield from page.get('data', [])
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def _get_pages_count(last_viewed):
+    """Return the number of pages announced in meta of a page of last viewed, at least 1"""
+    meta = last_viewed.get('meta')
+    if not isinstance(meta, dict) or not meta.get('pages'):
+        return 1
+    return int(meta.get('pages'))
+
+
+def get_last_viewed_mirrored(lang, tkn):
+    """
+    Retrieve every content recently watched by a user from the local mirror of history,
+    after synchronizing its most recent pages with Arte.
+    Progress queued and not sent yet is kept, though Arte returns an older one.
+    Never None. Empty list in the worst case
+    """
+    if not tkn:
+        return []
+    mirror = historymirror.HistoryMirror(storage.get_storage_path('history'), tkn, lang)
+    return mirror.sync(
+        lambda page_idx: get_last_viewed(lang, tkn, page_idx),
+        lambda: iter_last_viewed(lang, tkn), _get_queued_progress())
 
 
 def sync_last_viewed(tkn, program_id, time):
     """
     Synchronize in arte profile the progress time of content being played.
+    Local mirror of history was updated, when the change was queued.
     :return: HTTP status code.
     """
     url = _ARTETV_URL + ARTETV_ENDPOINTS['sync_last_viewed']
     headers = _add_auth_token(tkn, ARTETV_HEADERS)
     data = {'programId': program_id, 'timecode': time}
-    reply = requests.put(url, data=data, headers=headers, timeout=10)
+    reply = _send('artetv_synchlastviewed', 'PUT', url, data=data, headers=headers)
     logger.log_json(reply, 'artetv_synchlastviewed')
+    _forget_shared_replies()
     return reply.status_code
 
 
@@ -182,8 +343,11 @@ def purge_last_viewed(tkn):
     """Flush user history"""
     url = _ARTETV_URL + ARTETV_ENDPOINTS['purge_last_viewed']
     headers = _add_auth_token(tkn, ARTETV_HEADERS)
-    reply = requests.patch(url, data={}, headers=headers, timeout=10)
+    reply = _send('artetv_purgelastviewed', 'PATCH', url, data={}, headers=headers)
     logger.log_json(reply, 'artetv_purgelastviewed')
+    _forget_shared_replies()
+    if reply.status_code == 200:
+        historymirror.clear(storage.get_storage_path('history'), tkn)
     return reply.status_code
 
 
@@ -203,20 +367,28 @@ def get_personal_data(tkn):
 def player_video(lang, program_id):
     """Get the info of content program_id from Arte TV API."""
     url = _ARTETV_URL + ARTETV_ENDPOINTS['player'].format(lang=lang, program_id=program_id)
-    return _load_json_full_url('artetv_player', url, None).get('data', {})
+    player = _load_json_full_url('artetv_player', url, None).get('data', {})
+    metadata = (player.get('attributes') or {}).get('metadata') or {}
+    _index_programs(lang, [{
+        'programId': metadata.get('providerId'), 'duration': metadata.get('duration')}])
+    return player
 
 
 def program_video(lang, program_id):
     """Get the info of content program_id from Arte TV API."""
     url = _ARTETV_URL + ARTETV_ENDPOINTS['program'].format(lang=lang, program_id=program_id)
-    return _load_json_full_url('artetv_program', url, None)
+    return _index_listing(lang, _load_json_full_url('artetv_program', url, None))
 
 
 def get_parent_collection(lang, program_id):
     """
-    Get parent collection of program program_id.
+    Get parent collection of program program_id from the index of programs
+    or from its program page.
     Return an empty list, if nothing found.
     """
+    facts = _get_indexed_program(lang, program_id)
+    if facts and facts.get('parents'):
+        return facts.get('parents')
     artetv_program_stream = program_video(lang, program_id)
     if artetv_program_stream:
         for zone in artetv_program_stream.get('zones', []):
@@ -226,6 +398,58 @@ def get_parent_collection(lang, program_id):
     return []
 
 
+def get_program_duration(lang, program_id):
+    """
+    Get the duration in seconds of content program_id from the index of programs
+    or from Arte TV player info.
+    """
+    facts = _get_indexed_program(lang, program_id)
+    if facts and facts.get('duration'):
+        return facts.get('duration')
+    program_info = player_video(lang, program_id)
+    return program_info.get('attributes').get('metadata').get('duration').get('seconds')
+
+
+@functools.lru_cache(maxsize=None)
+def _get_program_index():
+    """Return the index of facts about programs seen in listings, shared by add-on invocations"""
+    return programindex.ProgramIndex(
+        os.path.join(storage.get_storage_path('index'), 'programs.sqlite'))
+
+
+def _index_programs(lang, items):
+    """Keep facts about Arte items in the index of programs. Best effort"""
+    try:
+        _get_program_index().update(lang, items)
+    except sqlite3.Error as error:
+        xbmc.log(f"Unable to index programs because \"{str(error)}\"", level=xbmc.LOGWARNING)
+
+
+def _index_listing(lang, listing):
+    """
+    Keep facts about items of a listing of Arte TV API in the index of programs
+    e.g. a page of favorites, a zone or a page with zones. Return listing.
+    """
+    if not isinstance(listing, dict):
+        return listing
+    items = list(listing.get('data')) if isinstance(listing.get('data'), list) else []
+    for zone in listing.get('zones') or []:
+        content = (zone or {}).get('content') or {}
+        items.extend(content.get('data') or [])
+    _index_programs(lang, items)
+    return listing
+
+
+def _get_indexed_program(lang, program_id):
+    """Return facts about program_id in the index of programs or None"""
+    try:
+        return _get_program_index().get(lang, program_id)
+    except sqlite3.Error as error:
+        xbmc.log(f"Unable to read index of programs because \"{str(error)}\"",
+                 level=xbmc.LOGWARNING)
+        return None
+
+
 def is_of_kind(arte_item, kind):
     """Return true if arte_item is not None and of the kind provided as parameter"""
     return (arte_item and arte_item.get('kind') == kind) or False
@@ -242,9 +466,11 @@ def collection(kind, collection_id, lang):
     url = _HBBTV_ENDPOINTS['collection'].format(
         kind=kind, collection_id=collection_id, lang=lang)
     sub_collections = _load_json('hbbtv_collection', url).get('subCollections', [])
-    return hof.flat_map(
+    videos = hof.flat_map(
         lambda sub_collections: sub_collections.get('videos', []),
         sub_collections)
+    _index_programs(lang, videos)
+    return videos
 
 
 def collection_with_last_viewed(lang, tkn, kind, collection_id):
@@ -253,7 +479,7 @@ def collection_with_last_viewed(lang, tkn, kind, collection_id):
     e.g. progress
     """
     collection_items = collection(kind, collection_id, lang)
-    last_viewed_items = get_last_viewed_all(lang, tkn)
+    last_viewed_items = get_last_viewed_mirrored(lang, tkn)
     # nothing to do
     if len(collection_items) < 1 or len(last_viewed_items) < 1:
         return collection_items
@@ -277,17 +503,95 @@ def video(program_id, lang):
 
 
 def streams(kind, program_id, lang):
-    """Get the stream info of content program_id."""
+    """
+    Get the stream info of content program_id.
+    Return None, if Arte replied with an error or without the list of streams.
+    """
     url = _HBBTV_ENDPOINTS['streams'].format(
         kind=kind, program_id=program_id, lang=lang)
-    return _load_json('hbbtv_streams', url).get('videoStreams', [])
+    try:
+        return _load_json('hbbtv_streams', url, raise_for_status=True).get('videoStreams')
+    except requests.exceptions.HTTPError as error:
+        xbmc.log(f"Unable to get streams of {program_id} because \"{str(error)}\"",
+                 level=xbmc.LOGWARNING)
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def _get_resolved_streams():
+    """Return the streams resolved by previous add-on invocations"""
+    return sharedcache.SharedCache(storage.get_storage_path('streams'), _STREAMS_TTL)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_no_streams():
+    """Return the programs known to have no stream by previous add-on invocations"""
+    return sharedcache.SharedCache(storage.get_storage_path('nostreams'), _NO_STREAMS_TTL)
+
+
+def playable_streams(kind, program_id, lang):
+    """
+    Get the streams to play content program_id. If it is not available anymore,
+    get the streams of its clip e.g. a trailer, like on Arte TV website.
+    Both are requested at the same time, but program streams are preferred.
+    When prefetching, clip streams are requested after program ones in the same thread,
+    so that prefetch stays limited to one request at a time.
+    Reuse streams resolved in advance by prefetch_streams.
+    Return an empty list, if nothing can be played.
+    """
+    # a reply lists the streams in every quality. no need to keep it per quality
+    cache_key = f"{program_id}_{kind}_{lang}"
+    content = _get_resolved_streams().get(cache_key)
+    if content is not None:
+        return jsondecoder.loads(content)
+    if kind == 'CLIP':
+        program_streams = _streams_if_any(kind, program_id, lang)
+    elif _is_prefetching():
+        program_streams = _streams_if_any(kind, program_id, lang) or \
+            _streams_if_any('CLIP', program_id, lang)
+    else:
+        executor = ThreadPoolExecutor(max_workers=2)
+        program_future = executor.submit(_streams_if_any, kind, program_id, lang)
+        clip_future = executor.submit(_streams_if_any, 'CLIP', program_id, lang)
+        # do not wait for clip, if program can be played
+        executor.shutdown(wait=False)
+        program_streams = program_future.result() or clip_future.result()
+    if program_streams:
+        _get_resolved_streams().set(cache_key, json.dumps(program_streams).encode('utf-8'))
+    return program_streams
+
+
+def _streams_if_any(kind, program_id, lang):
+    """
+    Get the stream info of content program_id like streams,
+    without request if it is known to have no stream.
+    It is known only after a successful reply with an empty list, not after an error.
+    """
+    cache_key = f"{program_id}_{kind}_{lang}"
+    if _get_no_streams().get(cache_key) is not None:
+        return []
+    program_streams = streams(kind, program_id, lang)
+    if program_streams is None:
+        return []
+    if not program_streams:
+        _get_no_streams().set(cache_key, b'')
+    return program_streams
+
+
+def prefetch_streams(videos, lang):
+    """
+    Resolve in background the streams of videos with playable_streams.
+    :param list videos: pairs of kind and program id
+    """
+    for kind, program_id in videos:
+        prefetch(playable_streams, kind, program_id, lang)
 
 
 def page_content(lang):
     """Get content to be display in a page. It can be a page for a category or the home page."""
     url = _ARTETV_URL + ARTETV_ENDPOINTS['page'].format(
         lang=lang, category='HOME', client='tv')
-    return _load_json_full_url('artetv_home', url, ARTETV_HEADERS)
+    return _index_listing(lang, _load_json_full_url('artetv_home', url, ARTETV_HEADERS))
 
 
 def init_search(lang, query):
@@ -298,8 +602,8 @@ def init_search(lang, query):
     url = _ARTETV_URL + ARTETV_ENDPOINTS['page'].format(
         lang=lang, category='SEARCH', client='tv')
     params = {'page': '1', 'query': query}
-    return _load_json_full_url(
-        'artetv_initsearch', url, ARTETV_HEADERS, params).get('zones', [None])[0]
+    return _index_listing(lang, _load_json_full_url(
+        'artetv_initsearch', url, ARTETV_HEADERS, params)).get('zones', [None])[0]
 
 
 def get_search_page(lang, zone_id, page_idx, query):
@@ -309,7 +613,7 @@ def get_search_page(lang, zone_id, page_idx, query):
     url = _ARTETV_URL + ARTETV_ENDPOINTS['zone'].format(
         lang=lang, client='tv', zone_id=zone_id, country=lang.upper(), page=page_idx,
         page_id='SEARCH', query=query)
-    return _load_json_full_url('artetv_getsearchpage', url, ARTETV_HEADERS)
+    return _index_listing(lang, _load_json_full_url('artetv_getsearchpage', url, ARTETV_HEADERS))
 
 
 def get_zone_page(lang, zone_id, page_idx):
@@ -323,24 +627,216 @@ def get_zone_page(lang, zone_id, page_idx):
         zone_id = parts[0]
     url = _ARTETV_URL + ARTETV_ENDPOINTS['zonepage'].format(
         lang=lang, client='tv', zone_id=zone_id, country=lang.upper(), page=page_idx)
-    return _load_json_full_url('artetv_getzonepage', url, ARTETV_HEADERS)
+    return _index_listing(lang, _load_json_full_url('artetv_getzonepage', url, ARTETV_HEADERS))
 
 
-def _load_json(request_scope, path, headers=None):
+def _load_json(request_scope, path, headers=None, raise_for_status=False):
     """Deprecated since 2022. Prefer building url on client side"""
     if headers is None:
         headers = _HBBTV_HEADERS
     url = _HBBTV_URL + path
-    return _load_json_full_url(request_scope, url, headers)
+    return _load_json_full_url(request_scope, url, headers, raise_for_status=raise_for_status)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_http_cache():
+    """Return the cache of API replies in add-on storage, shared by every GET"""
+    return httpcache.HttpCache(storage.get_storage_path('httpcache'), _HTTP_CACHE_MAX_BYTES)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_single_flight():
+    """Return the deduplication of identical GET requests sent by parallel add-on invocations"""
+    return singleflight.SingleFlight(storage.get_storage_path('singleflight'),
+                                     stale_after=resilience.max_duration(_GET_RETRIES))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_prefetched():
+    """Return the pages fetched in background by previous add-on invocations"""
+    return sharedcache.SharedCache(storage.get_storage_path('prefetch'), _PREFETCH_TTL)
+
+
+def _forget_shared_replies():
+    """Forget replies shared between add-on invocations, after a change of user content"""
+    _get_single_flight().forget()
+    _get_prefetched().clear()
+
+
+def _is_prefetching():
+    return getattr(_prefetch_state, 'active', False)
+
+
+def prefetch(fctn, *args):
+    """
+    Call API function fctn(*args) in background e.g. to get the next page of a collection,
+    and keep its reply for the add-on invocation displaying that page.
+    Return immediately. Call finish_prefetch before the add-on invocation ends.
+    """
+    _prefetch_futures.append(_get_prefetch_executor().submit(_prefetch, fctn, *args))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_prefetch_executor():
+    """Return the pool of background workers sending prefetch requests"""
+    return ThreadPoolExecutor(max_workers=_MAX_PREFETCH_WORKERS)
+
+
+def _prefetch(fctn, *args):
+    """Call fctn(*args) in prefetch mode. Never raise, prefetch is best effort"""
+    if xbmc.Monitor().abortRequested():
+        return
+    _prefetch_state.active = True
+    try:
+        fctn(*args)
+    except requests.exceptions.RequestException as error:
+        xbmc.log(f"Unable to prefetch with {fctn.__name__} because \"{str(error)}\"",
+                 level=xbmc.LOGDEBUG)
+    finally:
+        _prefetch_state.active = False
+
+
+def finish_prefetch(timeout=PREFETCH_DEADLINE):
+    """
+    Wait for background prefetch requests up to timeout seconds.
+    Cancel the ones not started yet.
+    """
+    if not _prefetch_futures:
+        return
+    _, not_done = wait(_prefetch_futures, timeout)
+    for future in not_done:
+        future.cancel()
+    del _prefetch_futures[:]
 
 
-def _load_json_full_url(request_scope, url, headers=None, params=None):
+def _load_json_full_url(request_scope, url, headers=None, params=None, raise_for_status=False):
+    """
+    Send a GET request and return the decoded JSON reply.
+    Reuse the reply prefetched by a previous add-on invocation, if any.
+    If the same request is already being sent by another add-on invocation, reuse its reply.
+    :param bool raise_for_status: True to raise requests.exceptions.HTTPError on an error reply,
+    instead of decoding its content
+    """
     if headers is None:
         headers = _HBBTV_HEADERS
+    cache_key = httpcache.build_key(url, headers, params)
+    prefetched = _get_prefetched()
+    content = prefetched.get(cache_key)
+    metrics.count('cache/prefetch', 'miss' if content is None else 'hit')
+    if content is not None:
+        return _decode(request_scope, content)
+
+    def fetch():
+        try:
+            content, shareable = _get_revalidated(request_scope, cache_key, url, headers, params)
+        except requests.exceptions.HTTPError as error:
+            if raise_for_status:
+                raise
+            return error.response.content, False
+        if shareable and _is_prefetching():
+            prefetched.set(cache_key, content)
+        return content, shareable
+
+    return _decode(request_scope, _get_single_flight().do(cache_key, fetch))
+
+
+def _decode(request_scope, content):
+    """Return decoded JSON content and record the time it took"""
+    start = monotonic()
+    decoded = jsondecoder.loads(content)
+    metrics.record('decode/' + request_scope, monotonic() - start, size=len(content))
+    return decoded
+
+
+def _get_revalidated(request_scope, cache_key, url, headers, params):
+    """
+    Send a GET request revalidating the reply cached on disk, if any,
+    and reuse it when Arte answers 304.
+    Return a pair with the reply content and True if the request was successful.
+    Raise requests.exceptions.HTTPError on an error reply.
+    """
+    cache = _get_http_cache()
+    cached_reply = cache.get(cache_key)
+    if _is_prefetching():
+        options = {'timeout': (resilience.CONNECT_TIMEOUT, _PREFETCH_READ_TIMEOUT)}
+    else:
+        options = {'retries': _GET_RETRIES}
     # https://requests.readthedocs.io/en/latest/
-    reply = requests.get(url, headers=headers, params=params, timeout=10)
+    try:
+        reply = _send(
+            request_scope, 'GET', url,
+            headers={**headers, **httpcache.conditional_headers(cached_reply)}, params=params,
+            **options)
+    except requests.exceptions.RequestException as error:
+        if cached_reply is None:
+            raise
+        # better outdated content than nothing
+        xbmc.log(f"Reuse cached reply of {url} because \"{str(error)}\"", level=xbmc.LOGWARNING)
+        metrics.count('cache/http', 'stale')
+        return cached_reply.content, False
     logger.log_json(reply, request_scope)
-    return reply.json(object_pairs_hook=OrderedDict)
+    if reply.status_code == 304 and cached_reply is not None:
+        metrics.count('cache/http', 'hit')
+        cache.touch(cache_key)
+        return cached_reply.content, True
+    metrics.count('cache/http', 'miss')
+    if reply.status_code == 200:
+        cache.put(cache_key, reply.headers, reply.content)
+        return reply.content, True
+    reply.raise_for_status()
+    return reply.content, False
+
+
+@functools.lru_cache(maxsize=None)
+def _get_resilience():
+    """Return latency budgets and circuit breakers of Arte APIs shared by add-on invocations"""
+    return resilience.Resilience(storage.get_storage_path('resilience'))
+
+
+def save_latencies():
+    """Keep the latencies of API requests of the add-on invocation for their next timeouts"""
+    _get_resilience().save()
+
+
+def _send(request_scope, method, url, retries=0, **kwargs):
+    """
+    Send a request with the shared transport, within the latency budget of request_scope.
+    Fail fast with resilience.CircuitOpenError, if the host had too many errors recently.
+    Only idempotent requests should be retried.
+    Record the duration, status and size of reply in metrics of request_scope.
+    """
+    start = monotonic()
+    try:
+        reply = _get_resilience().request(
+            transport.request, method, url, request_scope, retries, **kwargs)
+    except requests.exceptions.RequestException:
+        metrics.record('api/' + request_scope, monotonic() - start, error=True)
+        raise
+    metrics.record('api/' + request_scope, monotonic() - start,
+                   error=reply.status_code >= 400, size=len(reply.content))
+    return reply
+
+
+def _get_metrics_path():
+    return os.path.join(storage.get_storage_path('metrics'), 'metrics.json')
+
+
+def save_metrics():
+    """Keep the measures of the add-on invocation with those of previous ones of its version"""
+    metrics.save(_get_metrics_path(), xbmcaddon.Addon().getAddonInfo('version'))
+
+
+def get_metrics_summary():
+    """Return histograms and counters measured by invocations of this add-on version"""
+    return metrics.summarize(metrics.load(_get_metrics_path()))
+
+
+def log_stats():
+    """Log in Kodi how requests were sent during the add-on invocation"""
+    transport.log_stats()
+    flights = _get_single_flight()
+    xbmc.log(f"API requests: {flights.fetched} sent, {flights.coalesced} coalesced " +
+             "with another add-on invocation", level=xbmc.LOGDEBUG)
 
 
 def _load_json_personal_content(request_scope, url, tkn, hdrs=None):
@@ -386,7 +882,7 @@ def authenticate_in_arte(plugin, username='', password='', headers=None):
     reply = None
     try:
         # https://requests.readthedocs.io/en/latest/
-        reply = requests.post(url, data=token_data, headers=headers, timeout=10)
+        reply = _send('artetv_auth_password', 'POST', url, data=token_data, headers=headers)
         logger.log_json(reply, 'artetv_auth_password')
     except requests.exceptions.ConnectionError as err:
         # unable to auth. e.g.
@@ -398,7 +894,7 @@ def authenticate_in_arte(plugin, username='', password='', headers=None):
         xbmc.log(f"Unable to authenticate to Arte TV : {err_dtls}", level=xbmc.LOGERROR)
         plugin.notify(msg=plugin.addon.getLocalizedString(30020), image='error')
         return None
-    return reply.json(object_pairs_hook=OrderedDict)
+    return jsondecoder.loads(reply.content)
 
 
 def device_authorization_request():
@@ -417,13 +913,13 @@ def device_authorization_request():
             "Content-Type": "application/x-www-form-urlencoded"
         }
 
-        resp = requests.post(DEVICE_AUTH_URL, data=payload, headers=headers, timeout=10)
+        resp = _send('artetv_deviceauth', 'POST', DEVICE_AUTH_URL, data=payload, headers=headers)
         logger.log_json(resp, 'artetv_deviceauth')
         if resp.status_code != 200:
             xbmc.log(f"Device authorization failed: HTTP {resp.status_code}", level=xbmc.LOGERROR)
             return None
 
-        return resp.json()
+        return jsondecoder.loads(resp.content)
 
     # pylint: disable=broad-except
     except Exception as e:
@@ -450,11 +946,41 @@ def device_token_request(device_code):
             "Content-Type": "application/x-www-form-urlencoded"
         }
 
-        resp = requests.post(DEVICETOKEN_URL, data=payload, headers=headers, timeout=10)
+        resp = _send(
+            'artetv_auth_devicetoken', 'POST', DEVICETOKEN_URL, data=payload, headers=headers)
         logger.log_json(resp, 'artetv_auth_devicetoken')
-        return resp.json()
+        return jsondecoder.loads(resp.content)
 
     # pylint: disable=broad-except
     except Exception as e:
         xbmc.log(f"Device token polling exception: {e}", level=xbmc.LOGERROR)
         return {"error": "exception"}
+
+
+def refresh_tokens(tokens, grant):
+    """
+    Exchange the refresh token of tokens for new access and refresh tokens,
+    with the endpoint of the grant they were created with i.e. password or device.
+    Return arte reply or None, if tokens could not be refreshed.
+    """
+    payload = {'grant_type': 'refresh_token', 'refresh_token': tokens.get('refresh_token')}
+    if grant == 'device':
+        url = DEVICETOKEN_URL
+        payload['client_id'] = SMART_TV_CLIENT_ID
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+    else:
+        url = _ARTETV_URL + ARTETV_ENDPOINTS['token']
+        payload['anonymous_token'] = None
+        headers = ARTETV_HEADERS.copy()
+        headers['client'] = 'web'
+    try:
+        reply = _send('artetv_auth_refresh', 'POST', url, data=payload, headers=headers)
+        logger.log_json(reply, 'artetv_auth_refresh')
+    except requests.exceptions.RequestException as error:
+        xbmc.log(f"Unable to refresh token because \"{str(error)}\"", level=xbmc.LOGWARNING)
+        return None
+    if reply.status_code != 200:
+        xbmc.log(f"Unable to refresh token: HTTP {reply.status_code}", level=xbmc.LOGWARNING)
+        return None
+    refreshed = jsondecoder.loads(reply.content)
+    return refreshed if isinstance(refreshed, dict) and 'access_token' in refreshed else None
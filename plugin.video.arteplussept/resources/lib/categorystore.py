@@ -0,0 +1,162 @@
+"""
+Categories cached between add-on invocations, e.g. zones of home page displayed later.
+Unlike plugin.get_storage, which loads and writes back the whole pickled dict on every
+invocation, a category is a row of a SQLite database: displaying a zone reads its row only
+and refreshing home page writes only the zones which changed.
+Rows expire after their TTL. Least recently used rows are dropped beyond a size in bytes.
+Reading a row writes its time of use at most once a minute and never waits for it:
+a locked database is a cache miss.
+"""
+import collections.abc
+import pickle
+import sqlite3
+import threading
+import time
+
+# seconds before a category expires, like TTL=60 minutes of plugin.get_storage before
+DEFAULT_TTL = 3600
+# bytes of pickled categories kept. A zone of home page is about 10 KiB
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+# seconds to wait for another add-on invocation writing in database
+_BUSY_TIMEOUT = 2
+# seconds before the time of use of a category read is written again
+_USE_INTERVAL = 60
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS categories (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    used_at REAL NOT NULL
+)
+'''
+# an unchanged value is not written again, until half of its TTL elapsed
+_UPSERT = '''
+INSERT INTO categories (key, value, size, expires_at, used_at) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    value = excluded.value,
+    size = excluded.size,
+    expires_at = excluded.expires_at,
+    used_at = excluded.used_at
+WHERE value != excluded.value OR expires_at < ?
+'''
+_DELETE_EXPIRED = 'DELETE FROM categories WHERE expires_at <= ?'
+_TRIM = '''
+DELETE FROM categories WHERE key IN (
+    SELECT key FROM (
+        SELECT key, SUM(size) OVER (ORDER BY used_at DESC, key) AS total FROM categories)
+    WHERE total > ?)
+'''
+
+
+class CategoryStore(collections.abc.MutableMapping):
+    """
+    Mapping of category keys to picklable values, in SQLite database file_path.
+    Expired categories are missing. Thread safe.
+    """
+
+    def __init__(self, file_path, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.file_path = file_path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def _connect(self):
+        if self._connection is None:
+            connection = sqlite3.connect(
+                self.file_path, timeout=_BUSY_TIMEOUT, check_same_thread=False)
+            try:
+                # readers do not wait for an invocation refreshing home page
+                connection.execute('PRAGMA journal_mode=WAL')
+                connection.execute('PRAGMA synchronous=NORMAL')
+                with connection:
+                    connection.execute(_SCHEMA)
+            except sqlite3.OperationalError:
+                connection.close()
+                raise
+            self._connection = connection
+        return self._connection
+
+    def __getitem__(self, key):
+        now = time.time()
+        with self._lock:
+            try:
+                connection = self._connect()
+                row = connection.execute(
+                    'SELECT value, used_at FROM categories WHERE key = ? AND expires_at > ?',
+                    (key, now)).fetchone()
+            except sqlite3.OperationalError as error:
+                raise KeyError(key) from error
+            if row is None:
+                raise KeyError(key)
+            if row[1] < now - _USE_INTERVAL:
+                self._touch(connection, key, now)
+        return pickle.loads(row[0])
+
+    @staticmethod
+    def _touch(connection, key, now):
+        """Write time of use of category key, unless another invocation is writing"""
+        connection.execute('PRAGMA busy_timeout = 0')
+        try:
+            with connection:
+                connection.execute('UPDATE categories SET used_at = ? WHERE key = ?', (now, key))
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            connection.execute(f"PRAGMA busy_timeout = {_BUSY_TIMEOUT * 1000}")
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def set(self, key, value, ttl=None):
+        """Store value of category key for ttl seconds, default to the TTL of the store"""
+        self._write([(key, value)], self.ttl if ttl is None else ttl)
+
+    def update(self, other=(), /, **kwargs):
+        """Store every category of other and kwargs, in a single transaction"""
+        categories = list(dict(other, **kwargs).items())
+        if categories:
+            self._write(categories, self.ttl)
+
+    def _write(self, categories, ttl):
+        now = time.time()
+        rows = []
+        for key, value in categories:
+            content = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            rows.append((key, content, len(content), now + ttl, now, now + ttl / 2))
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.executemany(_UPSERT, rows)
+                connection.execute(_DELETE_EXPIRED, (now,))
+                connection.execute(_TRIM, (self.max_bytes,))
+
+    def __delitem__(self, key):
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                deleted = connection.execute(
+                    'DELETE FROM categories WHERE key = ? AND expires_at > ?',
+                    (key, time.time())).rowcount
+        if not deleted:
+            raise KeyError(key)
+
+    def _keys(self):
+        with self._lock:
+            return [row[0] for row in self._connect().execute(
+                'SELECT key FROM categories WHERE expires_at > ?', (time.time(),))]
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def close(self):
+        """Close the database. It is opened again by the next call"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
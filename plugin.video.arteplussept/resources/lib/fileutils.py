@@ -0,0 +1,75 @@
+"""Utility methods for files shared between threads and add-on invocations"""
+import os
+import threading
+import time
+
+
+def write_atomic(file_path, content, mode=None):
+    """
+    Write bytes content into file_path. Readers, even in other processes,
+    see either the previous content or the new one, never a partial file.
+    :param int mode: permissions of the file e.g. 0o600, default ones if None
+    """
+    tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as tmp_file:
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        tmp_file.write(content)
+    os.replace(tmp_path, file_path)
+
+
+def list_files(path, suffix):
+    """Return os.DirEntry of files in folder path with name ending with suffix"""
+    try:
+        return [entry for entry in os.scandir(path)
+                if entry.is_file() and entry.name.endswith(suffix)]
+    except OSError:
+        return []
+
+
+def remove_quietly(file_path):
+    """Remove file_path. Ignore errors e.g. when it was already removed by another process"""
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
+
+
+class FileLock:
+    """
+    Lock shared between threads and processes, based on the exclusive creation of a file.
+    A lock older than stale_after seconds is considered abandoned e.g. by a killed process.
+    """
+
+    def __init__(self, file_path, stale_after=30):
+        self.file_path = file_path
+        self.stale_after = stale_after
+
+    def acquire(self, timeout=0, poll_interval=0.05):
+        """Return True once the lock is acquired or False after timeout seconds"""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                os.close(os.open(self.file_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                if self._is_stale():
+                    remove_quietly(self.file_path)
+                    continue
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(poll_interval)
+
+    def release(self):
+        """Release the lock, so that another thread or process can acquire it"""
+        remove_quietly(self.file_path)
+
+    def is_locked(self):
+        """Return True if the lock is currently held by anyone"""
+        return os.path.exists(self.file_path) and not self._is_stale()
+
+    def _is_stale(self):
+        try:
+            return time.time() - os.path.getmtime(self.file_path) > self.stale_after
+        except OSError:
+            return False
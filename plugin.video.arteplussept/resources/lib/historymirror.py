@@ -0,0 +1,189 @@
+"""
+Local mirror of user history i.e. Arte TV last viewed content.
+It avoids downloading every page of history, each time progress of a collection is needed.
+Pages are fetched newest first and synchronization stops on the first page,
+which is already known. Progress synchronized by the add-on updates the mirror directly.
+Progress queued by the add-on and not sent yet prevails over the older one returned by Arte.
+Mirrors are files named after the user, so that they are kept when tokens are refreshed.
+"""
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+from resources.lib import fileutils
+from resources.lib import utils
+
+# full synchronization once a day to forget items removed from history on other devices
+_FULL_SYNC_TTL = 24 * 60 * 60
+# prefix of mirror files, followed by owner key and language
+_PREFIX = 'history_'
+# mirror files keyed on access token before, orphaned by every refresh of token
+_LEGACY_PATTERN = '[0-9a-f]' * 16 + '_*.json'
+# seconds to wait for another thread or add-on invocation recording progress
+_LOCK_TIMEOUT = 2
+
+# serialize progress recorded by threads of the add-on invocation e.g. for a collection
+_progress_lock = threading.Lock()
+
+
+def _owner_key(tkn):
+    """
+    Return a short digest identifying the owner of the token without exposing it
+    i.e. the user the token is cached for, which does not change when the token is refreshed.
+    """
+    owner = (tkn or {}).get('user') or (tkn or {}).get('access_token', '')
+    return hashlib.sha256(owner.encode('utf-8')).hexdigest()[:16]
+
+
+def _get_file_prefix(tkn):
+    return f"{_PREFIX}{_owner_key(tkn)}_"
+
+
+def _remove_legacy_files(path):
+    """Remove mirror files keyed on access tokens, left by previous versions"""
+    for file_path in glob.glob(os.path.join(path, _LEGACY_PATTERN)):
+        fileutils.remove_quietly(file_path)
+
+
+def _get_timecode(item):
+    """Return the time in seconds where user stopped watching item or None"""
+    return (item.get('lastviewed') or {}).get('timecode')
+
+
+def _is_same_progress(item, known_item):
+    """Return True, if known_item exists and was stopped at the same time as item"""
+    return known_item is not None and _get_timecode(item) == _get_timecode(known_item)
+
+
+def _set_progress(item, timecode):
+    """Set the time in seconds where user stopped watching item and its progress"""
+    lastviewed = dict(item.get('lastviewed') or {})
+    lastviewed['timecode'] = timecode
+    duration = utils.get_duration(item)
+    if duration:
+        lastviewed['progress'] = min(float(timecode) / float(duration), 1.0)
+    item['lastviewed'] = lastviewed
+
+
+class HistoryMirror:
+    """
+    History of a user in a language, stored in a JSON file in folder path.
+    Items are Arte TV last viewed items, from the most recently viewed to the oldest.
+    """
+
+    def __init__(self, path, tkn, lang):
+        self.file_path = os.path.join(path, f"{_get_file_prefix(tkn)}{lang}.json")
+        self.items = []
+        # time of the last full synchronization
+        self.synced_at = 0
+        try:
+            with open(self.file_path, 'rb') as mirror_file:
+                content = json.loads(mirror_file.read())
+            self.items = content.get('items', [])
+            self.synced_at = content.get('synced_at', 0)
+        except OSError:
+            # first use of mirror since it is keyed on user
+            _remove_legacy_files(path)
+        except ValueError:
+            pass
+
+    def sync(self, fetch_page, fetch_all, pending=None):
+        """
+        Synchronize mirror with Arte and return its items.
+        :param fn fetch_page: function taking a page index starting at 1, returning a page
+        of last viewed items with data and meta or None if the request failed
+        :param fn fetch_all: function returning every last viewed item, all pages
+        :param dict pending: timecode by program id of progress not sent to Arte yet.
+        It is kept instead of the progress returned by Arte
+        """
+        pending = pending or {}
+        if not self.items or time.time() - self.synced_at > _FULL_SYNC_TTL:
+            self.items = list(fetch_all())
+            self.synced_at = time.time()
+            self._keep_pending(pending)
+            self._save()
+            return self.items
+
+        known_items = {item.get('programId'): item for item in self.items}
+        fetched_items = []
+        page_idx = 1
+        while True:
+            page = fetch_page(page_idx)
+            if not isinstance(page, dict):
+                # keep mirror as is. Arte is not reachable
+                return self.items
+            data = page.get('data', [])
+            fetched_items.extend(data)
+            meta = page.get('meta') or {}
+            is_last_page = page_idx >= int(meta.get('pages') or 1)
+            if is_last_page:
+                # everything was fetched. Forget what is not in history anymore
+                self.items = fetched_items
+                break
+            if all(_is_same_progress(item, known_items.get(item.get('programId'))) or
+                   item.get('programId') in pending for item in data):
+                fetched_ids = {item.get('programId') for item in fetched_items}
+                self.items = fetched_items + [
+                    item for item in self.items if item.get('programId') not in fetched_ids]
+                break
+            page_idx += 1
+        self._keep_pending(pending)
+        self._save()
+        return self.items
+
+    def _keep_pending(self, pending):
+        """Restore progress not sent to Arte yet, most recently viewed first"""
+        if not pending:
+            return
+        kept = []
+        for item in self.items:
+            if item.get('programId') in pending:
+                _set_progress(item, pending[item.get('programId')])
+                kept.append(item)
+        self.items = kept + [item for item in self.items if item.get('programId') not in pending]
+
+    def record_progress(self, program_id, timecode):
+        """
+        Update progress of program_id with timecode in seconds, if it is in the mirror.
+        Return True if it was updated.
+        """
+        for item in self.items:
+            if item.get('programId') == program_id:
+                _set_progress(item, timecode)
+                # most recently viewed first, as in Arte history
+                self.items.remove(item)
+                self.items.insert(0, item)
+                self._save()
+                return True
+        return False
+
+    def _save(self):
+        content = {'synced_at': self.synced_at, 'items': self.items}
+        fileutils.write_atomic(self.file_path, json.dumps(content).encode('utf-8'))
+
+
+def record_progress(path, tkn, program_id, timecode):
+    """
+    Update progress of program_id in every mirror of the user i.e. in every language.
+    Updates are serialized between threads and add-on invocations, since a mirror file
+    is read, updated and written back. Skip it, if the mirror is locked for too long.
+    """
+    prefix = _get_file_prefix(tkn)
+    with _progress_lock:
+        lock = fileutils.FileLock(os.path.join(path, 'history.lock'))
+        if not lock.acquire(_LOCK_TIMEOUT):
+            return
+        try:
+            for file_path in glob.glob(os.path.join(path, f"{prefix}*.json")):
+                lang = os.path.basename(file_path)[len(prefix):-len('.json')]
+                HistoryMirror(path, tkn, lang).record_progress(program_id, timecode)
+        finally:
+            lock.release()
+
+
+def clear(path, tkn):
+    """Forget the history of the user in every language e.g. when history is purged"""
+    for file_path in glob.glob(os.path.join(path, f"{_get_file_prefix(tkn)}*.json")):
+        fileutils.remove_quietly(file_path)
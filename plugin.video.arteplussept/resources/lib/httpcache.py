@@ -0,0 +1,119 @@
+"""
+Persistent HTTP cache of API replies based on conditional requests.
+Replies are stored on disk with their validators (ETag, Last-Modified).
+Next request for the same key is sent with If-None-Match / If-Modified-Since,
+so that Arte answers 304 Not Modified without body, when nothing changed.
+The cache has a byte budget. Least recently used replies are evicted first.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import namedtuple
+from resources.lib import fileutils
+
+# 10MB is about 30 home pages and zones
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+_SUFFIX = '.http'
+
+CachedReply = namedtuple('CachedReply', ['etag', 'last_modified', 'content'])
+
+
+def build_key(url, headers=None, params=None):
+    """
+    Return the cache key of a GET request.
+    It depends on url with its query params, language and client headers,
+    and authorization header, so that personal content is cached per token.
+    """
+    headers = {k.lower(): v for k, v in (headers or {}).items()}
+    parts = [
+        url,
+        json.dumps(params or {}, sort_keys=True),
+        headers.get('accept-language', ''),
+        headers.get('client', ''),
+        headers.get('authorization', ''),
+    ]
+    return hashlib.sha256('\n'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def conditional_headers(cached_reply):
+    """Return the headers to revalidate cached_reply. Empty dict, if nothing is cached."""
+    headers = {}
+    if cached_reply is None:
+        return headers
+    if cached_reply.etag:
+        headers['If-None-Match'] = cached_reply.etag
+    if cached_reply.last_modified:
+        headers['If-Modified-Since'] = cached_reply.last_modified
+    return headers
+
+
+class HttpCache:
+    """
+    Folder of cached replies, one file per key with validators and body.
+    Safe to use from several threads and add-on invocations,
+    since every file is replaced atomically.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _file_path(self, key):
+        return os.path.join(self.path, key + _SUFFIX)
+
+    def get(self, key):
+        """Return the CachedReply stored for key or None"""
+        try:
+            with open(self._file_path(key), 'rb') as cache_file:
+                meta, content = cache_file.read().split(b'\n', 1)
+            meta = json.loads(meta)
+        except (OSError, ValueError):
+            return None
+        return CachedReply(meta.get('etag'), meta.get('last_modified'), content)
+
+    def put(self, key, reply_headers, content):
+        """
+        Store content with validators from reply_headers.
+        Return False without storing anything, if reply has no validator.
+        """
+        etag = reply_headers.get('ETag')
+        last_modified = reply_headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return False
+        meta = json.dumps({'etag': etag, 'last_modified': last_modified})
+        fileutils.write_atomic(self._file_path(key), meta.encode('utf-8') + b'\n' + content)
+        self._evict()
+        return True
+
+    def touch(self, key):
+        """Mark the reply stored for key as recently used"""
+        try:
+            os.utime(self._file_path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        """Remove every cached reply"""
+        for entry in fileutils.list_files(self.path, _SUFFIX):
+            fileutils.remove_quietly(entry.path)
+
+    def _evict(self):
+        """Remove least recently used replies until the cache fits in its byte budget"""
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in fileutils.list_files(self.path, _SUFFIX):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                fileutils.remove_quietly(path)
+                total -= size
@@ -0,0 +1,29 @@
+"""
+Decode JSON replies of Arte APIs into native Python objects.
+Native dicts keep keys in the order of the reply since Python 3.7,
+so OrderedDict is not needed and would be slower and heavier.
+"""
+import json
+try:
+    # optional faster decoder, used when installed
+    # pylint: disable=import-error
+    import orjson as _FAST_JSON
+except ImportError:
+    _FAST_JSON = None
+
+
+def loads(content):
+    """
+    Decode content, bytes as in requests reply.content or str,
+    with the fastest decoder available.
+    :raise ValueError: if content is not valid JSON
+    """
+    if _FAST_JSON is not None:
+        # pylint: disable=no-member
+        return _FAST_JSON.loads(content)
+    return json.loads(content)
+
+
+def decoder_name():
+    """Return the name of the decoder used by loads e.g. to be displayed in benchmarks"""
+    return _FAST_JSON.__name__ if _FAST_JSON is not None else json.__name__
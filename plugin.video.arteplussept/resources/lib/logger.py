@@ -1,57 +1,119 @@
-"""Utilities to write log files with API and Kodi display traces."""
+"""
+Utilities to write log files with API and Kodi display traces.
+Log level is read from settings once per add-on invocation. Traces are rendered and appended
+to a rotating log file in add-on storage by a background thread, so that logging does not
+slow down add-on, when it is disabled and even when it is enabled.
+"""
 
+import functools
 import json
+import logging
+import logging.handlers
+import queue
 from os.path import join as OSPJoin
-from datetime import datetime
 # pylint: disable=import-error
 from xbmcswift2 import Plugin
-# pylint: disable=import-error
-from xbmcswift2 import xbmcvfs
 from . import settings
+from . import storage
+
+# file with traces in add-on storage
+_LOG_FILE = 'traces.log'
+# bytes in log file before it is rotated and number of rotated files kept
+_MAX_BYTES = 5 * 1024 * 1024
+_BACKUP_COUNT = 2
+_LOGGER_NAME = 'plugin.video.arteplussept.traces'
+
+# background thread writing traces, once started
+_listeners = []
+
+
+# pylint: disable=too-few-public-methods
+class _Lazy:
+    """Message rendered only when it is written i.e. in background thread"""
+
+    def __init__(self, render):
+        self.render = render
+
+    def __str__(self):
+        return self.render()
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue log records as they are, without rendering their message"""
+
+    def prepare(self, record):
+        return record
+
+
+@functools.lru_cache(maxsize=None)
+def _should_log(log_type):
+    """Return True when loglevel in settings includes log_type. Settings are read once"""
+    msettings = settings.Settings(Plugin())
+    return msettings.should_log(log_type)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_trace_logger():
+    """Return the logger sending traces to a background thread writing the rotating log file"""
+    file_handler = logging.handlers.RotatingFileHandler(
+        OSPJoin(storage.get_storage_path(), _LOG_FILE),
+        maxBytes=_MAX_BYTES, backupCount=_BACKUP_COUNT, encoding='utf-8', delay=True)
+    file_handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    listener = logging.handlers.QueueListener(queue.SimpleQueue(), file_handler)
+    listener.start()
+    _listeners.append(listener)
+    trace_logger = logging.getLogger(_LOGGER_NAME)
+    trace_logger.setLevel(logging.INFO)
+    trace_logger.propagate = False
+    trace_logger.addHandler(_LazyQueueHandler(listener.queue))
+    return trace_logger
+
+
+def _trace(log_suffix, render):
+    """Write the trace returned by function render in background"""
+    _get_trace_logger().info('%s\n%s', log_suffix, _Lazy(render))
+
+
+def close():
+    """Write the traces not written yet and stop the background thread, if it was started"""
+    while _listeners:
+        listener = _listeners.pop()
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+    logging.getLogger(_LOGGER_NAME).handlers.clear()
+    _get_trace_logger.cache_clear()
 
 
 def log_json(reply, log_suffix):
-    """save request and response in reply into a file
-    with file name containing log_suffix in addon user data
-    if loglevel settings is set to API.
+    """save request and response in reply into the log file
+    with log_suffix if loglevel settings is set to API.
     :param reply Python requests library object with every information to log
-    :param log_suffix string to be used in log file name along current date and time
+    :param log_suffix string heading the trace in log file along current date and time
     """
-    plugin = Plugin()
-    msettings = settings.Settings(plugin)
-    if reply is None or not msettings.should_log('API'):
+    if reply is None or not _should_log('API'):
         return
+    _trace(f"{log_suffix}-api", lambda: _render_reply(reply))
 
-    base_path = plugin.storage_path
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S%f')
-    log_path = OSPJoin(base_path, f"{timestamp}_{log_suffix}-api.json")
-    reqhdrs = format_headers(reply.request.headers)
-    reshdrs = format_headers(reply.headers)
-    with xbmcvfs.File(log_path, 'w') as log_file:
-        log_file.write("---------------- request ----------------\n")
-        log_file.write(f"{reply.request.method} {reply.request.url}\n")
-        log_file.write(f"{reqhdrs}\n")
-        log_file.write(f"payload : {reply.request.body}\n")
-        log_file.write("---------------- response ----------------\n")
-        log_file.write(f"{reply.status_code} {reply.reason} {reply.url}\n")
-        log_file.write(f"{reshdrs}\n")
-        log_file.write(f"payload : {reply.text}")
+
+def _render_reply(reply):
+    return '\n'.join([
+        "---------------- request ----------------",
+        f"{reply.request.method} {reply.request.url}",
+        format_headers(reply.request.headers),
+        f"payload : {reply.request.body}",
+        "---------------- response ----------------",
+        f"{reply.status_code} {reply.reason} {reply.url}",
+        format_headers(reply.headers),
+        f"payload : {reply.content.decode('utf-8', 'replace')}"])
 
 
 def log_xbmc(payload, log_suffix):
-    """Serialize xbmc objects and listitems as JSON into addon storage."""
-    plugin = Plugin()
-    msettings = settings.Settings(plugin)
-    if payload is None or not msettings.should_log('DISPLAY'):
+    """Serialize xbmc objects and listitems as JSON into the log file."""
+    if payload is None or not _should_log('DISPLAY'):
         return
-
-    base_path = plugin.storage_path
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S%f')
-    log_path = OSPJoin(base_path, f"{timestamp}_{log_suffix}-xbmc.json")
-    with xbmcvfs.File(log_path, 'w') as log_file:
-        payload_json = json.dumps(
-            to_jsonable(payload), indent=2, sort_keys=True, ensure_ascii=False)
-        log_file.write(payload_json)
+    _trace(f"{log_suffix}-xbmc", lambda: json.dumps(
+        to_jsonable(payload), indent=2, sort_keys=True, ensure_ascii=False))
 
 
 def to_jsonable(payload):
@@ -4,7 +4,10 @@ Arte Collection is a set of videos or collections like in favorites or history.
 
 # pylint: disable=import-error
 from xbmcswift2 import actions
-from resources.lib.mapper.arteitem import ArteTvVideoItem
+from resources.lib import api
+from resources.lib import programrecord
+from resources.lib import user
+from resources.lib.mapper.artetvpage import get_page_mapper
 
 
 # Utility class that may become an abstract class
@@ -18,23 +21,32 @@ class ArteCollection:
     def __init__(self, plugin, settings):
         self.plugin = plugin
         self.settings = settings
+        self.page_mapper = get_page_mapper(plugin)
 
-    def _build_menu(self, json_dict, collection_type, **nav_arg):
+    def _build_menu(self, json_dict, collection_type, prefetch=None, **nav_arg):
         """
         Build a menu to acces items managed inside the collection.
         It builds previous page and next page items in the menu,
         if additional pages are available before or after respectively.
+        :param fn prefetch: function taking a page index and requesting this page to API.
+        If provided, next page is requested in background to be displayed without delay.
         """
-        pages = json_dict.get('data', [])
         # implementation in current abstract class returns None.
         # Abstract class should NOT be instantiated
         # pylint: disable=assignment-from-none
         meta = self._get_page_meta(json_dict)
-        items = []
-        for page_item in pages:
-            menu_item = ArteTvVideoItem(self.plugin, page_item).map_artetv_item()
-            if menu_item is not None:
-                items.append(menu_item)
+        records = [programrecord.from_artetv(item) for item in json_dict.get('data', [])]
+        return self._build_records_menu(records, meta, collection_type, prefetch, **nav_arg)
+
+    def _build_records_menu(self, records, meta, collection_type, prefetch=None, **nav_arg):
+        """
+        Build the menu of a page of program records like _build_menu.
+        Streams of its first videos are resolved in background, if enabled in settings.
+        :param dict meta: pagination of the page
+        """
+        items, videos = self.page_mapper.map_records(records)
+        if self.settings.prefetch_streams > 0:
+            api.prefetch_streams(videos[:self.settings.prefetch_streams], self.settings.language)
         if meta and meta.get('pages', False):
             total_pages = meta.get('pages')
             current_page = meta.get('page')
@@ -50,8 +62,24 @@ class ArteCollection:
                     'label': self.plugin.addon.getLocalizedString(30038),
                     'path': self.plugin.url_for(collection_type, page=current_page+1, **nav_arg),
                 })
+                if prefetch:
+                    api.prefetch(prefetch, current_page + 1)
         return items
 
+    def _build_personal_menu(self, get_page, page, collection_type):
+        """
+        Build the menu of a page of user content like favorites with _build_menu.
+        Return None, if user is not logged in.
+        :param fn get_page: API function taking language, token and page index
+        """
+        auth_token = user.get_cached_token(self.plugin, self.settings.username)
+        if not auth_token:
+            return None
+        language = self.settings.language
+        return self._build_menu(
+            get_page(language, auth_token, page), collection_type,
+            prefetch=lambda next_page: get_page(language, auth_token, next_page))
+
     def _get_page_meta(self, json_dict):
         """
         Abstract method to get pagination metadata, because they are stored
@@ -6,6 +6,7 @@ Module for Arte Favorites
 from xbmcswift2 import xbmcgui
 from resources.lib import api
 from resources.lib import user
+from resources.lib import utils
 from resources.lib.mapper.artecollection import ArteCollection
 
 
@@ -20,37 +21,25 @@ class ArteFavorites(ArteCollection):
 
     def build_menu(self, page):
         """Build the menu for user favorites thanks to API call"""
-        menu = None
-        auth_token = user.get_cached_token(self.plugin, self.settings.username)
-        if auth_token:
-            menu = super()._build_menu(
-                api.get_favorites(self.settings.language, auth_token, page),
-                'favorites')
-        return menu
+        return self._build_personal_menu(api.get_favorites, page, 'favorites')
 
     def add_favorite(self, program_id, label):
         """Add content program_id to user favorites.
-        Notify about completion success or failure with label."""
+        Notify with label, once the change is queued. It is sent to Arte
+        at the end of the add-on invocation or later, if Arte cannot be reached."""
         auth_token = user.get_cached_token(self.plugin, self.settings.username)
         if auth_token:
-            if 200 == api.add_favorite(auth_token, program_id, self.settings.language):
-                msg = self.plugin.addon.getLocalizedString(30025).format(label=label)
-                self.plugin.notify(msg=msg, image='info')
-            else:
-                msg = self.plugin.addon.getLocalizedString(30026).format(label=label)
-                self.plugin.notify(msg=msg, image='error')
+            api.queue_add_favorite(program_id, self.settings.language)
+            utils.notify_queued_change(self.plugin, label)
 
     def remove_favorite(self, program_id, label):
         """Remove content program_id from user favorites.
-        Notify about completion success or failure with label."""
+        Notify with label, once the change is queued. It is sent to Arte
+        at the end of the add-on invocation or later, if Arte cannot be reached."""
         auth_token = user.get_cached_token(self.plugin, self.settings.username)
         if auth_token:
-            if 200 == api.remove_favorite(auth_token, program_id):
-                msg = self.plugin.addon.getLocalizedString(30027).format(label=label)
-                self.plugin.notify(msg=msg, image='info')
-            else:
-                msg = self.plugin.addon.getLocalizedString(30028).format(label=label)
-                self.plugin.notify(msg=msg, image='error')
+            api.queue_remove_favorite(program_id)
+            utils.notify_queued_change(self.plugin, label)
 
     def purge(self):
         """Flush user favorites and notify about success or failure"""
@@ -26,14 +26,7 @@ class ArteHistory(ArteCollection):
         """
         Return current page of user's history
         """
-        menu = None
-        auth_token = user.get_cached_token(self.plugin, self.settings.username)
-        if auth_token:
-            menu = super()._build_menu(
-                api.get_last_viewed(self.settings.language, auth_token, page),
-                'last_viewed'
-            )
-        return menu
+        return self._build_personal_menu(api.get_last_viewed, page, 'last_viewed')
 
     def purge(self):
         """Flush user history and notify about success or failure"""
@@ -11,6 +11,7 @@ from xbmcswift2 import xbmc
 # pylint: disable=import-error
 from xbmcswift2 import actions
 from resources.lib import utils
+from resources.lib.urlbuilder import get_url_builder
 
 
 # pylint: disable=too-few-public-methods
@@ -25,6 +26,20 @@ class ArteItem:
     def __init__(self, plugin, json_dict):
         self.json_dict = json_dict
         self.plugin = plugin
+        self.urls = get_url_builder(plugin)
+
+    def _build_collection_context_menu(self, kind, collection_id, label):
+        """Return context menu entries changing every video of a collection in Arte"""
+        return [
+            (self.plugin.addon.getLocalizedString(30066),
+                actions.background(self.urls.url_for(
+                    'mark_collection_as_watched', kind=kind, collection_id=collection_id,
+                    label=label))),
+            (self.plugin.addon.getLocalizedString(30067),
+                actions.background(self.urls.url_for(
+                    'add_collection_to_favorites', kind=kind, collection_id=collection_id,
+                    label=label))),
+        ]
 
     def format_title_and_subtitle(self):
         """Build string for menu entry thanks to title and optionally subtitle"""
@@ -77,32 +92,28 @@ class ArteVideoItem(ArteItem):
             },
             'context_menu': [
                 (self.plugin.addon.getLocalizedString(30023),
-                    actions.background(self.plugin.url_for(
+                    actions.background(self.urls.url_for(
                         'add_favorite', program_id=program_id, label=label))),
                 (self.plugin.addon.getLocalizedString(30024),
-                    actions.background(self.plugin.url_for(
+                    actions.background(self.urls.url_for(
                         'remove_favorite', program_id=program_id, label=label))),
                 (self.plugin.addon.getLocalizedString(30035),
-                    actions.background(self.plugin.url_for(
+                    actions.background(self.urls.url_for(
                         'mark_as_watched', program_id=program_id, label=label))),
             ],
         }
 
+    def get_duration(self):
+        """
+        Return video item duration in seconds or None, if unknown
+        """
+        return self._get_duration()
+
     def _get_duration(self):
         """
         Return video item duration in seconds
         """
-        item = self.json_dict
-        duration = item.get('durationSeconds')
-        if isinstance(duration, int):
-            return duration
-        duration = item.get('duration', None)
-        if isinstance(duration, int):
-            return duration
-        if isinstance(duration, dict):
-            if isinstance(duration.get('seconds', None), int):
-                return duration.get('seconds')
-        return None
+        return utils.get_duration(self.json_dict)
 
     def _get_mpaa_age_rating(self):
         """
@@ -153,6 +164,18 @@ class ArteVideoItem(ArteItem):
             is_hbbtv_content = False
         return is_hbbtv_content
 
+    def get_playable_video(self):
+        """
+        Return a pair of kind and program id, if current item plays a single video.
+        Return None for playlists, collections and links.
+        """
+        # implementation in current abstract class returns None.
+        # pylint: disable=assignment-from-none
+        kind = self._get_kind()
+        if self.is_playlist() or kind == 'EXTERNAL' or not self.json_dict.get('programId'):
+            return None
+        return kind, self.json_dict.get('programId')
+
     def _get_kind(self):
         """
         Return item kind as a string e.g.
@@ -169,46 +192,6 @@ class ArteTvVideoItem(ArteVideoItem):
     from Arte TV API data
     """
 
-    def map_artetv_item(self):
-        """
-        Return video menu item to show content from Arte TV API.
-        Manage specificities of various types : playlist, menu or video items
-        """
-        item = self.json_dict
-        program_id = item.get('programId')
-        kind = self._get_kind()
-        if kind == 'EXTERNAL':
-            return None
-
-        additional_context_menu = []
-        if self.is_playlist():
-            if kind in self.PREFERED_KINDS:
-                # content_type = Content.PLAYLIST
-                path = self.plugin.url_for(
-                    'play_collection', kind=kind, collection_id=program_id,
-                    mpaa=self._get_mpaa_age_rating())
-                is_playable = True
-                additional_context_menu = [(
-                    self.plugin.addon.getLocalizedString(30011),
-                    actions.update_view(
-                        self.plugin.url_for(
-                            'collection', program_id=program_id, kind=kind)))]
-            else:
-                # content_type = Content.MENU_ITEM
-                path = self.plugin.url_for('collection', kind=kind, program_id=program_id)
-                is_playable = False
-        else:
-            # content_type = Content.VIDEO
-            path = self.plugin.url_for(
-                'play', kind=kind, program_id=program_id,
-                mpaa=self._get_mpaa_age_rating())
-            is_playable = True
-
-        xbmc_item = self.build_item(path, is_playable)
-        if xbmc_item is not None:
-            xbmc_item['context_menu'].extend(additional_context_menu)
-        return xbmc_item
-
     def build_item(self, path, is_playable):
         """
         Return video menu item to show content from Arte TV API.
@@ -376,12 +359,14 @@ class ArteCollectionItem(ArteItem):
         program_id = item.get('programId')
         kind = item.get('kind')
 
+        label = self.format_title_and_subtitle()
         return {
-            'label': self.format_title_and_subtitle(),
-            'path': self.plugin.url_for('collection', kind=kind, collection_id=program_id),
+            'label': label,
+            'path': self.urls.url_for('collection', kind=kind, collection_id=program_id),
             'thumbnail': item.get('imageUrl'),
             'info': {
                 'title': item.get('title'),
                 'plotoutline': item.get('teaserText')
-            }
+            },
+            'context_menu': self._build_collection_context_menu(kind, program_id, label)
         }
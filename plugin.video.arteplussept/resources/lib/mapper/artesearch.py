@@ -31,7 +31,9 @@ class ArteSearch(ArteCollection):
         if not query:
             self.plugin.end_of_directory(succeeded=False)
         res = api.init_search(self.settings.language, query)
-        return self._build_menu(res.get('content'), 'search', zone_id=res.get('id'), query=query)
+        return self._build_menu(
+            res.get('content'), 'search', prefetch=self._prefetch_search(res.get('id'), query),
+            zone_id=res.get('id'), query=query)
 
     def _get_search_query(self):
         """Display keyboard to enter a search query and return it"""
@@ -52,4 +54,10 @@ class ArteSearch(ArteCollection):
         """Display a page of search results identified with zone_id"""
         return self._build_menu(
             api.get_search_page(self.settings.language, zone_id, page, query),
-            'search', zone_id=zone_id, query=query)
+            'search', prefetch=self._prefetch_search(zone_id, query),
+            zone_id=zone_id, query=query)
+
+    def _prefetch_search(self, zone_id, query):
+        """Return a function requesting a page of search results identified with zone_id"""
+        language = self.settings.language
+        return lambda page: api.get_search_page(language, zone_id, page, query)
@@ -0,0 +1,130 @@
+"""
+Map whole pages of programs into menu items in a single pass.
+Items of Arte TV API are projected into records of resources/lib/programrecord.py first.
+Fields of an item are read once, localized labels are read once per process
+and URLs are built from templates compiled once per route.
+"""
+
+import functools
+import html
+# pylint: disable=import-error
+from xbmcswift2 import actions
+from resources.lib import programrecord
+from resources.lib import urlbuilder
+from resources.lib.mapper.arteitem import ArteItem
+
+# ids of labels of context menu entries
+_LABEL_IDS = (30023, 30024, 30035, 30011, 30066, 30067)
+
+
+@functools.lru_cache(maxsize=None)
+def get_page_mapper(plugin):
+    """Return the page mapper of plugin, shared by every menu of the process"""
+    return ArteTvPageMapper(plugin)
+
+
+class ArteTvPageMapper:
+    """Mapper of pages of program records, to be reused for every page of a menu"""
+
+    def __init__(self, plugin):
+        self.plugin = plugin
+        self.urls = urlbuilder.get_url_builder(plugin)
+        self._labels = None
+
+    def map_page(self, items):
+        """
+        Return a pair with the menu items of Arte TV API items, skipping external links,
+        and the pairs of kind and program id of items playing a single video.
+        """
+        return self.map_records([programrecord.from_artetv(item) for item in items])
+
+    def map_records(self, records):
+        """
+        Return a pair with the menu items of program records, skipping external links,
+        and the pairs of kind and program id of records playing a single video.
+        """
+        menu_items = []
+        playable_videos = []
+        for record in records:
+            if record.kind == 'EXTERNAL':
+                continue
+            video = record.get_playable_video()
+            if video:
+                playable_videos.append(video)
+            menu_items.append(self.map_record(record))
+        return menu_items, playable_videos
+
+    def map_record(self, record):
+        """Return the menu item of a program record"""
+        if self._labels is None:
+            self._labels = {label_id: self.plugin.addon.getLocalizedString(label_id)
+                            for label_id in _LABEL_IDS}
+        label = f"[B]{html.unescape(record.title)}[/B]"
+        if record.subtitle:
+            label += f" - {html.unescape(record.subtitle)}"
+        duration = record.duration
+        info = {
+            'title': record.title,
+            'duration': duration,
+            'plot': record.plot,
+            'plotoutline': record.plotoutline,
+            'mpaa': record.mpaa,
+            'aired': record.aired,
+        }
+        if record.countries is not None:
+            info['genre'] = record.genre
+            info['country'] = list(record.countries)
+            info['director'] = record.director
+        properties = {'fanart_image': record.fanart, 'TotalTime': str(duration)}
+        if record.progress is not None and duration is not None:
+            info['playcount'] = '1' if record.progress >= 0.95 else '0'
+            properties['ResumeTime'] = str(record.timecode)
+            properties['StartPercent'] = str(float(record.timecode) * 100.0 / float(duration))
+        path, is_playable, context_menu = self._build_actions(
+            record.program_id, record.kind, record.is_playlist(), label, record.mpaa)
+        return {
+            'label': label,
+            'path': path,
+            'thumbnail': record.thumbnail,
+            'is_playable': is_playable,
+            'info_type': 'video',
+            'info': info,
+            'properties': properties,
+            'context_menu': context_menu,
+        }
+
+    def _build_actions(self, program_id, kind, is_playlist, label, mpaa):
+        """Return path, True if it is playable and context menu of an item"""
+        is_prefered_kind = kind in ArteItem.PREFERED_KINDS
+        if all(isinstance(value, str) for value in (program_id, kind, label, mpaa)):
+            # values are escaped once, though used in up to 6 URLs
+            program_id, kind, label, mpaa = [urlbuilder.quote(value) for value in (
+                program_id, kind, label, mpaa)]
+            url_for = self.urls.url_for_quoted
+        else:
+            url_for = self.urls.url_for
+        labels = self._labels
+        context_menu = [
+            (labels[30023], actions.background(
+                url_for('add_favorite', program_id=program_id, label=label))),
+            (labels[30024], actions.background(
+                url_for('remove_favorite', program_id=program_id, label=label))),
+            (labels[30035], actions.background(
+                url_for('mark_as_watched', program_id=program_id, label=label))),
+        ]
+        if not is_playlist:
+            return url_for('play', kind=kind, program_id=program_id, mpaa=mpaa), \
+                True, context_menu
+        if is_prefered_kind:
+            path = url_for('play_collection', kind=kind, collection_id=program_id, mpaa=mpaa)
+            is_playable = True
+            context_menu.append((labels[30011], actions.update_view(
+                url_for('collection', program_id=program_id, kind=kind))))
+        else:
+            path = url_for('collection', kind=kind, program_id=program_id)
+            is_playable = False
+        context_menu.append((labels[30066], actions.background(url_for(
+            'mark_collection_as_watched', kind=kind, collection_id=program_id, label=label))))
+        context_menu.append((labels[30067], actions.background(url_for(
+            'add_collection_to_favorites', kind=kind, collection_id=program_id, label=label))))
+        return path, is_playable, context_menu
@@ -4,6 +4,7 @@ Module for Arte Zone
 
 # pylint: disable=import-error
 from resources.lib import api
+from resources.lib import programrecord
 from resources.lib.mapper.artecollection import ArteCollection
 
 
@@ -21,25 +22,37 @@ class ArteZone(ArteCollection):
         """
         Return a menu entry to access content of cached category item i.e.
         a zone in the HOME page or SEARH page result.
+        Only the records of its programs are cached. They are mapped, when the zone is displayed.
         """
         zone_id = zone.get('id')
-        cached_category = self._build_menu(
-            zone.get('content'), 'category_page', zone_id=zone_id, page_id='HOME')
-        if self._is_valid_menu(cached_category):
-            self.cached_categories[zone_id] = cached_category
+        content = zone.get('content')
+        records = [programrecord.from_artetv(item) for item in content.get('data', [])]
+        if any(record.kind != 'EXTERNAL' for record in records):
+            # dicts of fields to read them back, even if fields of records change
+            self.cached_categories[zone_id] = {
+                'records': [programrecord.to_cached(record) for record in records],
+                'pagination': self._get_page_meta(content),
+            }
             return {
                 'label': zone.get('title'),
                 'path': self.plugin.url_for('cached_category', zone_id=zone_id)
             }
         return None
 
-    def _is_valid_menu(self, cached_category):
+    def build_cached_menu(self, zone_id):
         """
-        Menu is valid, if it is a list with at least one element is not None.
-        It is not valid if the list contains only None elements
+        Return the list of items in the first page of the zone with id zone_id
+        cached by build_item e.g. in HOME page.
         """
-        return isinstance(cached_category, list) and \
-            any(elem is not None for elem in cached_category)
+        cached_category = self.cached_categories[zone_id]
+        if isinstance(cached_category, list):
+            # menu cached by a previous version
+            return cached_category
+        records = [programrecord.from_cached(values)
+                   for values in cached_category.get('records')]
+        return self._build_records_menu(
+            records, cached_category.get('pagination'), 'category_page',
+            prefetch=self._get_page_fetcher(zone_id), zone_id=zone_id, page_id='HOME')
 
     def build_menu(self, zone_id, page, page_id):
         """
@@ -47,8 +60,13 @@ class ArteZone(ArteCollection):
         page_id is the type of page e.g. HOME, SEARCH...
         """
         return self._build_menu(
-            api.get_zone_page(self.settings.language, zone_id, page),
-            'category_page', zone_id=zone_id, page_id=page_id)
+            api.get_zone_page(self.settings.language, zone_id, page), 'category_page',
+            prefetch=self._get_page_fetcher(zone_id), zone_id=zone_id, page_id=page_id)
+
+    def _get_page_fetcher(self, zone_id):
+        """Return function requesting a page of the zone with id zone_id, to prefetch it"""
+        language = self.settings.language
+        return lambda page: api.get_zone_page(language, zone_id, page)
 
     def _get_page_meta(self, json_dict):
         return json_dict.get('pagination', None)
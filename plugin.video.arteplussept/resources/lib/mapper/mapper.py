@@ -3,10 +3,12 @@
 from xbmcswift2 import xbmc
 from resources.lib import hof
 from resources.lib import utils
+from resources.lib.urlbuilder import get_url_builder
 from resources.lib.mapper.arteitem import ArteVideoItem
 from resources.lib.mapper.arteitem import ArteTvVideoItem
 from resources.lib.mapper.arteitem import ArteHbbTvVideoItem
 from resources.lib.mapper.arteitem import ArteCollectionItem
+from resources.lib.mapper.artetvpage import get_page_mapper
 from resources.lib.mapper.artezone import ArteZone
 from resources.lib.mapper.artefavorites import ArteFavorites
 from resources.lib.mapper.artehistory import ArteHistory
@@ -16,7 +18,7 @@ from resources.lib.utils import PlayFrom
 def map_category_item(plugin, item, category_code):
     """Return menu entry to access a category content"""
     title = item.get('title')
-    path = plugin.url_for(
+    path = get_url_builder(plugin).url_for(
         'sub_category_by_title',
         category_code=category_code,
         sub_category_title=utils.encode_string(title))
@@ -27,14 +29,17 @@ def map_category_item(plugin, item, category_code):
     }
 
 
-def map_generic_item(plugin, item, show_video_streams):
-    """Return entry menu for video or playlist"""
-    if ArteVideoItem(plugin, item).is_playlist():
+def map_generic_item(plugin, item, record, show_video_streams):
+    """
+    Return entry menu for video or playlist of HBB TV API
+    :param ProgramRecord record: record of item
+    """
+    if record.is_playlist():
         item = ArteCollectionItem(plugin, item).map_collection_as_menu_item()
     elif show_video_streams is True:
         item = map_video_streams_as_menu(plugin, item)
     else:
-        item = map_video_as_item(plugin, item)
+        item = get_page_mapper(plugin).map_record(record)
     return item
 
 
@@ -44,6 +49,7 @@ def map_collection_as_playlist(plugin, arte_collection, req_start_program_id=Non
     Playlist item will be in the same order as arte_collection, if start_program_id
     is None, otherwise it starts from item with program id equals to start_program_id
     (and the same order).
+    Items before the start one are at the end of the list. previous_count tells how many.
     Return an empty list, if arte_collection is None or empty.
     """
     items_before_start = []
@@ -75,7 +81,8 @@ def map_collection_as_playlist(plugin, arte_collection, req_start_program_id=Non
             items_after_start.append(xbmc_item)
     return {
         'collection': items_after_start + items_before_start,
-        'start_program_id': start_program_id
+        'start_program_id': start_program_id,
+        'previous_count': len(items_before_start)
     }
 
 
@@ -89,7 +96,7 @@ def map_video_as_playlist_item(plugin, item):
     if isinstance(kind, dict) and kind.get('code', False):
         kind = kind.get('code')
 
-    path = plugin.url_for(
+    path = get_url_builder(plugin).url_for(
         'play_from', kind=kind, program_id=program_id,
         mpaa="Unknown", play_from=PlayFrom.LST.value)
     result = ArteVideoItem(plugin, item).build_item(path, True)
@@ -99,7 +106,7 @@ def map_video_as_playlist_item(plugin, item):
 def map_video_streams_as_menu(plugin, item):
     """Create a menu item for video streams from a json returned by Arte HBBTV API"""
     program_id = item.get('programId')
-    path = plugin.url_for('streams', program_id=program_id)
+    path = get_url_builder(plugin).url_for('streams', program_id=program_id)
     return ArteHbbTvVideoItem(plugin, item).build_item(path, False)
 
 
@@ -107,7 +114,7 @@ def map_video_as_item(plugin, item):
     """Create a playable video menu item from a json returned by Arte HBBTV API"""
     program_id = item.get('programId')
     kind = item.get('kind')
-    path = plugin.url_for('play', kind=kind, program_id=program_id, mpaa="Unknown")
+    path = get_url_builder(plugin).url_for('play', kind=kind, program_id=program_id, mpaa="Unknown")
     return ArteHbbTvVideoItem(plugin, item).build_item(path, True)
 
 
@@ -136,7 +143,7 @@ def map_streams(plugin, item, streams, quality):
 
         video_item['label'] = audio_label
         video_item['is_playable'] = True
-        video_item['path'] = plugin.url_for(
+        video_item['path'] = get_url_builder(plugin).url_for(
             'play_specific', kind=kind, program_id=program_id,
             mpaa='Unknown', play_from=PlayFrom.ITM.value, audio_slot=str(audio_slot))
 
@@ -184,7 +191,8 @@ def map_api_categories_item(plugin, item):
     """
     return {
         'label': item.get('title'),
-        'path': plugin.url_for('api_category', category_code=item.get('link').get('page'))
+        'path': get_url_builder(plugin).url_for(
+            'api_category', category_code=item.get('link').get('page'))
     }
 
 
@@ -0,0 +1,177 @@
+"""
+Compact latency histograms of routes and API endpoints, and counters of cache events.
+Measures are recorded in memory during an add-on invocation and merged at its end
+into a JSON file shared by invocations of the same build of the add-on.
+Durations are counted in logarithmic buckets, so that a histogram takes a few hundred bytes
+whatever the number of measures, at the cost of about 10% of error on percentiles.
+"""
+import functools
+import json
+import math
+import threading
+import time
+from resources.lib import fileutils
+
+# ratio between upper bounds of two successive buckets of durations in milliseconds
+_BUCKET_BASE = 1.2
+# seconds to wait for another add-on invocation saving its measures
+_SAVE_LOCK_TIMEOUT = 2
+
+
+def _bucket(seconds):
+    """Return the index of the bucket of a duration"""
+    milliseconds = seconds * 1000
+    if milliseconds <= 1:
+        return 0
+    return math.ceil(math.log(milliseconds, _BUCKET_BASE))
+
+
+def percentile(buckets, fraction):
+    """
+    Return the upper bound in milliseconds of the bucket containing the percentile,
+    e.g. fraction 0.95 for p95, or None if buckets are empty.
+    :param dict buckets: count of durations by bucket index
+    """
+    total = sum(buckets.values())
+    if not total:
+        return None
+    rank = fraction * total
+    seen = 0
+    for index in sorted(buckets, key=int):
+        seen += buckets[index]
+        if seen >= rank:
+            return round(_BUCKET_BASE ** int(index))
+    return None
+
+
+class Metrics:
+    """Histograms and counters of an add-on invocation. Thread safe."""
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, error=False, size=0):
+        """Record the duration of an operation, whether it failed and the bytes it received"""
+        index = str(_bucket(seconds))
+        with self._lock:
+            histogram = self.histograms.setdefault(
+                name, {'count': 0, 'errors': 0, 'bytes': 0, 'buckets': {}})
+            histogram['count'] += 1
+            histogram['errors'] += 1 if error else 0
+            histogram['bytes'] += size or 0
+            histogram['buckets'][index] = histogram['buckets'].get(index, 0) + 1
+
+    def count(self, name, event):
+        """Count an event e.g. hit or miss of a cache"""
+        with self._lock:
+            counter = self.counters.setdefault(name, {})
+            counter[event] = counter.get(event, 0) + 1
+
+    def timed(self, name):
+        """Decorator recording the duration of every call of a function as name"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.monotonic()
+                error = True
+                try:
+                    result = func(*args, **kwargs)
+                    error = False
+                    return result
+                finally:
+                    self.record(name, time.monotonic() - start, error)
+            return wrapper
+        return decorator
+
+    def save(self, file_path, build):
+        """
+        Merge measures into file_path and forget them.
+        Measures of another build in file_path are discarded.
+        """
+        with self._lock:
+            histograms, self.histograms = self.histograms, {}
+            counters, self.counters = self.counters, {}
+        if not histograms and not counters:
+            return
+        lock = fileutils.FileLock(file_path + '.lock')
+        if not lock.acquire(_SAVE_LOCK_TIMEOUT):
+            return
+        try:
+            saved = load(file_path)
+            if saved.get('build') != build:
+                saved = {'build': build, 'histograms': {}, 'counters': {}}
+            _merge_histograms(saved.setdefault('histograms', {}), histograms)
+            for name, events in counters.items():
+                _merge_counts(saved.setdefault('counters', {}).setdefault(name, {}), events)
+            fileutils.write_atomic(file_path, json.dumps(saved).encode('utf-8'))
+        finally:
+            lock.release()
+
+
+def _merge_counts(into, counts):
+    for key, value in counts.items():
+        into[key] = into.get(key, 0) + value
+
+
+def _merge_histograms(into, histograms):
+    for name, histogram in histograms.items():
+        saved = into.setdefault(name, {'count': 0, 'errors': 0, 'bytes': 0, 'buckets': {}})
+        for key in ('count', 'errors', 'bytes'):
+            saved[key] = saved.get(key, 0) + histogram[key]
+        _merge_counts(saved.setdefault('buckets', {}), histogram['buckets'])
+
+
+def load(file_path):
+    """Return measures saved in file_path or an empty dict"""
+    try:
+        with open(file_path, 'rb') as metrics_file:
+            return json.loads(metrics_file.read())
+    except (OSError, ValueError):
+        return {}
+
+
+def summarize(saved):
+    """
+    Return a pair of lists summarizing measures loaded from a file, sorted by name:
+    histograms as dicts with name, count, errors, bytes, p50, p95 and p99 in milliseconds,
+    counters as dicts with name, every event count and ratio of hits.
+    """
+    histograms = []
+    for name, histogram in sorted(saved.get('histograms', {}).items()):
+        buckets = histogram.get('buckets', {})
+        histograms.append({
+            'name': name, 'count': histogram.get('count', 0),
+            'errors': histogram.get('errors', 0), 'bytes': histogram.get('bytes', 0),
+            'p50': percentile(buckets, 0.5), 'p95': percentile(buckets, 0.95),
+            'p99': percentile(buckets, 0.99)})
+    counters = []
+    for name, events in sorted(saved.get('counters', {}).items()):
+        total = sum(events.values())
+        counters.append(dict(events, name=name, ratio=events.get('hit', 0) / total))
+    return histograms, counters
+
+
+# measures of the whole add-on invocation
+_METRICS = Metrics()
+
+
+def record(name, seconds, error=False, size=0):
+    """Record a duration in the measures of the add-on invocation. See Metrics.record"""
+    _METRICS.record(name, seconds, error, size)
+
+
+def count(name, event):
+    """Count an event in the measures of the add-on invocation. See Metrics.count"""
+    _METRICS.count(name, event)
+
+
+def timed(name):
+    """Decorator recording durations in the measures of the add-on invocation"""
+    return _METRICS.timed(name)
+
+
+def save(file_path, build):
+    """Merge the measures of the add-on invocation into file_path. See Metrics.save"""
+    _METRICS.save(file_path, build)
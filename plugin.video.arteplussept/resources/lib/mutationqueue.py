@@ -0,0 +1,146 @@
+"""
+Durable queue of changes of user content to send to Arte e.g. favorites and progress.
+A change is appended to a journal on disk instantly, then sent by a flush.
+Changes failing with a network or server error stay in the journal and are retried
+with exponential backoff by the next flush, even after Kodi restarted.
+Flush coalesces changes of the same key: only the last one is sent,
+e.g. remove after add of a favorite, latest progress of a program.
+"""
+import contextlib
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from resources.lib import fileutils
+
+# seconds before first retry of a change, doubled at each retry, and max backoff
+_BACKOFF_BASE = 30
+_BACKOFF_MAX = 60 * 60
+# seconds after which a change not sent yet is forgotten
+_MAX_AGE = 7 * 24 * 60 * 60
+# seconds to wait for another invocation appending to or rewriting the journal
+_JOURNAL_LOCK_TIMEOUT = 2
+
+
+def is_retryable(status):
+    """Return True, if a change sent with this result may succeed later"""
+    return status is None or status in (401, 408, 429) or status >= 500
+
+
+class MutationQueue:
+    """
+    Journal of changes in folder path, one JSON line per change.
+    Safe to use from several threads and add-on invocations.
+    Only one invocation flushes the journal at a time.
+    """
+
+    def __init__(self, path):
+        self.file_path = os.path.join(path, 'journal.jsonl')
+        self._journal_lock = fileutils.FileLock(os.path.join(path, 'journal.lock'))
+        self._flush_lock = fileutils.FileLock(os.path.join(path, 'flush.lock'), 5 * 60)
+
+    def append(self, key, operation, args):
+        """
+        Record a change to be sent later with operation and args.
+        Changes with the same key supersede each other.
+        Return the key.
+        """
+        mutation = {'id': uuid.uuid4().hex, 'key': key, 'op': operation, 'args': args,
+                    'at': time.time(), 'attempts': 0, 'not_before': 0}
+        with self._locked_journal():
+            with open(self.file_path, 'a', encoding='utf-8') as journal:
+                journal.write(json.dumps(mutation) + '\n')
+                journal.flush()
+                os.fsync(journal.fileno())
+        return key
+
+    def pending(self):
+        """Return the changes to send, the last one of each key, oldest key first"""
+        return _coalesce(self._read())
+
+    def flush(self, send, now=None, max_workers=1):
+        """
+        Send pending changes, which are not waiting for a retry.
+        Return a dict of key and result of send for every change sent, None if it will be retried.
+        Return an empty dict, if another invocation is flushing.
+        :param fn send: function taking a change with op and args, returning HTTP status code
+        or None if the change could not be sent e.g. network error
+        :param int max_workers: number of changes sent at the same time
+        """
+        if not self._flush_lock.acquire():
+            return {}
+        try:
+            return self._flush(send, now or time.time(), max_workers)
+        finally:
+            self._flush_lock.release()
+
+    def _flush(self, send, now, max_workers):
+        read = self._read()
+        if not read:
+            return {}
+        results = {}
+        retries = []
+        due = []
+        for mutation in _coalesce(read):
+            if now - mutation.get('at', now) > _MAX_AGE:
+                continue
+            if mutation.get('not_before', 0) > now:
+                retries.append(mutation)
+            else:
+                due.append(mutation)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            statuses = list(executor.map(send, due))
+        for mutation, status in zip(due, statuses):
+            if is_retryable(status):
+                mutation['attempts'] = mutation.get('attempts', 0) + 1
+                mutation['not_before'] = now + min(
+                    _BACKOFF_BASE * 2 ** (mutation['attempts'] - 1), _BACKOFF_MAX)
+                retries.append(mutation)
+                status = None
+            results[mutation['key']] = status
+        read_ids = {mutation.get('id') for mutation in read}
+        with self._locked_journal():
+            # keep changes appended by other invocations, while sending
+            appended = [mutation for mutation in self._read() if mutation.get('id') not in read_ids]
+            content = ''.join(json.dumps(mutation) + '\n' for mutation in retries + appended)
+            fileutils.write_atomic(self.file_path, content.encode('utf-8'))
+        return results
+
+    def clear(self):
+        """Forget every change not sent yet e.g. when user logs out"""
+        with self._locked_journal():
+            fileutils.remove_quietly(self.file_path)
+
+    def _read(self):
+        """Return every change in journal, in order. Skip lines partially written"""
+        mutations = []
+        try:
+            with open(self.file_path, 'rb') as journal:
+                for line in journal:
+                    try:
+                        mutations.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except OSError:
+            pass
+        return mutations
+
+    @contextlib.contextmanager
+    def _locked_journal(self):
+        """Hold the lock of the journal. Proceed without it, if it is held for too long"""
+        acquired = self._journal_lock.acquire(_JOURNAL_LOCK_TIMEOUT)
+        try:
+            yield
+        finally:
+            if acquired:
+                self._journal_lock.release()
+
+
+def _coalesce(mutations):
+    """Return the last change of every key, ordered by the first change of the key"""
+    last_by_key = {}
+    for mutation in mutations:
+        # dict keeps the insertion order of the first change of a key
+        last_by_key[mutation.get('key')] = mutation
+    return list(last_by_key.values())
@@ -1,13 +1,32 @@
 """Events enhancing behavior of default Kodi player"""
+import re
+from time import monotonic
 # pylint: disable=import-error
 from xbmcswift2 import xbmc
 from resources.lib import api
 
+# seconds between two samples of playback time.
+# interval is doubled after each sample, up to max, and reset on seek or resume
+_MIN_INTERVAL = 5
+_MAX_INTERVAL = 30
+# seconds between two checks of the end of playback, while waiting for the next sample
+_END_CHECK_INTERVAL = 1
+# seconds to wait for playback to start, before giving up tracking it
+_START_TIMEOUT = 30
+# seconds of playback between two synchronizations while playing, as on Arte TV website
+_SYNC_PERIOD = 60
+# seconds of difference with the time already synchronized, worth a synchronization
+_MIN_MOVE = 5
+# program id in path of playlist items
+# e.g. plugin://plugin.video.arteplussept/play/SHOW/110342-012-A/Unknown/playlist
+_PROGRAM_ID_IN_PATH = re.compile(r'/play/[^/]+/([^/]+)')
+
 
 # this player send request to Arte TV API
 # to synchronise playback progress
 # when playback is paused or stopped or crashed
 # https://xbmc.github.io/docs.kodi.tv/master/kodi-dev-kit/group__python___player_c_b.html
+# pylint: disable=too-many-instance-attributes
 class Player(xbmc.Player):
     """Events enhancing behavior of default Kodi player
     used to track in Arte TV progress time and history"""
@@ -17,55 +36,151 @@ class Player(xbmc.Player):
         self.program_id = program_id
         self.token = token
         self.last_time = 0
+        # time of program_id known by Arte TV, after the last successful synchronization
+        self.synced_time = None
+        self.total_time = 0
+        self.interval = _MIN_INTERVAL
+        self.started = False
+        self.ended = False
 
-    def is_playback(self):
-        """Track progress time during playback"""
-        try:
-            # need to keep track of last time to avoid
-            # RuntimeError: Kodi is not playing any media file
-            # when calling player.getTime() in onPlayBackStopped()
-            self.last_time = self.getTime()
-            # when playing video playlist, isPlayingVideo() is False, isPlaying() is True
-            return (self.isPlaying() or self.isPlayingVideo() or self.isPlayingAudio()) \
-                and self.last_time >= 0
-        # pylint: disable=broad-exception-caught
-        # https://codedocs.xyz/MartijnKaijser/xbmc/group__python___player.html
-        except Exception:
-            return False
+    def track(self):
+        """
+        Track progress time of program_id until it is not played anymore.
+        Playback time is sampled less and less often while nothing happens,
+        and synchronized with Arte TV only when it changed enough.
+        """
+        monitor = xbmc.Monitor()
+        waited = 0
+        while self._wait(monitor, self.interval):
+            if not self.started:
+                waited += self.interval
+                if waited >= _START_TIMEOUT:
+                    xbmc.log(f"Playback of {self.program_id} not started after " +
+                             f"{_START_TIMEOUT}s. Stop tracking progress",
+                             level=xbmc.LOGWARNING)
+                    return
+                continue
+            if not self._sample():
+                break
+            self._sync_if_moved(_SYNC_PERIOD)
+            self.interval = min(self.interval * 2, _MAX_INTERVAL)
+        if not self.ended:
+            self._end()
+
+    def _wait(self, monitor, seconds):
+        """
+        Wait for seconds, checking every second that playback did not end.
+        Return False, if playback ended or Kodi is exiting.
+        """
+        deadline = monotonic() + seconds
+        while not self.ended:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                return True
+            if monitor.waitForAbort(min(remaining, _END_CHECK_INTERVAL)):
+                return False
+        return False
 
     def onAVStarted(self):
         # pylint: disable=invalid-name
         # method name defined by Kodi framework
         """Track progress time when user stars playing"""
-        self.synch_progress()
+        if not self.started:
+            self.started = True
+            self._sample()
+            try:
+                self.total_time = self.getTotalTime()
+            except RuntimeError:
+                pass
+            self._sync_if_moved(_MIN_MOVE)
+        elif self._get_playing_program_id() != self.program_id:
+            # next item of a playlist, tracked by the add-on invocation playing it
+            self._end()
+
+    def onPlayBackSeek(self, time, _seek_offset):
+        # pylint: disable=invalid-name
+        # method name defined by Kodi framework
+        """Keep time to which user jumped and sample time more often"""
+        self.last_time = time / 1000
+        self.interval = _MIN_INTERVAL
+
+    def onPlayBackResumed(self):
+        # pylint: disable=invalid-name
+        # method name defined by Kodi framework
+        """Sample time more often, since it moves again"""
+        self.interval = _MIN_INTERVAL
 
     def onPlayBackStopped(self):
         # pylint: disable=invalid-name
         # method name defined by Kodi framework
         """Track progress time when user stops playing"""
-        self.synch_progress()
+        self._end()
 
     def onPlayBackEnded(self):
         # pylint: disable=invalid-name
         # method name defined by Kodi framework
         """Track progress time when kodi stops playing"""
-        self.synch_progress()
+        self._end()
 
     def onPlayBackError(self):
         # pylint: disable=invalid-name
         # method name defined by Kodi framework
         """Track progress time when kodi stops playing"""
-        self.synch_progress()
+        self._end()
 
     def onPlayBackPaused(self):
         # pylint: disable=invalid-name
         # method name defined by Kodi framework
         """Track progress time when kodi pauses playing"""
-        self.synch_progress()
+        self._sample()
+        self._sync_if_moved(_MIN_MOVE)
+        # time does not move while paused
+        self.interval = _MAX_INTERVAL
+
+    def _sample(self):
+        """Keep current playback time. Return False, if Kodi is not playing anymore"""
+        try:
+            if not self.isPlaying():
+                return False
+            self.last_time = self.getTime()
+            return True
+        # https://codedocs.xyz/MartijnKaijser/xbmc/group__python___player.html
+        # RuntimeError: Kodi is not playing any media file
+        except RuntimeError:
+            return False
+
+    def _end(self):
+        """Synchronize progress for the last time and stop tracking"""
+        if self.ended or not self.started:
+            self.ended = True
+            return
+        self.ended = True
+        # playback time may be sampled a while ago. consider video watched, if it was near its end
+        if self.total_time and self.total_time - self.last_time <= _MAX_INTERVAL:
+            self.last_time = self.total_time
+        self._sync_if_moved(_MIN_MOVE)
+
+    def _sync_if_moved(self, min_move):
+        """Synchronize progress, if it moved by min_move seconds since last synchronization"""
+        if self.synced_time is not None and abs(self.last_time - self.synced_time) < min_move:
+            return
+        # progress not sent yet is queued and sent later. No need to send it again
+        if self.synch_progress() in (200, None):
+            self.synced_time = self.last_time
+
+    def _get_playing_program_id(self):
+        """Return the program id of the playlist item being played or None if unknown"""
+        playlist = xbmc.PlayList(xbmc.PLAYLIST_VIDEO)
+        position = playlist.getposition()
+        if position < 0 or position >= playlist.size():
+            return None
+        match = _PROGRAM_ID_IN_PATH.search(playlist[position].getPath())
+        return match.group(1) if match else None
 
     def synch_progress(self):
         """Track progress/playback time and share it with Arte TV,
-        so that other device with the user account can share progress and history"""
+        so that other device with the user account can share progress and history.
+        Return HTTP status code or None, if Arte was not reachable and it will be sent later"""
         if not self.token:
             xbmc.log(f"Unable to synchronise progress with Arte TV for {self.program_id}",
                      level=xbmc.LOGWARNING)
@@ -79,8 +194,9 @@ class Player(xbmc.Player):
             return 400
 
         self.last_time = round(self.last_time)
-        status = api.sync_last_viewed(self.token, self.program_id, self.last_time)
+        key = api.queue_sync_last_viewed(self.token, self.program_id, self.last_time)
+        status = api.flush_queued_changes(self.token).get(key)
         xbmc.log(f"Synchronisation of progress {self.last_time}s with Arte TV " +
-                 f"for {self.program_id} ended with {status}",
+                 f"for {self.program_id} ended with {status or 'retry later'}",
                  level=xbmc.LOGINFO)
         return status
@@ -1,12 +1,21 @@
 """Main module for Kodi add-on plugin.video.arteplussept"""
 
+import json
+import threading
 import xbmcaddon
 import xbmcgui
 # pylint: disable=import-error
+import requests
+# pylint: disable=import-error
+from xbmcswift2 import actions
+# pylint: disable=import-error
 from xbmcswift2 import Plugin
 # pylint: disable=import-error
 from xbmcswift2 import xbmc
+from resources.lib import api
 from resources.lib import logger
+from resources.lib import metrics
+from resources.lib import storage
 from resources.lib import user
 from resources.lib import view
 from resources.lib.mapper.artefavorites import ArteFavorites
@@ -26,6 +35,7 @@ settings = Settings(plugin)
 
 
 @plugin.route('/', name='index')
+@metrics.timed('route/display_index')
 def display_index():
     """
     Display home menu. On every new version, display a dialog box
@@ -42,13 +52,34 @@ def display_index():
         )
         addon.setSetting("last_info_version", current_version)
 
-    lst_itms = view.build_home_page(
-        plugin, settings, plugin.get_storage('cached_categories', TTL=60))
+    cached_categories = storage.get_cached_categories()
+    if settings.home_max_staleness > 0:
+        home_snapshots = storage.get_home_snapshots(settings.home_max_staleness * 60)
+        lst_itms = view.get_home_page_snapshot(
+            plugin, settings, cached_categories, home_snapshots)
+        if lst_itms is None:
+            lst_itms = view.build_home_page_snapshot(
+                plugin, settings, cached_categories, home_snapshots)
+        else:
+            # display the snapshot right now and refresh it for next time
+            xbmc.executebuiltin(actions.background(plugin.url_for('refresh_home')))
+    else:
+        lst_itms = view.build_home_page(plugin, settings, cached_categories)
     logger.log_xbmc(lst_itms, 'index')
     return lst_itms
 
 
+@plugin.route('/refresh_home', name='refresh_home')
+@metrics.timed('route/refresh_home')
+def refresh_home():
+    """Build home menu in background and keep it for the next display of home menu"""
+    view.build_home_page_snapshot(
+        plugin, settings, storage.get_cached_categories(),
+        storage.get_home_snapshots(settings.home_max_staleness * 60))
+
+
 @plugin.route('/category/api/<category_code>', name='api_category')
+@metrics.timed('route/display_api_category')
 def display_api_category(category_code):
     """Display the menu for a category that needs an api call"""
     lst_itms = view.build_api_category(plugin, category_code, settings)
@@ -57,19 +88,21 @@ def display_api_category(category_code):
 
 
 @plugin.route('/category/cached/<zone_id>', name='cached_category')
+@metrics.timed('route/display_cached_category')
 def display_cached_category(zone_id):
     """Display the menu for a category that is stored
     in cache from previous api call like home page"""
     lst_itms = view.get_cached_category(
-        zone_id, plugin.get_storage('cached_categories', TTL=60))
+        plugin, settings, zone_id, storage.get_cached_categories())
     logger.log_xbmc(lst_itms, 'cached_category')
     return lst_itms
 
 
 @plugin.route('/category/page/<zone_id>/<page>/<page_id>', name='category_page')
+@metrics.timed('route/display_category_page')
 def display_category_page(zone_id, page, page_id):
     """Display the menu for a category that needs an api call"""
-    lst_itms = ArteZone(plugin, settings, plugin.get_storage('cached_categories', TTL=60)) \
+    lst_itms = ArteZone(plugin, settings, storage.get_cached_categories()) \
         .build_menu(zone_id, page, page_id)
     logger.log_xbmc(lst_itms, 'category_page')
     return lst_itms
@@ -77,6 +110,7 @@ def display_category_page(zone_id, page, page_id):
 
 @plugin.route('/favorites', name='favorites_default')
 @plugin.route('/favorites/<page>', name='favorites')
+@metrics.timed('route/display_favorites')
 def display_favorites(page=1):
     """Display the menu for user favorites"""
     lst_itms = ArteFavorites(plugin, settings).build_menu(page)
@@ -85,37 +119,60 @@ def display_favorites(page=1):
 
 
 @plugin.route('/add_favorite/<program_id>/<label>', name='add_favorite')
+@metrics.timed('route/add_favorite')
 def add_favorite(program_id, label):
     """Add content program_id to user favorites.
-    Notify about completion status with label,
+    Notify with label, once the change is queued,
     useful when several operations are requested in parallel."""
     ArteFavorites(plugin, settings).add_favorite(program_id, label)
 
 
 @plugin.route('/remove_favorite/<program_id>/<label>', name='remove_favorite')
+@metrics.timed('route/remove_favorite')
 def remove_favorite(program_id, label):
     """Remove content program_id from user favorites
-    Notify about completion status with label,
+    Notify with label, once the change is queued,
     useful when several operations are requested in parallel."""
     ArteFavorites(plugin, settings).remove_favorite(program_id, label)
 
 
 @plugin.route('/purge_favorites', name='purge_favorites')
+@metrics.timed('route/purge_favroties')
 def purge_favroties():
     """Flush user history and notify about completion status"""
     ArteFavorites(plugin, settings).purge()
 
 
 @plugin.route('/mark_as_watched/<program_id>/<label>', name='mark_as_watched')
+@metrics.timed('route/mark_as_watched')
 def mark_as_watched(program_id, label):
     """Mark program as watched in Arte
-    Notify about completion status with label,
+    Notify with label, once the change is queued,
     useful when several operations are requested in parallel."""
     view.mark_as_watched(plugin, settings.username, program_id, label)
 
 
+@plugin.route('/mark_collection_as_watched/<kind>/<collection_id>/<label>',
+              name='mark_collection_as_watched')
+@metrics.timed('route/mark_collection_as_watched')
+def mark_collection_as_watched(kind, collection_id, label):
+    """Mark every program of collection as watched in Arte.
+    Display progress and notify about completion status with label."""
+    view.mark_collection_as_watched(plugin, settings, kind, collection_id, label)
+
+
+@plugin.route('/add_collection_to_favorites/<kind>/<collection_id>/<label>',
+              name='add_collection_to_favorites')
+@metrics.timed('route/add_collection_to_favorites')
+def add_collection_to_favorites(kind, collection_id, label):
+    """Add every program of collection to user favorites.
+    Display progress and notify about completion status with label."""
+    view.add_collection_to_favorites(plugin, settings, kind, collection_id, label)
+
+
 @plugin.route('/last_viewed', name='last_viewed_default')
 @plugin.route('/last_viewed/<page>', name='last_viewed')
+@metrics.timed('route/display_last_viewed')
 def display_last_viewed(page=1):
     """Display the menu of user history"""
     lst_itms = ArteHistory(plugin, settings).build_menu(page)
@@ -124,12 +181,14 @@ def display_last_viewed(page=1):
 
 
 @plugin.route('/purge_last_viewed', name='purge_last_viewed')
+@metrics.timed('route/purge_last_viewed')
 def purge_last_viewed():
     """Flush user history and notify about completion status"""
     ArteHistory(plugin, settings).purge()
 
 
 @plugin.route('/collection/<kind>/<program_id>', name='collection')
+@metrics.timed('route/display_collection')
 def display_collection(kind, program_id):
     """Display menu for collection of content"""
     lst_itms = view.build_mixed_collection(plugin, kind, program_id, settings)
@@ -138,6 +197,7 @@ def display_collection(kind, program_id):
 
 
 @plugin.route('/streams/<program_id>', name='streams')
+@metrics.timed('route/display_streams')
 def display_streams(program_id):
     """Play a multi language content."""
     lst_itms = view.build_video_streams(plugin, settings, program_id)
@@ -146,6 +206,7 @@ def display_streams(program_id):
 
 
 @plugin.route('/play_live/<stream_url>/<mpaa>', name='play_live')
+@metrics.timed('route/play_live')
 def play_live(stream_url, mpaa):
     """Play live content."""
     utils.warn_if_age_restricted(plugin, mpaa)
@@ -153,6 +214,16 @@ def play_live(stream_url, mpaa):
     logger.log_xbmc(lst_itm, 'play_live')
     return plugin.set_resolved_url(lst_itm)
 
+
+@plugin.route('/diagnostics', name='diagnostics')
+def display_diagnostics():
+    """
+    Display latencies of routes and API endpoints, cache hit ratios and error counts.
+    Hidden from menus. Open plugin://plugin.video.arteplussept/diagnostics to display it.
+    """
+    return view.build_diagnostics(plugin)
+
+
 # Cannot read video new arte tv program API. Blocked by FFMPEG issue #10149
 # @plugin.route('/play_artetv/<program_id>', name='play_artetv')
 # def play_artetv(program_id):
@@ -163,20 +234,58 @@ def play_live(stream_url, mpaa):
 
 
 def synch_during_playback(synched_player):
-    """Manage timeframe to send synchronization events to Arte TV API"""
-    # wait 1s first to give a chance for playback to start
-    # otherwise synched_player won't be able to listen
-    xbmc.sleep(500)
-    # start at 0 to synch progress at start-up
-    i = 1
-    # keep current method stack up to keep event callbacks up
-    while synched_player.is_playback():
-        # synch progress to Arte TV every minute, as on website
-        if i % 60 == 0:
-            synched_player.synch_progress()
-        i += 1
-        xbmc.sleep(1000)
-    synched_player.synch_progress()
+    """
+    Keep current method stack up to keep player event callbacks up,
+    until synched_player stops tracking progress with Arte TV
+    """
+    synched_player.track()
+
+
+def add_siblings_to_playlist(program_id):
+    """
+    Add videos belonging to the same parent as program_id e.g. episodes of a serie,
+    in the video playlist around program_id, while it is playing:
+    previous episodes before it and next ones after it.
+    Errors are logged only, since playback already started.
+    """
+    try:
+        sibling_playlist = view.build_sibling_playlist(plugin, settings, program_id)
+        if sibling_playlist is None or len(sibling_playlist['collection']) < 2:
+            return
+        siblings = sibling_playlist['collection']
+        position = xbmc.PlayList(xbmc.PLAYLIST_VIDEO).getposition()
+        if position < 0 or sibling_playlist['start_program_id'] != program_id:
+            logger.log_xbmc(plugin.add_to_playlist(siblings), 'play')
+            return
+        # sibling playlist starts with program_id, which is already in playlist, being played,
+        # and ends with the siblings before it
+        next_count = len(siblings) - sibling_playlist['previous_count']
+        logger.log_xbmc(plugin.add_to_playlist(siblings[1:next_count]), 'play')
+        insert_in_playlist(siblings[next_count:], position)
+    # Kodi raises RuntimeError, when playlist cannot be changed
+    # AttributeError, KeyError or ValueError, when Arte replies with unexpected content
+    except (requests.exceptions.RequestException, OSError, RuntimeError,
+            AttributeError, KeyError, ValueError) as error:
+        xbmc.log(f"Unable to build playlist of {program_id} because \"{str(error)}\"",
+                 level=xbmc.LOGWARNING)
+
+
+def insert_in_playlist(items, position):
+    """
+    Insert items in the video playlist at position, in the same order.
+    Unlike xbmc.PlayList.add, JSON-RPC moves the position of the item being played accordingly,
+    so that it plays next the item after it. Inserted items are labelled by Kodi from their path.
+    Raise RuntimeError, if Kodi rejects the change.
+    """
+    if not items:
+        return
+    reply = json.loads(xbmc.executeJSONRPC(json.dumps({
+        'jsonrpc': '2.0', 'id': 1, 'method': 'Playlist.Insert',
+        'params': {'playlistid': xbmc.PLAYLIST_VIDEO, 'position': position,
+                   'item': [{'file': item['path']} for item in items]}})))
+    if 'error' in reply:
+        raise RuntimeError(reply['error'].get('message'))
+    logger.log_xbmc(items, 'play')
 
 
 @plugin.route('/play/<kind>/<program_id>/<mpaa>', name='play')
@@ -187,38 +296,48 @@ def play(kind, program_id, mpaa, play_from=PlayFrom.ITM, audio_slot='1'):
     :param str kind: an enum in TODO (e.g. TRAILER, COLLECTION, LINK, CLIP, ...)
     :param str audio_slot: a numeric to identify the audio stream to use e.g. 1 2
     """
-    synched_player = Player(user.get_cached_token(plugin, settings.username, True), program_id)
-    # try to seek parent collection, when out of the context of playlist creation
-    sibling_playlist = None
-    if play_from == PlayFrom.LST.value:
-        sibling_playlist = view.build_sibling_playlist(plugin, settings, program_id)
-    played_item = None
-    if sibling_playlist is not None and len(sibling_playlist['collection']) > 1:
-        # Empty playlist, otherwise requested video is present twice in the playlist
-        xbmc.PlayList(xbmc.PLAYLIST_VIDEO).clear()
-        # Start playing with the first playlist item
-        played_item = plugin.add_to_playlist(sibling_playlist['collection'])[0]
-        logger.log_xbmc(played_item, 'play')
-        result = plugin.set_resolved_url()
-    else:
-        played_item = view.build_stream_url(plugin, settings, kind, program_id, int(audio_slot))
-        logger.log_xbmc(played_item, 'play')
-        if play_from == PlayFrom.CTX.value:
-            result = plugin.play_video(played_item)
-        else:
-            result = plugin.set_resolved_url(played_item)
-    utils.warn_if_age_restricted(plugin, mpaa)
-
+    synched_player, result = start_playing(kind, program_id, mpaa, play_from, audio_slot)
     synch_during_playback(synched_player)
     del synched_player
     return result
 
 
+# route duration is measured until playback starts, not until it ends
+@metrics.timed('route/play')
+def start_playing(kind, program_id, mpaa, play_from, audio_slot):
+    """Start playing content of play route. Return a pair of player tracking it and result"""
+    synched_player = Player(user.get_cached_token(plugin, settings.username, True), program_id)
+    # start playing first. Parent collection is looked for afterwards
+    played_item = view.build_stream_url(plugin, settings, kind, program_id, int(audio_slot))
+    logger.log_xbmc(played_item, 'play')
+    if play_from == PlayFrom.CTX.value:
+        result = plugin.play_video(played_item)
+    else:
+        result = plugin.set_resolved_url(played_item)
+    # try to seek parent collection, when out of the context of playlist creation
+    # i.e. unless a playlist is being played
+    if play_from == PlayFrom.LST.value and xbmc.PlayList(xbmc.PLAYLIST_VIDEO).size() < 2:
+        # daemon: playlist is useless once playback is over and add-on invocation ends
+        threading.Thread(target=add_siblings_to_playlist, args=(program_id,),
+                         name='sibling-playlist', daemon=True).start()
+    utils.warn_if_age_restricted(plugin, mpaa)
+    return synched_player, result
+
+
 @plugin.route('/play_collection/<kind>/<collection_id>/<mpaa>', name='play_collection')
 def play_collection(kind, collection_id, mpaa):
     """
     Load a playlist and start playing its first item.
     """
+    synched_player, result = start_playing_collection(kind, collection_id, mpaa)
+    synch_during_playback(synched_player)
+    del synched_player
+    return result
+
+
+@metrics.timed('route/play_collection')
+def start_playing_collection(kind, collection_id, mpaa):
+    """Start playing content of play_collection route. Return a pair like start_playing"""
     playlist = view.build_collection_playlist(plugin, settings, kind, collection_id)
 
     # Empty playlist, otherwise requested video is present twice in the playlist
@@ -233,12 +352,11 @@ def play_collection(kind, collection_id, mpaa):
     logger.log_xbmc(played_item, 'play_collection')
     result = plugin.set_resolved_url(played_item)
     utils.warn_if_age_restricted(plugin, mpaa)
-    synch_during_playback(synched_player)
-    del synched_player
-    return result
+    return synched_player, result
 
 
 @plugin.route('/search', name='init_search')
+@metrics.timed('route/init_search')
 def init_search():
     """Display the keyboard to search for content.
     Then, display the first page of search results"""
@@ -248,6 +366,7 @@ def init_search():
 
 
 @plugin.route('/search/<zone_id>/<page>/<query>', name='search')
+@metrics.timed('route/display_search_page')
 def display_search_page(zone_id, page, query):
     """Display a given page of search results"""
     lst_itms = ArteSearch(plugin, settings).get_search_page(zone_id, page, query)
@@ -256,17 +375,25 @@ def display_search_page(zone_id, page, query):
 
 
 @plugin.route('/user/login', name='user_login')
+@metrics.timed('route/user_login')
 def user_login():
     """Login user with email already set in settings by creating and persisting a token."""
     return plugin.finish(succeeded=user.login(plugin))
 
 
 @plugin.route('/user/logout', name='user_logout')
+@metrics.timed('route/user_logout')
 def user_logout():
     """Discard token of user in settings."""
     return plugin.finish(succeeded=user.logout(plugin, settings))
 
 
+def flush_queued_changes():
+    """Send changes of user content that previous add-on invocations were unable to send"""
+    if api.has_queued_changes():
+        api.flush_queued_changes(user.get_cached_token(plugin, settings.username, True))
+
+
 # plugin bootstrap
 if __name__ == '__main__':
     plugin.run()
@@ -0,0 +1,147 @@
+"""
+Local index of static facts about programs: duration, kind, parent collections and age rating.
+It is populated with items of every listing downloaded from Arte, e.g. zones, collections,
+favorites, so that these facts are read locally instead of requesting a program page.
+The index is stored in a SQLite database and keeps the most recently seen programs only.
+It is trimmed, when it exceeds its max number of programs by a margin, not on every update.
+"""
+import json
+import sqlite3
+import threading
+import time
+from resources.lib import utils
+
+# programs kept in index, all languages. About 300 bytes each
+DEFAULT_MAX_PROGRAMS = 10000
+# seconds to wait for another add-on invocation writing in index
+_BUSY_TIMEOUT = 2
+# index is trimmed, once it may hold more than this ratio of its max number of programs
+_TRIM_RATIO = 1.1
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS programs (
+    program_id TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    duration INTEGER,
+    kind TEXT,
+    parents TEXT,
+    age_rating INTEGER,
+    seen_at REAL NOT NULL,
+    PRIMARY KEY (program_id, lang)
+)
+'''
+_SEEN_AT_INDEX = 'CREATE INDEX IF NOT EXISTS programs_seen_at ON programs (seen_at)'
+# keep known facts, when an item does not provide them
+_UPSERT = '''
+INSERT INTO programs (program_id, lang, duration, kind, parents, age_rating, seen_at)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (program_id, lang) DO UPDATE SET
+    duration = COALESCE(excluded.duration, duration),
+    kind = COALESCE(excluded.kind, kind),
+    parents = COALESCE(excluded.parents, parents),
+    age_rating = COALESCE(excluded.age_rating, age_rating),
+    seen_at = excluded.seen_at
+'''
+_TRIM = '''
+DELETE FROM programs WHERE rowid IN (
+    SELECT rowid FROM programs ORDER BY seen_at DESC LIMIT -1 OFFSET ?)
+'''
+
+
+def get_kind(item):
+    """Return item kind code e.g. SHOW, TV_SERIES or None"""
+    kind = item.get('kind')
+    if isinstance(kind, dict):
+        kind = kind.get('code')
+    return kind if isinstance(kind, str) else None
+
+
+def extract_facts(item):
+    """Return a dict with the facts about an Arte item kept in index, None if it has no id"""
+    program_id = item.get('programId') if isinstance(item, dict) else None
+    if not isinstance(program_id, str):
+        return None
+    parents = item.get('parentCollections')
+    age_rating = item.get('ageRating')
+    return {
+        'program_id': program_id,
+        'duration': utils.get_duration(item),
+        'kind': get_kind(item),
+        'parents': parents if isinstance(parents, list) else None,
+        'age_rating': age_rating if isinstance(age_rating, int) else None,
+    }
+
+
+class ProgramIndex:
+    """Facts about programs per language, in SQLite database file_path. Thread safe."""
+
+    def __init__(self, file_path, max_programs=DEFAULT_MAX_PROGRAMS):
+        self.file_path = file_path
+        self.max_programs = max_programs
+        self._lock = threading.Lock()
+        self._connection = None
+        # upper bound of the number of programs in index, once counted
+        self._count = None
+
+    def _connect(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(
+                self.file_path, timeout=_BUSY_TIMEOUT, check_same_thread=False)
+            self._connection.row_factory = sqlite3.Row
+            with self._connection:
+                self._connection.execute(_SCHEMA)
+                self._connection.execute(_SEEN_AT_INDEX)
+        return self._connection
+
+    def update(self, lang, items):
+        """Index facts of items from a listing in language lang. Return the number indexed"""
+        now = time.time()
+        rows = []
+        for item in items or []:
+            facts = extract_facts(item)
+            if facts is None:
+                continue
+            parents = facts['parents']
+            rows.append((facts['program_id'], lang, facts['duration'], facts['kind'],
+                         None if parents is None else json.dumps(parents),
+                         facts['age_rating'], now))
+        if not rows:
+            return 0
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.executemany(_UPSERT, rows)
+                if self._count is None:
+                    self._count = connection.execute(
+                        'SELECT COUNT(*) FROM programs').fetchone()[0]
+                else:
+                    self._count += len(rows)
+                if self._count > self.max_programs * _TRIM_RATIO:
+                    connection.execute(_TRIM, (self.max_programs,))
+                    self._count = self.max_programs
+        return len(rows)
+
+    def get(self, lang, program_id):
+        """
+        Return a dict with duration, kind, parents and age_rating of program_id in lang
+        or None, if it is not indexed. A fact is None, when it is unknown.
+        """
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT duration, kind, parents, age_rating FROM programs ' +
+                'WHERE program_id = ? AND lang = ?', (program_id, lang)).fetchone()
+        if row is None:
+            return None
+        return {
+            'duration': row['duration'],
+            'kind': row['kind'],
+            'parents': None if row['parents'] is None else json.loads(row['parents']),
+            'age_rating': row['age_rating'],
+        }
+
+    def close(self):
+        """Close the database. It is opened again by the next call"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
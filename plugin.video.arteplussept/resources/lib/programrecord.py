@@ -0,0 +1,125 @@
+"""
+Compact records of programs of Arte TV and HBB TV APIs, holding only the fields read by mappers.
+Items of API replies are projected into records once, when a listing enters mappers.
+Fields depending on the API, like kind, images, air date or age rating, are resolved then,
+so that mappers do not branch on the API an item comes from.
+Records are tuples, small in memory. They are cached as dicts of fields e.g. in cached
+categories, so that records cached by another version of the add-on are read back.
+"""
+import datetime
+from collections import namedtuple
+# pylint: disable=import-error
+import dateutil.parser
+from resources.lib import utils
+
+_FIELDS = [
+    'program_id', 'kind', 'title', 'subtitle', 'plot', 'plotoutline', 'duration', 'mpaa',
+    'thumbnail', 'fanart', 'aired',
+    # progress and time offset in seconds of a program partly viewed, None otherwise
+    'progress', 'timecode',
+    # details available in HBB TV API only. countries is None for Arte TV API items
+    'genre', 'countries', 'director',
+]
+
+
+class ProgramRecord(namedtuple('ProgramRecord', _FIELDS)):
+    """Fields of a video or a collection, as displayed in menus"""
+    __slots__ = ()
+
+    def is_playlist(self):
+        """Return True if program_id is a str starting with PL- or RC-."""
+        return isinstance(self.program_id, str) and self.program_id[:3] in ('RC-', 'PL-')
+
+    def get_playable_video(self):
+        """
+        Return a pair of kind and program id, if the program plays a single video.
+        Return None for playlists, collections and links.
+        """
+        if self.is_playlist() or self.kind == 'EXTERNAL' or not self.program_id:
+            return None
+        return self.kind, self.program_id
+
+
+def from_artetv(item):
+    """Return the record of an item of Arte TV API e.g. in a zone, favorites or history"""
+    kind = item.get('kind')
+    if isinstance(kind, dict) and kind.get('code', False):
+        kind = kind.get('code')
+    image_url = _get_artetv_image_url(item)
+    thumbnail = fanart = image_url
+    if isinstance(image_url, str):
+        thumbnail = image_url.replace('/940x530', '/480x270').replace('/__SIZE__', '/480x270')
+        fanart = image_url.replace('?type=TEXT', '')
+        fanart = fanart.replace('/940x530', '/1920x1080').replace('/__SIZE__', '/1920x1080')
+    progress = timecode = None
+    lastviewed = item.get('lastviewed', False)
+    if lastviewed:
+        progress = float(lastviewed.get('progress') or 0.0)
+        timecode = lastviewed.get('timecode') or 0
+    return ProgramRecord(
+        item.get('programId'), kind, item.get('title'), item.get('subtitle'),
+        item.get('shortDescription') or item.get('fullDescription'), item.get('teaserText'),
+        utils.get_duration(item), utils.mpaa_from_age(item.get('ageRating', None)),
+        thumbnail, fanart, _get_artetv_air_date(item.get('beginsAt')),
+        progress, timecode, None, None, None)
+
+
+def from_hbbtv(item):
+    """Return the record of a video or collection of HBB TV API"""
+    image_url = item.get('imageUrl')
+    return ProgramRecord(
+        item.get('programId'), item.get('kind'), item.get('title'), item.get('subtitle'),
+        item.get('shortDescription') or item.get('fullDescription'), item.get('teaserText'),
+        utils.get_duration(item), 'Unknown', image_url, image_url,
+        _get_hbbtv_air_date(item.get('broadcastBegin')), None, None,
+        item.get('genrePresse'),
+        tuple(country.get('label') for country in item.get('productionCountries', [])),
+        item.get('director'))
+
+
+def to_cached(record):
+    """Return record as a dict of plain values, to be cached and read back by from_cached"""
+    return dict(record._asdict())
+
+
+def from_cached(values):
+    """
+    Return the record of values cached by to_cached, even by another version of the add-on.
+    Fields missing in values are None. Fields unknown to ProgramRecord are ignored.
+    Tuples cached by previous versions are read field by field.
+    """
+    if not isinstance(values, dict):
+        values = dict(zip(ProgramRecord._fields, values))
+    return ProgramRecord(**{field: values.get(field) for field in ProgramRecord._fields})
+
+
+def _get_artetv_image_url(item):
+    """Return url of item image with size placeholder, if any"""
+    image_url = None
+    images = item.get('images')
+    if images and images[0] and images[0].get('url'):
+        image_url = images[0].get('url')
+    main_image = item.get('mainImage')
+    if main_image and main_image.get('url'):
+        image_url = main_image.get('url')
+    return image_url
+
+
+def _get_artetv_air_date(airdate):
+    """Return date like 2022-07-01T03:00:00Z as a string, or None"""
+    if airdate is None:
+        return None
+    try:
+        return str(datetime.datetime.strptime(airdate, '%Y-%m-%dT%H:%M:%S%z'))
+    except TypeError:
+        return 'None'
+
+
+def _get_hbbtv_air_date(airdate):
+    """Return date parsed by dateutil as a string, or None"""
+    if airdate is None:
+        return None
+    try:
+        return str(dateutil.parser.parse(airdate))
+    except dateutil.parser.ParserError:
+        return 'None'
@@ -0,0 +1,201 @@
+"""
+Protect the add-on from slow or failing Arte APIs:
+- per endpoint timeouts derived from latencies observed in previous requests,
+- bounded retries with jittered exponential backoff for idempotent requests,
+- per host circuit breaker failing fast for a cool-down period after repeated errors.
+State is persisted in add-on storage, since every add-on invocation is a new process.
+It is read once per add-on invocation. Latencies are saved at its end with save.
+"""
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+# pylint: disable=import-error
+import requests
+from resources.lib import fileutils
+
+# seconds to establish a connection. slightly larger than a multiple of 3s TCP retransmission
+CONNECT_TIMEOUT = 3.05
+# seconds to wait for a reply, when not enough latencies were observed for an endpoint
+DEFAULT_READ_TIMEOUT = 10
+MIN_READ_TIMEOUT = 2
+# read timeout is this factor of the 95th percentile of observed latencies
+_P95_FACTOR = 3
+# latencies kept per endpoint and minimum to derive a timeout
+_MAX_SAMPLES = 50
+_MIN_SAMPLES = 10
+# consecutive errors opening the circuit of a host and seconds it stays open
+FAILURE_THRESHOLD = 3
+COOL_DOWN = 30
+# seconds of the first backoff, doubled at each retry, and max backoff
+_BACKOFF_BASE = 0.25
+_BACKOFF_MAX = 2
+# server errors worth a retry
+_RETRY_STATUSES = (502, 503, 504)
+# seconds to wait for another add-on invocation saving its latencies
+_SAVE_LOCK_TIMEOUT = 2
+
+
+def max_duration(retries):
+    """
+    Return the longest seconds a request with retries may take with default timeouts,
+    backoffs included, e.g. to tell a request still being sent from an abandoned one.
+    """
+    return (retries + 1) * (CONNECT_TIMEOUT + DEFAULT_READ_TIMEOUT) + retries * _BACKOFF_MAX
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request to a host with an open circuit"""
+
+
+def _load_json(file_path):
+    try:
+        with open(file_path, 'rb') as json_file:
+            return json.loads(json_file.read())
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_json(file_path, content):
+    fileutils.write_atomic(file_path, json.dumps(content).encode('utf-8'))
+
+
+class LatencyBudgets:
+    """
+    Latencies of successful requests per endpoint i.e. request scope.
+    Latencies observed during an add-on invocation are kept in memory,
+    then merged with the ones of other invocations by save.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.samples = _load_json(file_path)
+        self._observed = {}
+        self._lock = threading.Lock()
+
+    def timeout(self, scope):
+        """Return a pair of connect and read timeouts in seconds for requests in scope"""
+        with self._lock:
+            samples = sorted(self.samples.get(scope, []))
+        if len(samples) < _MIN_SAMPLES:
+            return (CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
+        p95 = samples[min(int(len(samples) * 0.95), len(samples) - 1)]
+        read_timeout = min(max(p95 * _P95_FACTOR, MIN_READ_TIMEOUT), DEFAULT_READ_TIMEOUT)
+        return (CONNECT_TIMEOUT, round(read_timeout, 2))
+
+    def observe(self, scope, seconds):
+        """Record the latency of a successful request in scope"""
+        with self._lock:
+            for samples in (self.samples.setdefault(scope, []),
+                            self._observed.setdefault(scope, [])):
+                samples.append(round(seconds, 3))
+                del samples[:-_MAX_SAMPLES]
+
+    def save(self):
+        """Merge latencies observed since last save into file_path, with the latest ones"""
+        with self._lock:
+            observed, self._observed = self._observed, {}
+        if not observed:
+            return
+        lock = fileutils.FileLock(self.file_path + '.lock')
+        if not lock.acquire(_SAVE_LOCK_TIMEOUT):
+            return
+        try:
+            saved = _load_json(self.file_path)
+            for scope, samples in observed.items():
+                saved[scope] = (saved.get(scope, []) + samples)[-_MAX_SAMPLES:]
+            _save_json(self.file_path, saved)
+        finally:
+            lock.release()
+
+
+class CircuitBreakers:
+    """
+    State of the circuit of every host, shared by add-on invocations.
+    States are read once per add-on invocation. They are written when they change only
+    i.e. on errors and when a circuit closes.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._states = None
+        self._lock = threading.Lock()
+
+    def _get_states(self):
+        if self._states is None:
+            self._states = _load_json(self.file_path)
+        return self._states
+
+    def allow(self, host):
+        """Return False, if requests to host should fail fast"""
+        with self._lock:
+            state = self._get_states().get(host, {})
+        opened_at = state.get('opened_at')
+        return opened_at is None or time.time() - opened_at > COOL_DOWN
+
+    def record_success(self, host):
+        """Close the circuit of host"""
+        with self._lock:
+            if host not in self._get_states():
+                return
+            self._states = _load_json(self.file_path)
+            if self._states.pop(host, None) is not None:
+                _save_json(self.file_path, self._states)
+
+    def record_failure(self, host):
+        """Count an error with host and open its circuit after too many consecutive errors"""
+        with self._lock:
+            # errors of other add-on invocations count too
+            self._states = _load_json(self.file_path)
+            state = self._states.setdefault(host, {'failures': 0})
+            state['failures'] = state.get('failures', 0) + 1
+            if state['failures'] >= FAILURE_THRESHOLD:
+                # (re)open the circuit. a request after cool-down is a trial
+                state['opened_at'] = time.time()
+            _save_json(self.file_path, self._states)
+
+
+class Resilience:
+    """Send requests within latency budgets, with retries and circuit breakers"""
+
+    def __init__(self, path):
+        self.budgets = LatencyBudgets(os.path.join(path, 'latencies.json'))
+        self.breakers = CircuitBreakers(os.path.join(path, 'breakers.json'))
+
+    def request(self, send, method, url, scope, retries=0, **kwargs):
+        """
+        Send a request with send function e.g. transport.request.
+        Timeout defaults to the budget of scope.
+        :param int retries: number of retries after an error, for idempotent requests only
+        :raise CircuitOpenError: if host had too many errors recently
+        """
+        host = urlsplit(url).netloc
+        if not self.breakers.allow(host):
+            raise CircuitOpenError(f"Too many errors with {host}. Retry in {COOL_DOWN}s")
+        kwargs.setdefault('timeout', self.budgets.timeout(scope))
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            try:
+                reply = send(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self.breakers.record_failure(host)
+                if attempt >= retries or not self.breakers.allow(host):
+                    raise
+            else:
+                if reply.status_code not in _RETRY_STATUSES:
+                    self.budgets.observe(scope, time.monotonic() - start)
+                    self.breakers.record_success(host)
+                    return reply
+                self.breakers.record_failure(host)
+                if attempt >= retries or not self.breakers.allow(host):
+                    return reply
+            attempt += 1
+            # full jitter backoff
+            time.sleep(random.uniform(0, min(_BACKOFF_BASE * 2 ** attempt, _BACKOFF_MAX)))
+
+    def save(self):
+        """Keep latencies observed during the add-on invocation for the next ones"""
+        self.budgets.save()
@@ -32,6 +32,16 @@ class Settings:
         # Enable additional logs managed by plugin: API and display object traces
         self.loglevel = plugin.get_setting(
             'loglevel', choices=list(loglevel.keys())) or loglevel['DEFAULT']
+        # Display the last home menu built, if it is not older than this number of minutes,
+        # while a fresh one is built in background.
+        # defaults to 0, always wait for a fresh home menu
+        self.home_max_staleness = plugin.get_setting(
+            'home_max_staleness', int) or 0
+        # Number of playable videos at the top of a menu, whose streams are resolved
+        # in background, so that they start faster when played.
+        # defaults to 0, streams are resolved when a video is played
+        self.prefetch_streams = plugin.get_setting(
+            'prefetch_streams', int) or 0
 
     def should_log(self, log_type):
         """Return True when the configured loglevel includes the requested log type."""
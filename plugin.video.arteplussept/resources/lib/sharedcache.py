@@ -0,0 +1,54 @@
+"""
+Short-lived cache of bytes shared between threads and add-on invocations.
+An entry expires ttl seconds after it was stored.
+"""
+import os
+import time
+from resources.lib import fileutils
+
+_SUFFIX = '.bin'
+
+
+class SharedCache:
+    """Folder of entries, one file per key. Age of an entry is the age of its file."""
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+
+    def _file_path(self, key):
+        return os.path.join(self.path, key + _SUFFIX)
+
+    def get(self, key):
+        """Return the bytes stored for key, None if nothing or expired"""
+        file_path = self._file_path(key)
+        try:
+            if time.time() - os.path.getmtime(file_path) > self.ttl:
+                return None
+            with open(file_path, 'rb') as cache_file:
+                return cache_file.read()
+        except OSError:
+            return None
+
+    def set(self, key, content):
+        """Store bytes content for key and forget expired entries"""
+        fileutils.write_atomic(self._file_path(key), content)
+        self._remove_expired()
+
+    def delete(self, key):
+        """Forget the entry of key, if any"""
+        fileutils.remove_quietly(self._file_path(key))
+
+    def clear(self):
+        """Forget every entry"""
+        for entry in fileutils.list_files(self.path, _SUFFIX):
+            fileutils.remove_quietly(entry.path)
+
+    def _remove_expired(self):
+        now = time.time()
+        for entry in fileutils.list_files(self.path, _SUFFIX):
+            try:
+                if now - entry.stat().st_mtime > self.ttl:
+                    fileutils.remove_quietly(entry.path)
+            except OSError:
+                pass
@@ -0,0 +1,96 @@
+"""
+Deduplicate identical requests sent at the same time by several add-on invocations,
+e.g. background context menu actions, player synchronization and menu navigation.
+The first invocation fetches the reply. The others wait for it briefly
+and read it from a short-lived cache shared on disk, instead of sending the same request.
+The reply is written in that cache only when another invocation is waiting for it.
+"""
+import os
+import threading
+import time
+from resources.lib import fileutils
+from resources.lib.sharedcache import SharedCache
+
+# seconds a reply is shared with invocations requesting the same url
+DEFAULT_TTL = 5
+# seconds to wait for the reply of the invocation fetching the same url
+DEFAULT_WAIT = 3
+# seconds after which the lock of an invocation fetching an url is considered abandoned
+# e.g. by a killed process. Longer than the longest request, retries included
+DEFAULT_STALE_AFTER = 60
+
+
+class SingleFlight:
+    """
+    Single flight of requests identified by a key.
+    Count requests actually fetched and requests coalesced with another one.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, wait=DEFAULT_WAIT,
+                 stale_after=DEFAULT_STALE_AFTER):
+        self.path = path
+        self.wait = wait
+        self.stale_after = stale_after
+        self.replies = SharedCache(path, ttl)
+        self.fetched = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+
+    def do(self, key, fetch):
+        """
+        Return the reply of the request identified by key.
+        :param fn fetch: function sending the request, returning a pair of bytes reply
+        and a boolean telling if reply can be shared e.g. False for an error
+        """
+        content = self.replies.get(key)
+        if content is not None:
+            self._count_coalesced()
+            return content
+
+        lock = fileutils.FileLock(os.path.join(self.path, key + '.lock'), self.stale_after)
+        if not lock.acquire():
+            content = self._wait_for_reply(key, lock)
+            if content is not None:
+                self._count_coalesced()
+                return content
+            # the other invocation failed or is too slow. do not wait for it anymore
+            return self._fetch(key, fetch)
+        try:
+            return self._fetch(key, fetch)
+        finally:
+            lock.release()
+
+    def forget(self):
+        """Forget every reply shared e.g. after a change of user content"""
+        self.replies.clear()
+
+    def _fetch(self, key, fetch):
+        content, shareable = fetch()
+        with self._lock:
+            self.fetched += 1
+        waiting_path = self._get_waiting_path(key)
+        if os.path.exists(waiting_path):
+            fileutils.remove_quietly(waiting_path)
+            if shareable:
+                self.replies.set(key, content)
+        return content
+
+    def _get_waiting_path(self, key):
+        """Return the file telling that an invocation is waiting for the reply of key"""
+        return os.path.join(self.path, key + '.waiting')
+
+    def _wait_for_reply(self, key, lock, poll_interval=0.05):
+        """Return the reply shared by the lock owner or None after waiting"""
+        try:
+            with open(self._get_waiting_path(key), 'ab'):
+                pass
+        except OSError:
+            return None
+        deadline = time.monotonic() + self.wait
+        while lock.is_locked() and time.monotonic() < deadline:
+            time.sleep(poll_interval)
+        return self.replies.get(key)
+
+    def _count_coalesced(self):
+        with self._lock:
+            self.coalesced += 1
@@ -0,0 +1,63 @@
+"""
+Files and folders in add-on storage, shared between add-on invocations.
+Complement xbmcswift2 plugin.get_storage for modules without plugin instance, like api.
+"""
+import os
+import functools
+# pylint: disable=import-error
+from xbmcswift2 import xbmcaddon
+# pylint: disable=import-error
+from xbmcswift2 import xbmcvfs
+from resources.lib import categorystore
+from resources.lib import sharedcache
+
+
+@functools.lru_cache(maxsize=None)
+def _base_path():
+    """Return the same folder as xbmcswift2 plugin.storage_path"""
+    profile = xbmcaddon.Addon().getAddonInfo('profile')
+    return os.path.join(xbmcvfs.translatePath(profile), '.storage')
+
+
+def get_storage_path(*names):
+    """
+    Return the absolute path to a folder in add-on storage e.g. get_storage_path('httpcache').
+    Create the folder, if it does not exist yet.
+    """
+    path = os.path.join(_base_path(), *names)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def get_storage_file(name):
+    """
+    Return the absolute path to a file in add-on storage, next to the files of
+    plugin.get_storage e.g. get_storage_file('token.lock'). Create the folder, if needed.
+    """
+    return os.path.join(get_storage_path(), name)
+
+
+@functools.lru_cache(maxsize=None)
+def get_cached_categories():
+    """
+    Return categories cached between invocations e.g. zones of home page, by zone id.
+    Remove the file of plugin.get_storage('cached_categories') used before.
+    """
+    try:
+        os.remove(os.path.join(_base_path(), 'cached_categories'))
+    except OSError:
+        pass
+    return categorystore.CategoryStore(
+        os.path.join(get_storage_path('categories'), 'categories.sqlite'))
+
+
+def get_home_snapshots(max_staleness):
+    """
+    Return the home menus kept between invocations, by language, for max_staleness seconds.
+    Remove the file of plugin.get_storage('home_snapshots') used before.
+    """
+    try:
+        os.remove(os.path.join(_base_path(), 'home_snapshots'))
+    except OSError:
+        pass
+    return sharedcache.SharedCache(get_storage_path('home'), max_staleness)
@@ -0,0 +1,147 @@
+"""
+Shared HTTP transport for Arte TV, HBB TV and Arte ID APIs.
+Keep one pooled keep-alive requests.Session per host, so that successive calls
+to the same host reuse the TCP+TLS connection instead of opening a new one.
+"""
+import threading
+from urllib.parse import urlsplit
+# pylint: disable=import-error
+import requests
+# pylint: disable=import-error
+from requests.adapters import HTTPAdapter
+# pylint: disable=import-error
+from xbmcswift2 import xbmc
+
+# number of connections kept alive per host.
+# a route rarely sends more than 4 requests at the same time to the same host.
+DEFAULT_POOL_SIZE = 4
+# default timeout in seconds for every request, unless specified by caller
+DEFAULT_TIMEOUT = 10
+
+
+class Transport:
+    """
+    Pool of requests.Session, one per host, sharing the same configuration:
+    pool size and default headers. Thread safe.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, headers=None):
+        self.pool_size = pool_size
+        self.headers = headers or {}
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def configure(self, pool_size=None, headers=None):
+        """
+        Change pool size and/or default headers.
+        Sessions already opened are closed, so that new settings apply to the next request.
+        """
+        if pool_size is not None:
+            self.pool_size = pool_size
+        if headers is not None:
+            self.headers = headers
+        self.close()
+
+    def session(self, url):
+        """Return the session dedicated to the host of url. Create it on first call."""
+        host = urlsplit(url).netloc
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                session.headers.update(self.headers)
+                adapter = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=self.pool_size, pool_block=False)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[host] = session
+        return session
+
+    def request(self, method, url, **kwargs):
+        """Send a request through the session of url host. Same parameters as requests."""
+        kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+        return self.session(url).request(method, url, **kwargs)
+
+    def stats(self):
+        """
+        Return a dict with the number of connections newly opened and reused by host
+        and in total, e.g. {'api.arte.tv': {'opened': 1, 'reused': 4}, 'total': {...}}
+        """
+        with self._lock:
+            sessions = dict(self._sessions)
+        result = {}
+        total = {'opened': 0, 'reused': 0}
+        for host, session in sessions.items():
+            opened = 0
+            sent = 0
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is not None:
+                        opened += pool.num_connections
+                        sent += pool.num_requests
+            result[host] = {'opened': opened, 'reused': max(sent - opened, 0)}
+            total['opened'] += opened
+            total['reused'] += result[host]['reused']
+        result['total'] = total
+        return result
+
+    def close(self):
+        """Close every session and their connections"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+# transport shared by the whole add-on invocation
+_TRANSPORT = Transport()
+
+
+def configure(pool_size=None, headers=None):
+    """Configure the shared transport. See Transport.configure"""
+    _TRANSPORT.configure(pool_size, headers)
+
+
+def request(method, url, **kwargs):
+    """Send a request with the shared transport"""
+    return _TRANSPORT.request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    """Send a GET request with the shared transport"""
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    """Send a POST request with the shared transport"""
+    return request('POST', url, **kwargs)
+
+
+def put(url, **kwargs):
+    """Send a PUT request with the shared transport"""
+    return request('PUT', url, **kwargs)
+
+
+def patch(url, **kwargs):
+    """Send a PATCH request with the shared transport"""
+    return request('PATCH', url, **kwargs)
+
+
+def delete(url, **kwargs):
+    """Send a DELETE request with the shared transport"""
+    return request('DELETE', url, **kwargs)
+
+
+def stats():
+    """Return connections opened and reused by the shared transport. See Transport.stats"""
+    return _TRANSPORT.stats()
+
+
+def log_stats():
+    """Log in Kodi how many connections were opened and reused during the add-on invocation"""
+    for host, counters in stats().items():
+        xbmc.log(f"HTTP connections to {host}: {counters['opened']} opened, " +
+                 f"{counters['reused']} reused", level=xbmc.LOGDEBUG)
@@ -0,0 +1,80 @@
+"""
+Build plugin URLs like xbmcswift2 plugin.url_for, without walking its routing table
+and formatting the rule again for every item of a menu.
+The URL of a route is compiled once per process into a template, by calling plugin.url_for
+with placeholders. Then, escaped values are inserted into the template.
+The first URL built from a template is checked against plugin.url_for. If they differ,
+plugin.url_for is used for that route from then on.
+"""
+import functools
+import re
+from resources.lib import utils
+
+# placeholder of the n-th value in URLs built by plugin.url_for, left as is by escaping
+_PLACEHOLDER = 'ZzUrlArg{}zZ'
+# values made of characters never escaped by utils.encode_string e.g. program ids
+_SAFE_VALUE = re.compile(r'[A-Za-z0-9_.~-]*')
+# template of routes for which URLs must be built by plugin.url_for
+_FALLBACK = object()
+
+
+def quote(value):
+    """Return value escaped like utils.encode_string, quickly for ids and codes"""
+    if _SAFE_VALUE.fullmatch(value):
+        return value
+    return utils.encode_string(value)
+
+
+@functools.lru_cache(maxsize=None)
+def get_url_builder(plugin):
+    """Return the URL builder of plugin, shared by every menu of the process"""
+    return UrlBuilder(plugin)
+
+
+# pylint: disable=too-few-public-methods
+class UrlBuilder:
+    """Templates of plugin URLs by route and names of values"""
+
+    def __init__(self, plugin):
+        self.plugin = plugin
+        self._templates = {}
+
+    def url_for(self, endpoint, **items):
+        """Return the same URL as plugin.url_for(endpoint, **items)"""
+        if not all(isinstance(value, str) for value in items.values()):
+            # xbmcswift2 converts numbers and pickles objects
+            return self.plugin.url_for(endpoint, **items)
+        return self.url_for_quoted(endpoint, **{
+            name: quote(value) for name, value in items.items()})
+
+    def url_for_quoted(self, endpoint, **quoted_items):
+        """
+        Return the same URL as url_for, with values already escaped with quote.
+        It saves escaping again values used in several URLs.
+        """
+        key = (endpoint, tuple(quoted_items))
+        template = self._templates.get(key)
+        if template is _FALLBACK:
+            return self._plugin_url_for(endpoint, quoted_items)
+        if template is not None:
+            return template.format(*quoted_items.values())
+        url = self._plugin_url_for(endpoint, quoted_items)
+        template = self._compile(endpoint, key[1])
+        if template.format(*quoted_items.values()) != url:
+            template = _FALLBACK
+        self._templates[key] = template
+        return url
+
+    def _plugin_url_for(self, endpoint, quoted_items):
+        """Return URL built by plugin from escaped values"""
+        return self.plugin.url_for(endpoint, **{
+            name: utils.decode_string(value) for name, value in quoted_items.items()})
+
+    def _compile(self, endpoint, names):
+        """Return a template of URL of endpoint with a format field per value"""
+        sample = self.plugin.url_for(endpoint, **{
+            name: _PLACEHOLDER.format(index) for index, name in enumerate(names)})
+        template = sample.replace('{', '{{').replace('}', '}}')
+        for index in range(len(names)):
+            template = template.replace(_PLACEHOLDER.format(index), '{' + str(index) + '}')
+        return template
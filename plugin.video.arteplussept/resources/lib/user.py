@@ -2,18 +2,40 @@
 Manage Arte user content and state e.g. favorites and last vieweds.
 Manage settings and user interactions to create a token.
 Manage token in cache. Avoid storing password in settings, only token.
+Refresh token ahead of its expiry.
 """
+import os
+import pickle
+import shutil
+import stat
 import time
 # pylint: disable=import-error
 from xbmcswift2 import xbmc
 from xbmcswift2 import xbmcgui
 
 from resources.lib import api
+from resources.lib import fileutils
+from resources.lib import storage
 
 # key to manage token in plugin storage
 _STORAGE_KEY = 'token'
 # Time to live of 30d
 _TTL = 30*24*60
+# token is refreshed, when less than this number of seconds or a quarter of its lifetime remains
+_REFRESH_MARGIN = 5 * 60
+# seconds to wait for another add-on invocation refreshing token
+_REFRESH_LOCK_TIMEOUT = 10
+# seconds before trying again to refresh a token, after a failure
+_REFRESH_RETRY_DELAY = 60 * 60
+# seconds between two checks of a token refreshed by another invocation, once refresh failed
+_REFRESH_CHECK_PERIOD = 60
+# ways to create tokens, tried in turn to refresh tokens cached before their grant was recorded
+_GRANTS = ('password', 'device')
+
+# tokens already read during this add-on invocation, by user
+_tokens_memo = {}
+# time.monotonic() before which tokens of user, which could not be refreshed, are not checked
+_refresh_not_before = {}
 
 
 def login(plugin):
@@ -75,7 +97,7 @@ def login_with_password(plugin):
         return False
 
     # store token
-    set_cached_token(plugin, email, tokens)
+    set_cached_token(plugin, email, tokens, 'password')
     set_auth_user_settings(plugin, email)
     msg = plugin.addon.getLocalizedString(30017).format(user=email)
     plugin.notify(msg=msg, image='info')
@@ -188,7 +210,7 @@ def login_with_device_flow(plugin):
         return False
 
     # Step 5 - store token
-    set_cached_token(plugin, email, tokens)
+    set_cached_token(plugin, email, tokens, 'device')
     set_auth_user_settings(plugin, email)
     msg = plugin.addon.getLocalizedString(30017).format(user=email)
     plugin.notify(msg=msg, image='info')
@@ -246,7 +268,8 @@ def logout(plugin, settings):
 
     # Possible improve - revoke token remotely or logout
 
-    # clear token locally
+    # clear token locally and changes, which cannot be sent without it
+    api.clear_queued_changes()
     set_cached_token(plugin, settings.username, '')
     clear_cached_tokens(plugin)
     set_auth_user_settings(plugin, '')
@@ -272,27 +295,153 @@ def get_cached_token(plugin, token_idx, silent=False):
     If no token is in cache and silent is not True, then it warns user
     about the need to authenticate.
     If user logged in and later changed the user email, it returns None.
+    Token is read from storage once per add-on invocation and refreshed, if it expires soon.
     """
-    cached_token = plugin.get_storage(_STORAGE_KEY, TTL=_TTL)
-    if token_idx in cached_token and isinstance(cached_token[token_idx], dict):
-        tokens = cached_token[token_idx]
-    else:
-        tokens = None
+    tokens = _tokens_memo.get(token_idx)
+    if tokens is None:
+        cached_token = plugin.get_storage(_STORAGE_KEY, TTL=_TTL)
+        if token_idx in cached_token and isinstance(cached_token[token_idx], dict):
+            tokens = cached_token[token_idx]
+    if tokens is None:
         if not silent:
             plugin.notify(msg=plugin.addon.getLocalizedString(30014), image='warning')
+        return None
+    if tokens.get('user') != token_idx:
+        # cached before tokens knew their user, who keys content stored locally e.g. history
+        tokens = dict(tokens, user=token_idx)
+    if _expires_soon(tokens) and time.monotonic() >= _refresh_not_before.get(token_idx, 0):
+        tokens = _refresh(plugin, token_idx, tokens)
+        if _expires_soon(tokens):
+            _refresh_not_before[token_idx] = time.monotonic() + _REFRESH_CHECK_PERIOD
+    _tokens_memo[token_idx] = tokens
     return tokens
 
 
-def set_cached_token(plugin, token_idx, tokens):
-    """Set cached token"""
+def set_cached_token(plugin, token_idx, tokens, grant=None):
+    """
+    Set cached token. Tokens record their user token_idx, which keys user content stored locally.
+    :param str grant: how tokens were created i.e. password or device. Needed to refresh them
+    """
+    if isinstance(tokens, dict):
+        tokens = dict(tokens, obtained_at=time.time(), grant=grant or tokens.get('grant'),
+                      user=token_idx)
+        _tokens_memo[token_idx] = tokens
+    else:
+        _tokens_memo.pop(token_idx, None)
+    _remove_legacy_refreshed_folder()
     cached_token = plugin.get_storage(_STORAGE_KEY)
     cached_token[token_idx] = tokens
 
 
 def clear_cached_tokens(plugin):
     """Clear every tokens. Not just the one of the user in parameter."""
+    _tokens_memo.clear()
     cached_token = plugin.get_storage(_STORAGE_KEY)
     cached_token.clear()
+    fileutils.remove_quietly(_get_refreshed_path())
+
+
+def _expires_soon(tokens):
+    """
+    Return True, if tokens can be refreshed and expire soon.
+    Tokens stored before their creation time was recorded are considered expiring.
+    """
+    expires_in = tokens.get('expires_in')
+    if not tokens.get('refresh_token') or not isinstance(expires_in, (int, float)):
+        return False
+    remaining = tokens.get('obtained_at', 0) + expires_in - time.time()
+    return remaining < min(_REFRESH_MARGIN, expires_in / 4)
+
+
+def _get_refreshed_path():
+    """
+    Return the file in which tokens refreshed by any add-on invocation are shared.
+    It is next to the file of plugin.get_storage(_STORAGE_KEY).
+    """
+    return storage.get_storage_file(f"{_STORAGE_KEY}.refreshed")
+
+
+def _load_refreshed():
+    try:
+        with open(_get_refreshed_path(), 'rb') as refreshed_file:
+            return pickle.load(refreshed_file)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return {}
+
+
+def _save_refreshed(all_refreshed):
+    """Share refreshed tokens in a file with the same permissions as the token storage"""
+    try:
+        mode = stat.S_IMODE(os.stat(storage.get_storage_file(_STORAGE_KEY)).st_mode)
+    except OSError:
+        mode = stat.S_IRUSR | stat.S_IWUSR
+    fileutils.write_atomic(_get_refreshed_path(), pickle.dumps(all_refreshed), mode)
+
+
+def _remove_legacy_refreshed_folder():
+    """
+    Remove the folder, in which refreshed tokens were shared before.
+    It had the path of the file of plugin.get_storage(_STORAGE_KEY), which could not be saved.
+    """
+    legacy_path = storage.get_storage_file(_STORAGE_KEY)
+    if os.path.isdir(legacy_path):
+        shutil.rmtree(legacy_path, ignore_errors=True)
+
+
+def _refresh(plugin, token_idx, tokens):
+    """
+    Return tokens refreshed by this or another add-on invocation, or tokens if it failed.
+    Refreshes are serialized between add-on invocations, since a refresh token is used once.
+    Plugin storage is saved at the end of an invocation only, so that refreshed tokens are
+    also shared immediately in a file of add-on storage.
+    A failure is recorded in that file too, so that refresh is not tried again before
+    _REFRESH_RETRY_DELAY by any invocation.
+    """
+    lock = fileutils.FileLock(storage.get_storage_file(f"{_STORAGE_KEY}.lock"))
+    if not lock.acquire(_REFRESH_LOCK_TIMEOUT):
+        xbmc.log("Token is being refreshed by another invocation for too long. Use current one",
+                 level=xbmc.LOGWARNING)
+        return tokens
+    try:
+        all_refreshed = _load_refreshed()
+        refreshed = all_refreshed.get(token_idx, {})
+        shared_tokens = refreshed.get('tokens')
+        if shared_tokens and shared_tokens.get('obtained_at', 0) > tokens.get('obtained_at', 0):
+            # refreshed by another invocation
+            plugin.get_storage(_STORAGE_KEY)[token_idx] = shared_tokens
+            tokens = shared_tokens
+            if not _expires_soon(tokens):
+                return tokens
+        if time.time() - refreshed.get('failed_at', 0) < _REFRESH_RETRY_DELAY:
+            return tokens
+        new_tokens, grant = _refresh_with_grant(tokens)
+        if new_tokens is None:
+            all_refreshed[token_idx] = dict(refreshed, failed_at=time.time())
+        else:
+            # a refresh token may be reused, when arte does not rotate it
+            new_tokens.setdefault('refresh_token', tokens.get('refresh_token'))
+            set_cached_token(plugin, token_idx, new_tokens, grant)
+            tokens = _tokens_memo[token_idx]
+            all_refreshed[token_idx] = {'tokens': tokens}
+            xbmc.log(f"Token of \"{token_idx}\" refreshed", level=xbmc.LOGINFO)
+        _save_refreshed(all_refreshed)
+        return tokens
+    finally:
+        lock.release()
+
+
+def _refresh_with_grant(tokens):
+    """
+    Return a pair of tokens refreshed with the endpoint of their grant and that grant,
+    or None and the grant, if it failed.
+    Tokens cached before their grant was recorded are refreshed with every grant in turn.
+    """
+    grants = (tokens.get('grant'),) if tokens.get('grant') else _GRANTS
+    for grant in grants:
+        new_tokens = api.refresh_tokens(tokens, grant)
+        if new_tokens is not None:
+            return new_tokens, grant
+    return None, tokens.get('grant')
 
 
 def erase_password_in_old_config(plugin):
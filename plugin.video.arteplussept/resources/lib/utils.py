@@ -1,6 +1,7 @@
 """Utility methods for:
 - strings encoding/decoding for URL usage
 - age restrictions/MPAA mapping qnd warnings
+- fields read the same way in items of Arte TV and HBB TV APIs
 """
 import urllib.parse
 from enum import Enum
@@ -25,6 +26,19 @@ def decode_string(string):
     return urllib.parse.unquote_plus(string, encoding='utf-8', errors='replace')
 
 
+def get_duration(item):
+    """Return item duration in seconds or None, for items of Arte TV or HBB TV API"""
+    duration = item.get('durationSeconds')
+    if isinstance(duration, int):
+        return duration
+    duration = item.get('duration')
+    if isinstance(duration, int):
+        return duration
+    if isinstance(duration, dict) and isinstance(duration.get('seconds'), int):
+        return duration.get('seconds')
+    return None
+
+
 def mpaa_from_age(age):
     """Map an integer age restriction to an MPAA rating string.
 
@@ -60,3 +74,14 @@ def warn_if_age_restricted(plugin, mpaa):
         msg = plugin.addon.getLocalizedString(30055).format(label=mpaa)
         plugin.notify(msg=msg, image='warning')
     return restricted
+
+
+def notify_queued_change(plugin, label):
+    """Notify that a change of user content e.g. add a favorite, is saved and sent later.
+
+    Parameters:
+    - plugin: the xbmcswift2 Plugin instance used to translate and display the notification.
+    - label: label of the content changed, inserted in the message.
+    """
+    msg = plugin.addon.getLocalizedString(30065).format(label=label)
+    plugin.notify(msg=msg, image='info')
@@ -1,25 +1,65 @@
 """Manage views like home menu, dynamic menus, search, favorites..."""
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+# pylint: disable=import-error
+import requests
 # pylint: disable=import-error
 from xbmcswift2 import xbmc
+# pylint: disable=import-error
+from xbmcswift2 import xbmcgui
 
 from resources.lib.mapper.arteitem import ArteItem
+from resources.lib.mapper.arteitem import ArteHbbTvVideoItem
 from resources.lib.mapper.arteliveitem import ArteLiveItem
 from resources.lib.mapper.artesearch import ArteSearch
+from resources.lib.mapper.artezone import ArteZone
 from resources.lib import api
 from resources.lib import hof
+from resources.lib import programrecord
 from resources.lib.mapper import mapper
 from resources.lib import settings as stg
 from resources.lib import user
+from resources.lib import utils
+
+# seconds to display home menu, shared by live stream and home page requests
+_HOME_DEADLINE = 10
+# concurrent requests when changing every video of a collection
+_MAX_BULK_WORKERS = 4
 
 
 def build_home_page(plugin, settings, cached_categories):
-    """Display home menu based on fixed entries and then content from API home page"""
-    addon_menu = [
+    """
+    Display home menu based on fixed entries and then content from API home page.
+    Live stream and home page are requested in parallel with a deadline shared by both.
+    A request not completed before the deadline is skipped.
+    """
+    fixed_items, zone_items = _build_home_menu(plugin, settings, cached_categories)
+    return fixed_items + zone_items
+
+
+def _build_home_menu(plugin, settings, cached_categories, zone_items=None):
+    """
+    Return a pair of lists of menu items: fixed entries including live stream,
+    and zones of API home page.
+    Request home page only if zone_items is None, otherwise return zone_items e.g. of a snapshot.
+    """
+    fixed_items = [
         ArteSearch(plugin, settings).build_item()
     ]
+    deadline = time.monotonic() + _HOME_DEADLINE
+    executor = ThreadPoolExecutor(max_workers=2)
+    live_future = executor.submit(_timed, api.player_video, settings.language, 'LIVE')
+    home_future = None
+    if zone_items is None:
+        home_future = executor.submit(_timed, api.page_content, settings.language)
+    # do not wait for a request exceeding the deadline
+    executor.shutdown(wait=False)
+
     try:
-        addon_menu.append(
-            ArteLiveItem(plugin, api.player_video(settings.language, 'LIVE'))
+        fixed_items.append(
+            ArteLiveItem(plugin, _get_before_deadline(live_future, deadline, 'live'))
             .build_item_live(settings.quality, '1'))
     # pylint: disable=broad-exception-caught
     except Exception as error:
@@ -28,12 +68,15 @@ def build_home_page(plugin, settings, cached_categories):
                  f"because \"{str(error)}\"",
                  level=xbmc.LOGERROR)
 
+    if home_future is None:
+        return fixed_items, zone_items
+    zone_items = []
     try:
-        arte_home = api.page_content(settings.language)
+        arte_home = _get_before_deadline(home_future, deadline, 'home')
         for zone in arte_home.get('zones'):
             menu_item = mapper.map_zone_to_item(plugin, settings, zone, cached_categories)
             if menu_item:
-                addon_menu.append(menu_item)
+                zone_items.append(menu_item)
     # pylint: disable=broad-exception-caught
     except Exception as error:
         xbmc.log("Unable to build home items with " +
@@ -41,7 +84,69 @@ def build_home_page(plugin, settings, cached_categories):
                  f"because \"{str(error)}\"",
                  level=xbmc.LOGERROR)
 
-    return addon_menu
+    return fixed_items, zone_items
+
+
+def _timed(fctn, *args):
+    """Return a pair with the result of fctn(*args) and the time it took in seconds"""
+    start = time.monotonic()
+    result = fctn(*args)
+    return result, time.monotonic() - start
+
+
+def _get_before_deadline(future, deadline, branch):
+    """
+    Return the result of a future returned by _timed and log how long it took.
+    Raise TimeoutError, if the future is not done before deadline.
+    """
+    try:
+        result, duration = future.result(timeout=max(deadline - time.monotonic(), 0))
+    except FuturesTimeoutError as error:
+        xbmc.log(f"Skip {branch} in home page. Not received after {_HOME_DEADLINE}s",
+                 level=xbmc.LOGWARNING)
+        raise TimeoutError(f"{branch} not received after {_HOME_DEADLINE}s") from error
+    xbmc.log(f"Received {branch} for home page in {duration:.3f}s", level=xbmc.LOGDEBUG)
+    return result
+
+
+def build_home_page_snapshot(plugin, settings, cached_categories, home_snapshots):
+    """
+    Display home menu like build_home_page.
+    Keep its zones in home_snapshots along with the categories they populated,
+    if home page content was received. Live stream changes too often to be kept.
+    :param SharedCache home_snapshots: snapshots by language, written atomically, since
+    they are written both by home menu display and by its refresh in background
+    """
+    home_categories = {}
+    fixed_items, zone_items = _build_home_menu(plugin, settings, home_categories)
+    cached_categories.update(home_categories)
+    if home_categories:
+        home_snapshots.set(settings.language, pickle.dumps({
+            'zones': zone_items,
+            'categories': home_categories,
+        }))
+    return fixed_items + zone_items
+
+
+def get_home_page_snapshot(plugin, settings, cached_categories, home_snapshots):
+    """
+    Return the home menu with the zones kept by build_home_page_snapshot for current language
+    and restore their categories in cached_categories. Live stream is requested again.
+    Return None if there is no snapshot or it is older than the ttl of home_snapshots.
+    """
+    content = home_snapshots.get(settings.language)
+    if content is None:
+        return None
+    try:
+        snapshot = pickle.loads(content)
+    except (pickle.UnpicklingError, EOFError, AttributeError, ImportError) as error:
+        xbmc.log(f"Ignore unreadable home page snapshot because \"{str(error)}\"",
+                 level=xbmc.LOGWARNING)
+        return None
+    cached_categories.update(snapshot.get('categories'))
+    fixed_items, zone_items = _build_home_menu(
+        plugin, settings, cached_categories, snapshot.get('zones'))
+    return fixed_items + zone_items
 
 
 def build_api_category(plugin, category_code, settings):
@@ -52,35 +157,113 @@ def build_api_category(plugin, category_code, settings):
     return category
 
 
-def get_cached_category(zone_id, cached_categories):
+def get_cached_category(plugin, settings, zone_id, cached_categories):
     """Return the menu for a category that is stored
     in cache from previous api call like home page"""
-    return cached_categories[zone_id]
+    return ArteZone(plugin, settings, cached_categories).build_cached_menu(zone_id)
 
 
 def mark_as_watched(plugin, usr, program_id, label):
     """
     Get program duration and synch progress with total duration
-    in order to mark a program as watched
+    in order to mark a program as watched.
+    Progress is sent to Arte at the end of the add-on invocation or later.
     """
-    status = -1
-    program_info = api.player_video(stg.languages[0], program_id)
-    total_time = program_info.get('attributes').get('metadata').get('duration').get('seconds')
+    total_time = api.get_program_duration(stg.languages[0], program_id)
     auth_token = user.get_cached_token(plugin, usr)
     if auth_token:
-        status = api.sync_last_viewed(auth_token, program_id, total_time)
-        if 200 == status:
-            msg = plugin.addon.getLocalizedString(30036).format(label=label)
-            plugin.notify(msg=msg, image='info')
-        else:
-            msg = plugin.addon.getLocalizedString(30037).format(label=label)
-            plugin.notify(msg=msg, image='error')
+        api.queue_sync_last_viewed(auth_token, program_id, total_time)
+        utils.notify_queued_change(plugin, label)
+
+
+def mark_collection_as_watched(plugin, settings, kind, collection_id, label):
+    """
+    Mark every program of collection collection_id as watched, like mark_as_watched.
+    Durations missing in the collection are requested concurrently.
+    """
+    def queue_watched(auth_token, item):
+        program_id = item.get('programId')
+        duration = ArteHbbTvVideoItem(plugin, item).get_duration() or \
+            api.get_program_duration(settings.language, program_id)
+        return api.queue_sync_last_viewed(auth_token, program_id, duration)
+
+    _change_collection(
+        plugin, settings, api.collection(kind, collection_id, settings.language), label,
+        queue_watched)
+
+
+def add_collection_to_favorites(plugin, settings, kind, collection_id, label):
+    """Add every program of collection collection_id to user favorites"""
+    _change_collection(
+        plugin, settings, api.collection(kind, collection_id, settings.language), label,
+        lambda auth_token, item: api.queue_add_favorite(item.get('programId'), settings.language))
+
+
+def _change_collection(plugin, settings, collection, label, queue_change):
+    """
+    Record a change for every video of collection and send them to Arte,
+    with a bounded pool of workers. Display progress in a dialog, which user can cancel,
+    and notify about the number of videos changed.
+    :param fn queue_change: function taking token and collection item, recording a change
+    with api.queue_* and returning its key
+    """
+    auth_token = user.get_cached_token(plugin, settings.username)
+    if not auth_token:
+        return
+    items = [item for item in collection if ArteHbbTvVideoItem(plugin, item).get_playable_video()]
+    dialog = xbmcgui.DialogProgress()
+    dialog.create(label, plugin.addon.getLocalizedString(30068))
+    keys = _queue_changes(plugin, dialog, items, lambda item: queue_change(auth_token, item))
+    # changes already recorded are sent, even if user cancelled
+    dialog.update(50, plugin.addon.getLocalizedString(30069))
+    results = api.flush_queued_changes(auth_token, _MAX_BULK_WORKERS)
+    dialog.close()
+    count = len([key for key in keys if results.get(key) == 200])
+    # a change not sent right now e.g. while another invocation is sending changes,
+    # or to be retried, is still queued. It is sent later
+    pending = len([key for key in keys if results.get(key) is None])
+    if pending:
+        msg = plugin.addon.getLocalizedString(30071).format(
+            label=label, count=count, total=len(items), pending=pending)
+    else:
+        msg = plugin.addon.getLocalizedString(30070).format(
+            label=label, count=count, total=len(items))
+    plugin.notify(msg=msg, image='info' if count + pending == len(items) else 'warning')
+
+
+def _queue_changes(plugin, dialog, items, queue_change):
+    """
+    Call queue_change for every item concurrently and return the keys of changes recorded.
+    Progress is displayed in the first half of dialog. Stop when user cancels.
+    """
+    keys = []
+    with ThreadPoolExecutor(max_workers=_MAX_BULK_WORKERS) as executor:
+        futures = [executor.submit(queue_change, item) for item in items]
+        for idx, future in enumerate(futures):
+            if dialog.iscanceled():
+                for pending in futures:
+                    pending.cancel()
+                break
+            try:
+                keys.append(future.result())
+            # AttributeError, when player info misses the duration of a program
+            except (requests.exceptions.RequestException, OSError, AttributeError) as error:
+                xbmc.log(f"Unable to prepare change of {items[idx].get('programId')} " +
+                         f"because \"{str(error)}\"", level=xbmc.LOGWARNING)
+            dialog.update(int(50 * (idx + 1) / len(items)), plugin.addon.getLocalizedString(30068))
+    return keys
 
 
 def build_mixed_collection(plugin, kind, collection_id, settings):
     """Build menu of content available in collection collection_id thanks to HBB TV API"""
-    return [mapper.map_generic_item(plugin, item, settings.show_video_streams) for item in
-            api.collection(kind, collection_id, settings.language)]
+    items = api.collection(kind, collection_id, settings.language)
+    records = [programrecord.from_hbbtv(item) for item in items]
+    if not settings.show_video_streams and settings.prefetch_streams > 0:
+        videos = [record.get_playable_video() for record in records]
+        api.prefetch_streams(
+            [video for video in videos if video][:settings.prefetch_streams], settings.language)
+    return [mapper.map_generic_item(plugin, item, record, settings.show_video_streams)
+            for item, record in zip(items, records)]
 
 
 def build_video_streams(plugin, settings, program_id):
@@ -94,7 +277,7 @@ def build_video_streams(plugin, settings, program_id):
     kind = item.get('kind')
 
     return mapper.map_streams(
-        plugin, item, api.streams(kind, program_id, settings.language), settings.quality)
+        plugin, item, api.streams(kind, program_id, settings.language) or [], settings.quality)
 
 
 def build_sibling_playlist(plugin, settings, program_id):
@@ -137,18 +320,38 @@ def build_stream_url(plugin, settings, kind, program_id, audio_slot):
     Return URL to stream content.
     If the content is not available, it tries to return a related trailer or teaser.
     """
-    # first try with content
-    program_stream = api.streams(kind, program_id, settings.language)
+    # content or fallback clip. It allows to display a trailer,
+    # when a documentary is not available anymore like on arte tv website
+    program_stream = api.playable_streams(kind, program_id, settings.language)
     if program_stream:
         return mapper.map_playable(
             program_stream, settings.quality, audio_slot, mapper.match_hbbtv)
-    # second try to fallback clip. It allows to display a trailer,
-    # when a documentary is not available anymore like on arte tv website
-    clip_stream = api.streams('CLIP', program_id, settings.language)
-    if clip_stream:
-        return mapper.map_playable(
-            clip_stream, settings.quality, audio_slot, mapper.match_hbbtv)
     # otherwise raise the error
     msg = plugin.addon.getLocalizedString(30029)
     plugin.notify(msg=msg.format(strm=program_id, ln=settings.language), image='error')
     return None
+
+
+def build_diagnostics(plugin):
+    """
+    Return menu items listing p50/p95/p99 latencies, error counts and bytes received
+    per route and API endpoint, then hit ratios of caches, measured by this add-on version.
+    Labels are not translated, since this menu is meant for maintainers comparing builds.
+    """
+    histograms, counters = api.get_metrics_summary()
+    path = plugin.url_for('diagnostics')
+    items = []
+    for histogram in histograms:
+        items.append({
+            'label': f"{histogram['name']} p50:{histogram['p50']}ms " +
+                     f"p95:{histogram['p95']}ms p99:{histogram['p99']}ms " +
+                     f"count:{histogram['count']} errors:{histogram['errors']} " +
+                     f"received:{histogram['bytes'] // 1024}kB",
+            'path': path})
+    for counter in counters:
+        events = ' '.join(f"{event}:{value}" for event, value in sorted(counter.items())
+                          if event not in ('name', 'ratio'))
+        items.append({
+            'label': f"{counter['name']} hit ratio:{counter['ratio']:.0%} {events}",
+            'path': path})
+    return items
@@ -0,0 +1,218 @@
+"""
+Local stand-in for Arte TV and HBB TV APIs, used by benchmarks to run the add-on offline.
+Player replies are recorded ones from tests/fixtures. Pages, zones, collections,
+user content and streams are generated with the shape of Arte replies.
+Latency, jitter and server errors of replies are configurable.
+"""
+# Standard imports
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
+# pages of a zone, favorites and history
+PAGES = 3
+# zones in home page with videos
+HOME_ZONES = 8
+
+
+def artetv_item(index, lang='fr', collection=False, progress=None):
+    """Return an item of Arte TV API zone, video or collection, with progress if not None"""
+    program_id = f"RC-{index:06d}" if collection else f"{100000 + index}-000-A"
+    item = {
+        'id': f"{program_id}_{lang}",
+        'programId': program_id,
+        'kind': {'code': 'TV_SERIES' if collection else 'SHOW', 'isCollection': collection},
+        'title': f"Program {index}",
+        'subtitle': None if collection else f"Episode {index % 10 + 1}",
+        'shortDescription': 'A program to benchmark the add-on. ' * 5,
+        'mainImage': {'url': f"https://api-cdn.arte.tv/img/v2/image/{index}/__SIZE__"},
+        'durationSeconds': None if collection else 3000 + index,
+        'ageRating': 0,
+        'beginsAt': '2026-07-14T11:35:07Z',
+        'parentCollections': [] if collection else [
+            {'programId': 'RC-000001', 'kind': 'TV_SERIES'}],
+    }
+    if progress is not None:
+        item['lastviewed'] = {'progress': progress, 'timecode': int(progress * 3000)}
+    return item
+
+
+def hbbtv_item(index):
+    """Return a video of HBB TV API collection"""
+    return {
+        'programId': f"{100000 + index}-000-A",
+        'kind': 'SHOW',
+        'title': f"Program {index}",
+        'subtitle': f"Episode {index % 10 + 1}",
+        'shortDescription': 'A program to benchmark the add-on. ' * 5,
+        'imageUrl': f"https://api-cdn.arte.tv/img/v2/image/{index}/480x270",
+        'durationSeconds': 3000 + index,
+        'broadcastBegin': '2026-07-14T11:35:07+00:00',
+        'genrePresse': 'Documentary',
+        'productionCountries': [{'label': 'France'}],
+    }
+
+
+def hbbtv_streams(program_id):
+    """Return streams of HBB TV API in every quality and two audio slots"""
+    return [{'programId': program_id, 'quality': quality, 'audioSlot': slot,
+             'audioLabel': label, 'url': f"https://arte.example/{program_id}/{quality}/{slot}.mp4"}
+            for quality in ('HQ', 'EQ', 'SQ') for slot, label in ((1, 'VF'), (2, 'VA'))]
+
+
+# pylint: disable=too-many-instance-attributes
+class ArteStandIn:
+    """
+    HTTP server replying to Arte TV API under /api and HBB TV API under /hbbtv.
+    :param float latency: seconds before every reply
+    :param float jitter: max seconds randomly added to latency
+    :param float error_rate: ratio of replies failing with 503
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, page_size=20, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.page_size = page_size
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._routes = [
+            (r'/api/player/v2/config/\w+/LIVE$', self._live),
+            (r'/api/player/v2/config/(\w+)/([\w-]+)$', self._player),
+            (r'/api/emac/v4/(\w+)/\w+/pages/SEARCH/$', self._search),
+            (r'/api/emac/v4/(\w+)/\w+/pages/(\w+)/$', self._page),
+            (r'/api/emac/v4/(\w+)/\w+/zones/([\w-]+)/content$', self._zone),
+            (r'/api/emac/v4/(\w+)/web/programs/([\w-]+)$', self._program),
+            (r'/api/sso/v3/(favorites|lastvieweds)/(\w+)$', self._user_content),
+            (r'/api/sso/v3/(favorites|lastvieweds)(/[\w-]+)?$', lambda *args, **kwargs: {}),
+            (r'/hbbtv/OPA/v3/streams/([\w-]+)/\w+/\w+$', self._streams),
+            (r'/hbbtv/OPA/v3/videos/([\w-]+)/\w+$', self._video),
+            (r'/hbbtv/EMAC/teasers/collection/v2/([\w-]+)/\w+$', self._collection),
+        ]
+
+    def start(self):
+        """Start serving in background and return the base URL of the server"""
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Dispatch every request to the stand-in"""
+            # keep connections alive like Arte servers
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                # pylint: disable=invalid-name
+                """Reply to GET"""
+                stand_in.reply(self)
+
+            do_PUT = do_PATCH = do_DELETE = do_POST = do_GET
+
+            def log_message(self, *args):
+                """Do not log every request in stderr"""
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def stop(self):
+        """Stop serving"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reply(self, handler):
+        """Reply to the request of handler after latency, with an error or JSON content"""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.error_rate
+        length = int(handler.headers.get('content-length') or 0)
+        if length:
+            handler.rfile.read(length)
+        time.sleep(delay)
+        url = urlsplit(handler.path)
+        content = None
+        status = 503 if fail else 404
+        if not fail:
+            for pattern, build in self._routes:
+                match = re.match(pattern, url.path)
+                if match:
+                    content = build(*match.groups(), query=url.query)
+                    status = 200
+                    break
+        body = content if isinstance(content, bytes) else json.dumps(content or {}).encode()
+        handler.send_response(status)
+        handler.send_header('content-type', 'application/json')
+        handler.send_header('content-length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _items(self, offset, lang, progress=None):
+        return [artetv_item(offset + index, lang, collection=index % 5 == 4, progress=progress)
+                for index in range(self.page_size)]
+
+    def _paged(self, query, lang, progress=None, meta='pagination'):
+        match = re.search(r'page=(\d+)', query)
+        page = int(match.group(1)) if match else 1
+        return {'data': self._items(page * self.page_size, lang, progress),
+                meta: {'page': page, 'pages': PAGES}}
+
+    def _live(self, query):
+        # pylint: disable=unused-argument
+        return (FIXTURES / 'live_with_streams-api.json').read_bytes()
+
+    def _player(self, lang, program_id, query):
+        # pylint: disable=unused-argument
+        return {'data': {'id': f"{program_id}_{lang}", 'type': 'ConfigPlayer', 'attributes': {
+            'metadata': {'providerId': program_id, 'language': lang, 'title': program_id,
+                         'duration': {'seconds': 3000}}}}}
+
+    def _page(self, lang, category, query):
+        # pylint: disable=unused-argument
+        zones = [{'id': f"zone-{index}", 'title': f"{category} zone {index}",
+                  'content': {'data': self._items(index * self.page_size, lang),
+                              'pagination': {'page': 1, 'pages': PAGES}}}
+                 for index in range(HOME_ZONES)]
+        zones.append({'id': 'favorites', 'title': 'Favorites', 'content': {'data': []},
+                      'authenticatedContent': {'contentId': 'sso-favorites'}})
+        zones.append({'id': 'history', 'title': 'History', 'content': {'data': []},
+                      'authenticatedContent': {'contentId': 'sso-personalzone'}})
+        zones.append({'id': 'cinema', 'title': 'Cinema', 'link': {'page': 'CIN'}})
+        return {'zones': zones}
+
+    def _search(self, lang, query):
+        return {'zones': [{'id': 'search-zone', 'title': 'Search', 'content': self._paged(
+            query, lang)}]}
+
+    def _zone(self, lang, zone_id, query):
+        # pylint: disable=unused-argument
+        return self._paged(query, lang)
+
+    def _program(self, lang, program_id, query):
+        # pylint: disable=unused-argument
+        return {'zones': [{'id': program_id, 'content': {'data': [artetv_item(1, lang)]}}]}
+
+    def _user_content(self, content_type, lang, query):
+        progress = 0.5 if content_type == 'lastvieweds' else None
+        return self._paged(query, lang, progress, meta='meta')
+
+    def _streams(self, program_id, query):
+        # pylint: disable=unused-argument
+        return {'videoStreams': hbbtv_streams(program_id)}
+
+    def _video(self, program_id, query):
+        # pylint: disable=unused-argument
+        return {'videos': [dict(hbbtv_item(1), programId=program_id)]}
+
+    def _collection(self, collection_id, query):
+        # pylint: disable=unused-argument
+        return {'collectionId': collection_id, 'subCollections': [
+            {'videos': [hbbtv_item(index) for index in range(self.page_size)]}]}
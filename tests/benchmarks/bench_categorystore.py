@@ -0,0 +1,93 @@
+"""
+Benchmark storage of cached categories, before (a pickled dict loaded and written back
+on every invocation like plugin.get_storage) and after (resources/lib/categorystore.py):
+time to display a zone, i.e. read one category, and to store the zones of a home page
+when a single zone changed.
+
+Run in repository root folder:
+    PYTHONPATH="$PWD/plugin.video.arteplussept" python tests/benchmarks/bench_categorystore.py
+"""
+# Standard imports
+import os
+import pickle
+import sys
+import tempfile
+import timeit
+
+# pylint: disable=import-error
+from resources.lib import programrecord
+from resources.lib.categorystore import CategoryStore
+
+# numbers of zones cached, and records per zone
+ZONE_COUNTS = (10, 100)
+ZONE_SIZE = 50
+
+
+def build_categories(count, version=0):
+    """Return count categories of ZONE_SIZE records, like ArteZone.build_item caches them"""
+    return {f"zone-{index}": {
+        'records': [programrecord.to_cached(programrecord.ProgramRecord(
+            f"{100000 + record}-000-A", 'SHOW', f"Program {record}", 'Episode',
+            'A program to benchmark the add-on. ' * 5, None, 3000, 'G',
+            f"https://api-cdn.arte.tv/img/v2/image/{record}/480x270",
+            f"https://api-cdn.arte.tv/img/v2/image/{record}/1920x1080",
+            '2026-07-14 11:35:07+00:00', None, None, None, None, None))
+            for record in range(ZONE_SIZE)],
+        'pagination': {'page': 1, 'pages': 3 + (version if index == 0 else 0)},
+    } for index in range(count)}
+
+
+def pickled_dict_read(file_path, zone_id):
+    """Read a zone like plugin.get_storage: load and write back the whole dict"""
+    with open(file_path, 'rb') as file:
+        categories = pickle.load(file)
+    category = categories[zone_id]
+    with open(file_path, 'wb') as file:
+        pickle.dump(categories, file)
+    return category
+
+
+def pickled_dict_update(file_path, new_categories):
+    """Store zones like plugin.get_storage: load, update and write back the whole dict"""
+    with open(file_path, 'rb') as file:
+        categories = pickle.load(file)
+    categories.update(new_categories)
+    with open(file_path, 'wb') as file:
+        pickle.dump(categories, file)
+
+
+def measure(run):
+    """Return mean time of run() in milliseconds"""
+    runs, total = timeit.Timer(run).autorange()
+    return total / runs * 1000
+
+
+def bench(folder, count):
+    """Print time to read a zone and store a home page of count zones, before and after"""
+    categories = build_categories(count)
+    refreshed = build_categories(count, version=1)
+    file_path = os.path.join(folder, f"cached_categories_{count}")
+    with open(file_path, 'wb') as file:
+        pickle.dump(categories, file)
+    read_ms = measure(lambda: pickled_dict_read(file_path, 'zone-0'))
+    store_ms = measure(lambda: pickled_dict_update(file_path, refreshed))
+    print(f"{count:6} {'before':8} {read_ms:8.2f} {store_ms:9.2f}")
+    store = CategoryStore(os.path.join(folder, f"categories_{count}.sqlite"))
+    store.update(categories)
+    read_ms = measure(lambda: store['zone-0'])
+    store_ms = measure(lambda: store.update(refreshed))
+    print(f"{count:6} {'after':8} {read_ms:8.2f} {store_ms:9.2f}")
+    store.close()
+
+
+def main():
+    """Print time to read a zone and store a home page, before and after"""
+    print(f"{'zones':>6} {'storage':8} {'read ms':>8} {'store ms':>9}")
+    with tempfile.TemporaryDirectory() as folder:
+        for count in ZONE_COUNTS:
+            bench(folder, count)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
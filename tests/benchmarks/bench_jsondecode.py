@@ -0,0 +1,68 @@
+"""
+Benchmark decoding of Arte API replies recorded in tests/fixtures,
+before (OrderedDict from reply text) and after (native dicts from reply bytes).
+
+Run in repository root folder:
+    PYTHONPATH="$PWD/plugin.video.arteplussept" python tests/benchmarks/bench_jsondecode.py
+"""
+# Standard imports
+import json
+import sys
+import timeit
+import tracemalloc
+from collections import OrderedDict
+from pathlib import Path
+
+# pylint: disable=import-error
+from resources.lib import jsondecoder
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
+# a home page is made of hundreds of items. Build a payload of similar size from fixtures
+LARGE_PAYLOAD_COPIES = 100
+
+
+def decode_before(content):
+    """Decode like requests reply.json(object_pairs_hook=OrderedDict) i.e. from text."""
+    return json.loads(content.decode('utf-8'), object_pairs_hook=OrderedDict)
+
+
+def decode_stdlib(content):
+    """Decode with standard library into native dicts from bytes."""
+    return json.loads(content)
+
+
+def load_payloads():
+    """Return a dict of payload name to bytes: recorded replies and a large one built from them."""
+    payloads = {path.name: path.read_bytes() for path in sorted(FIXTURES.glob("*-api.json"))}
+    items = [json.loads(content) for content in payloads.values()]
+    payloads['large-home-like'] = json.dumps(
+        {'zones': [{'content': {'data': items}}] * LARGE_PAYLOAD_COPIES}).encode('utf-8')
+    return payloads
+
+
+def measure(decode, content):
+    """Return mean decode time in milliseconds and peak memory in KiB of decode(content)."""
+    runs, total = timeit.Timer(lambda: decode(content)).autorange()
+    tracemalloc.start()
+    decoded = decode(content)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del decoded
+    return total / runs * 1000, peak / 1024
+
+
+def main():
+    """Print a table with decode time and peak memory per payload and decoder."""
+    decoders = [('before', decode_before), ('stdlib', decode_stdlib),
+                (f"after ({jsondecoder.decoder_name()})", jsondecoder.loads)]
+    print(f"{'payload':45} {'decoder':16} {'size KiB':>9} {'time ms':>9} {'peak KiB':>9}")
+    for name, content in load_payloads().items():
+        for decoder_label, decode in decoders:
+            duration, peak = measure(decode, content)
+            print(f"{name:45} {decoder_label:16} {len(content) / 1024:9.1f} "
+                  f"{duration:9.3f} {peak:9.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
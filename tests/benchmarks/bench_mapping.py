@@ -0,0 +1,74 @@
+"""
+Benchmark mapping of synthetic pages of Arte TV API items into menu items,
+before (an ArteTvVideoItem per item, frozen in peritemmapper.py) and after (ArteTvPageMapper
+for the whole page). Print items mapped per second and peak memory. Both mappings are checked
+to be equal first.
+
+Run in repository root folder:
+    PYTHONPATH="$PWD/plugin.video.arteplussept" python tests/benchmarks/bench_mapping.py
+"""
+# Standard imports
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+# pylint: disable=wrong-import-position
+import arteserver  # noqa: E402
+import kodistubs  # noqa: E402
+
+# number of items of synthetic pages
+PAGE_SIZES = (1000, 10000)
+
+
+def build_page(size):
+    """Return size items like in a zone, with collections and partly viewed videos"""
+    return [arteserver.artetv_item(index, collection=index % 5 == 4,
+                                   progress=0.5 if index % 3 == 0 else None)
+            for index in range(size)]
+
+
+def measure(map_page, page):
+    """Return items mapped per second and peak memory in KiB of map_page(page)"""
+    runs, total = timeit.Timer(lambda: map_page(page)).autorange()
+    tracemalloc.start()
+    mapped = map_page(page)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del mapped
+    return len(page) * runs / total, peak / 1024
+
+
+def main():
+    """Print a table with items per second and peak memory per page size and mapper"""
+    with tempfile.TemporaryDirectory() as profile:
+        kodistubs.install(profile)
+        # pylint: disable=import-error,import-outside-toplevel
+        from resources.lib import plugin as plugin_module
+        from resources.lib.mapper.artetvpage import ArteTvPageMapper
+        from peritemmapper import ArteTvVideoItem
+        plugin = plugin_module.plugin
+        page_mapper = ArteTvPageMapper(plugin)
+
+        def map_before(page):
+            items = [ArteTvVideoItem(plugin, item).map_artetv_item() for item in page]
+            videos = [ArteTvVideoItem(plugin, item).get_playable_video() for item in page]
+            return [item for item in items if item], [video for video in videos if video]
+
+        mappers = [('before', map_before), ('after', page_mapper.map_page)]
+        print(f"{'items':>6} {'mapper':8} {'items/s':>10} {'peak KiB':>9}")
+        for size in PAGE_SIZES:
+            page = build_page(size)
+            if map_before(page) != page_mapper.map_page(page):
+                print(f"Mappings of {size} items differ")
+                return 1
+            for label, map_page in mappers:
+                rate, peak = measure(map_page, page)
+                print(f"{size:6} {label:8} {rate:10.0f} {peak:9.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Benchmark program records of resources/lib/programrecord.py against the items they replace:
+memory held by the items of a page, as decoded API items and as records,
+and size of the pickled categories cached for a home page,
+before (mapped menu items) and after (records).
+
+Run in repository root folder:
+    PYTHONPATH="$PWD/plugin.video.arteplussept" python tests/benchmarks/bench_records.py
+"""
+# Standard imports
+import json
+import pickle
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+# pylint: disable=wrong-import-position
+import arteserver  # noqa: E402
+import kodistubs  # noqa: E402
+
+# number of items of the page measured in memory
+PAGE_SIZE = 10000
+# zones of the home page and items per zone
+HOME_ZONES = 8
+ZONE_SIZE = 50
+
+
+def build_items(size, offset=0):
+    """Return size items like in a zone, with collections and partly viewed videos"""
+    return [arteserver.artetv_item(offset + index, collection=index % 5 == 4,
+                                   progress=0.5 if index % 3 == 0 else None)
+            for index in range(size)]
+
+
+def measure_memory(build):
+    """Return memory in KiB held by the result of build()"""
+    tracemalloc.start()
+    result = build()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return current / 1024
+
+
+def main():
+    """Print memory of a page and size of home page cached categories before and after"""
+    with tempfile.TemporaryDirectory() as profile:
+        kodistubs.install(profile)
+        # pylint: disable=import-error,import-outside-toplevel
+        from resources.lib import plugin as plugin_module
+        from resources.lib import programrecord
+        from resources.lib.mapper.artetvpage import ArteTvPageMapper
+        from resources.lib.mapper.artezone import ArteZone
+        plugin = plugin_module.plugin
+        content = json.dumps(build_items(PAGE_SIZE))
+        items_kib = measure_memory(lambda: json.loads(content))
+        records_kib = measure_memory(lambda: [
+            programrecord.from_artetv(item) for item in json.loads(content)])
+        print(f"{PAGE_SIZE} items: API items {items_kib:.0f} KiB, records {records_kib:.0f} KiB")
+
+        zones = [{'id': f"zone-{index}", 'title': f"Zone {index}", 'content': {
+            'data': build_items(ZONE_SIZE, index * ZONE_SIZE),
+            'pagination': {'page': 1, 'pages': 3}}} for index in range(HOME_ZONES)]
+        page_mapper = ArteTvPageMapper(plugin)
+        menus = {zone['id']: page_mapper.map_page(zone['content']['data'])[0]
+                 for zone in zones}
+        cached_categories = {}
+        for zone in zones:
+            ArteZone(plugin, plugin_module.settings, cached_categories).build_item(zone)
+        print(f"Cached categories of {HOME_ZONES} zones of {ZONE_SIZE} items: "
+              f"menus {len(pickle.dumps(menus)) / 1024:.0f} KiB, "
+              f"records {len(pickle.dumps(cached_categories)) / 1024:.0f} KiB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Benchmark add-on routes end to end and offline: routes of resources/lib/plugin.py are run
+with stand-ins of Kodi modules against a local stand-in of Arte APIs (see arteserver.py),
+with configurable latency, jitter and server errors.
+Report per route wall time, number of requests to Arte APIs and peak Python memory
+as JSON, so that runs of two builds can be compared.
+The first run of a route starts with empty caches. Next runs reuse caches on disk.
+
+Run in repository root folder:
+    PYTHONPATH="$PWD/plugin.video.arteplussept" python tests/benchmarks/bench_routes.py \
+        --latency 80 --jitter 40 --runs 5 --output bench_routes.json
+"""
+# Standard imports
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+# pylint: disable=wrong-import-position
+import arteserver  # noqa: E402
+import kodistubs  # noqa: E402
+
+# seconds to let background requests complete after a route, like addon.py does
+PREFETCH_DEADLINE = 5
+
+
+def parse_args():
+    """Return command line arguments"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', maxsplit=1)[0])
+    parser.add_argument('--latency', type=float, default=50, help="milliseconds per reply")
+    parser.add_argument('--jitter', type=float, default=0, help="max milliseconds added")
+    parser.add_argument('--error-rate', type=float, default=0, help="ratio of 503 replies")
+    parser.add_argument('--page-size', type=int, default=20, help="items per page or zone")
+    parser.add_argument('--runs', type=int, default=5, help="runs per route")
+    parser.add_argument('--output', help="JSON file of results. Default to standard output")
+    return parser.parse_args()
+
+
+def build_routes(plugin_module):
+    """Return pairs of route name and function running it with benchmark data"""
+    zone_id = 'zone-1'
+    program_id = arteserver.artetv_item(1)['programId']
+    query = kodistubs.SEARCH_QUERY
+    return [
+        ('display_index', plugin_module.display_index),
+        ('display_cached_category', lambda: plugin_module.display_cached_category(zone_id)),
+        ('display_category_page', lambda: plugin_module.display_category_page(
+            zone_id, '2', 'HOME')),
+        ('display_favorites', lambda: plugin_module.display_favorites(1)),
+        ('display_last_viewed', lambda: plugin_module.display_last_viewed(1)),
+        ('display_collection', lambda: plugin_module.display_collection(
+            'TV_SERIES', 'RC-000001')),
+        ('play', lambda: plugin_module.play(
+            'SHOW', program_id, 'Unknown', plugin_module.PlayFrom.LST.value)),
+        ('play_collection', lambda: plugin_module.play_collection(
+            'TV_SERIES', 'RC-000001', 'Unknown')),
+        ('init_search', plugin_module.init_search),
+        ('display_search_page', lambda: plugin_module.display_search_page(
+            'search-zone', '2', query)),
+    ]
+
+
+def run_route(route, stand_in, api):
+    """Run route once. Return its wall time, requests sent, peak memory and if it failed"""
+    requests_before = stand_in.requests
+    failed = False
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        route()
+    except Exception:  # pylint: disable=broad-exception-caught
+        # e.g. with server errors. Kodi would display an error
+        failed = True
+    wall_time = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    api.finish_prefetch(PREFETCH_DEADLINE)
+    return wall_time, stand_in.requests - requests_before, peak, failed
+
+
+def summarize(measures):
+    """Return statistics of the runs of a route"""
+    wall_times = [measure[0] * 1000 for measure in measures]
+    return {
+        'runs': len(measures),
+        'first_ms': round(wall_times[0], 1),
+        'median_ms': round(statistics.median(wall_times), 1),
+        'min_ms': round(min(wall_times), 1),
+        'max_ms': round(max(wall_times), 1),
+        'first_requests': measures[0][1],
+        'median_requests': statistics.median(measure[1] for measure in measures),
+        'peak_memory_kib': round(max(measure[2] for measure in measures) / 1024),
+        'failed_runs': sum(1 for measure in measures if measure[3]),
+    }
+
+
+def main():
+    """Run benchmark and write results"""
+    args = parse_args()
+    stand_in = arteserver.ArteStandIn(
+        args.latency / 1000, args.jitter / 1000, args.error_rate, args.page_size)
+    base_url = stand_in.start()
+    os.environ['ARTEPLUSSEPT_ARTETV_URL'] = f"{base_url}/api"
+    os.environ['ARTEPLUSSEPT_HBBTV_URL'] = f"{base_url}/hbbtv"
+    with tempfile.TemporaryDirectory() as profile:
+        kodistubs.install(profile)
+        # pylint: disable=import-error,import-outside-toplevel
+        from resources.lib import api
+        from resources.lib import plugin as plugin_module
+        plugin_module.plugin.get_storage('token')[kodistubs.SETTINGS['user_email']] = {
+            'access_token': 'bench', 'token_type': 'Bearer', 'expires_in': 3600,
+            'refresh_token': 'bench', 'obtained_at': time.time()}
+        results = {}
+        for name, route in build_routes(plugin_module):
+            measures = [run_route(route, stand_in, api) for _ in range(args.runs)]
+            results[name] = summarize(measures)
+    stand_in.stop()
+    report = json.dumps({
+        'python': platform.python_version(),
+        'config': {'latency_ms': args.latency, 'jitter_ms': args.jitter,
+                   'error_rate': args.error_rate, 'page_size': args.page_size},
+        'routes': results,
+    }, indent=2)
+    if args.output:
+        Path(args.output).write_text(report + '\n', encoding='utf-8')
+    else:
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark building the plugin URLs of a zone of Arte TV API items,
+before (plugin.url_for per URL) and after (templates of resources/lib/urlbuilder.py).
+URLs are the ones of play and context menu entries of every item.
+plugin.url_for of stand-ins follows the URL rules of resources/lib/plugin.py like xbmcswift2.
+
+Run in repository root folder:
+    PYTHONPATH="$PWD/plugin.video.arteplussept" python tests/benchmarks/bench_urlbuilder.py
+"""
+# Standard imports
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+# pylint: disable=wrong-import-position
+import arteserver  # noqa: E402
+import kodistubs  # noqa: E402
+
+# number of items of the zone
+ZONE_SIZE = 500
+
+
+def build_zone_urls(url_for, zone):
+    """Return URLs of play and context menu entries of zone items built with url_for"""
+    urls = []
+    for item in zone:
+        program_id = item['programId']
+        kind = item['kind']['code']
+        label = f"[B]{item['title']}[/B] - {item['subtitle']}"
+        urls.append(url_for('play', kind=kind, program_id=program_id, mpaa='G'))
+        for endpoint in ('add_favorite', 'remove_favorite', 'mark_as_watched'):
+            urls.append(url_for(endpoint, program_id=program_id, label=label))
+    return urls
+
+
+def measure(build):
+    """Return mean time of build() in milliseconds"""
+    runs, total = timeit.Timer(build).autorange()
+    return total / runs * 1000
+
+
+def main():
+    """Print time to build URLs of a zone before and after"""
+    with tempfile.TemporaryDirectory() as profile:
+        kodistubs.install(profile)
+        # pylint: disable=import-error,import-outside-toplevel
+        from resources.lib import plugin as plugin_module
+        from resources.lib.urlbuilder import get_url_builder
+        plugin = plugin_module.plugin
+        builder = get_url_builder(plugin)
+        zone = [arteserver.artetv_item(index) for index in range(ZONE_SIZE)]
+        before = build_zone_urls(plugin.url_for, zone)
+        if before != build_zone_urls(builder.url_for, zone):
+            print("URLs differ")
+            return 1
+        before_ms = measure(lambda: build_zone_urls(plugin.url_for, zone))
+        after_ms = measure(lambda: build_zone_urls(builder.url_for, zone))
+        print(f"{len(before)} URLs of {ZONE_SIZE} items: before {before_ms:.2f} ms, "
+              f"after {after_ms:.2f} ms, {before_ms / after_ms:.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+Minimal stand-ins of Kodi modules and xbmcswift2, enough to run add-on routes outside Kodi
+in benchmarks. Dialogs are confirmed, keyboard returns a query and players stop at once.
+Install them with install() before importing resources.lib modules.
+"""
+# Standard imports
+import re
+import sys
+import types
+from urllib.parse import quote_plus
+from urllib.parse import urlencode
+
+# settings of the add-on as returned by plugin.get_setting
+SETTINGS = {
+    'lang': 'fr',
+    'quality': 'High',
+    'show_video_streams': False,
+    'user_email': 'bench@example.org',
+    'loglevel': 'DEFAULT',
+    'home_max_staleness': 0,
+    'prefetch_streams': 0,
+}
+VERSION = '1.6.0'
+# query typed in keyboard
+SEARCH_QUERY = 'bench'
+
+
+class Addon:
+    """xbmcaddon.Addon"""
+
+    def __init__(self, profile):
+        self.profile = profile
+
+    def getAddonInfo(self, key):
+        # pylint: disable=invalid-name
+        """Return profile folder or version"""
+        return self.profile if key == 'profile' else VERSION
+
+    def getSetting(self, key):
+        # pylint: disable=invalid-name
+        """Return current version for last version notified, to skip the info dialog"""
+        return VERSION if key == 'last_version_notified' else ''
+
+    def setSetting(self, key, value):
+        # pylint: disable=invalid-name
+        """Ignore setting change"""
+
+    def getLocalizedString(self, string_id):
+        # pylint: disable=invalid-name
+        """Return a label with string id"""
+        return f"#{string_id}"
+
+
+class Plugin:
+    """xbmcswift2.Plugin with routes, settings and storages kept in memory"""
+
+    def __init__(self, profile):
+        self.addon = Addon(profile)
+        self.storage_path = profile
+        self._storages = {}
+        self._url_rules = {}
+
+    def route(self, url_rule, name=None):
+        """Record the URL rule of the view function and return the function as is"""
+        def decorator(func):
+            self._url_rules[name or func.__name__] = url_rule
+            return func
+        return decorator
+
+    def url_for(self, endpoint, **items):
+        """
+        Return a plugin URL like xbmcswift2: values named in the URL rule of endpoint are quoted
+        into its path and other values are added to query string
+        """
+        url_rule = self._url_rules[endpoint]
+        items = {key: str(value) if isinstance(value, int) else value
+                 for key, value in items.items()}
+        keywords = re.findall(r'<(\w+)>', url_rule)
+        path = re.sub(r'<(\w+)>', lambda match: quote_plus(items[match.group(1)]), url_rule)
+        query = urlencode({key: value for key, value in items.items() if key not in keywords})
+        return f"plugin://plugin.video.arteplussept{path}" + (f"?{query}" if query else '')
+
+    def get_storage(self, name, file_format='pickle', TTL=None):
+        # pylint: disable=invalid-name,unused-argument
+        """Return a dict kept for the whole benchmark"""
+        return self._storages.setdefault(name, {})
+
+    def get_setting(self, key, converter=None, choices=None):
+        # pylint: disable=unused-argument
+        """Return a value of SETTINGS"""
+        value = SETTINGS.get(key)
+        return converter(value) if converter and value is not None else value
+
+    def set_setting(self, key, value):
+        """Change a value of SETTINGS"""
+        SETTINGS[key] = value
+        return True
+
+    def notify(self, msg='', title=None, delay=5000, image=''):
+        """Ignore notification"""
+
+    def finish(self, items=None, **kwargs):
+        # pylint: disable=unused-argument
+        """Return items"""
+        return items
+
+    def end_of_directory(self, succeeded=True, **kwargs):
+        # pylint: disable=unused-argument
+        """Ignore end of directory"""
+
+    def set_resolved_url(self, item=None):
+        """Return resolved item in a list like xbmcswift2"""
+        return [item]
+
+    def play_video(self, item):
+        """Return played item"""
+        return item
+
+    def add_to_playlist(self, items, playlist='video'):
+        # pylint: disable=unused-argument
+        """Return items added"""
+        return list(items)
+
+
+class Monitor:
+    """xbmc.Monitor of a Kodi about to exit, so that playback tracking ends at once"""
+
+    def waitForAbort(self, timeout=0):
+        # pylint: disable=invalid-name,unused-argument
+        """Return True at once"""
+        return True
+
+    def abortRequested(self):
+        # pylint: disable=invalid-name
+        """Let prefetch run"""
+        return False
+
+
+# pylint: disable=too-few-public-methods
+class Player:
+    """xbmc.Player not playing"""
+
+    def isPlaying(self):
+        # pylint: disable=invalid-name
+        """Return False"""
+        return False
+
+
+class PlayList:
+    """xbmc.PlayList always empty"""
+
+    def __init__(self, playlist_id):
+        self.playlist_id = playlist_id
+
+    def size(self):
+        """Return 0"""
+        return 0
+
+    def getposition(self):
+        # pylint: disable=invalid-name
+        """Return -1"""
+        return -1
+
+    def clear(self):
+        """Ignore clear"""
+
+
+class Keyboard:
+    """xbmc.Keyboard returning SEARCH_QUERY"""
+
+    def __init__(self, *args):
+        self.args = args
+
+    def doModal(self):
+        # pylint: disable=invalid-name
+        """Return at once"""
+
+    def isConfirmed(self):
+        # pylint: disable=invalid-name
+        """Return True"""
+        return True
+
+    def getText(self):
+        # pylint: disable=invalid-name
+        """Return SEARCH_QUERY"""
+        return SEARCH_QUERY
+
+
+# pylint: disable=too-few-public-methods
+class Dialog:
+    """xbmcgui.Dialog confirming everything"""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: True
+
+
+# pylint: disable=too-few-public-methods
+class DialogProgress:
+    """xbmcgui.DialogProgress never canceled"""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: False
+
+
+def install(profile):
+    """Install Kodi modules and xbmcswift2 in sys.modules, with add-on data in folder profile"""
+    xbmc = types.ModuleType('xbmc')
+    xbmc.LOGDEBUG, xbmc.LOGINFO, xbmc.LOGWARNING, xbmc.LOGERROR = range(4)
+    xbmc.PLAYLIST_VIDEO = 1
+    xbmc.log = lambda msg, level=0: None
+    xbmc.executebuiltin = lambda command: None
+    xbmc.sleep = lambda milliseconds: None
+    xbmc.Monitor, xbmc.Player, xbmc.PlayList, xbmc.Keyboard = Monitor, Player, PlayList, Keyboard
+    xbmcgui = types.ModuleType('xbmcgui')
+    xbmcgui.Dialog, xbmcgui.DialogProgress = Dialog, DialogProgress
+    xbmcgui.ListItem = dict
+    xbmcaddon = types.ModuleType('xbmcaddon')
+    xbmcaddon.Addon = lambda *args: Addon(profile)
+    xbmcvfs = types.ModuleType('xbmcvfs')
+    xbmcvfs.translatePath = lambda path: path
+    actions = types.ModuleType('actions')
+    actions.background = lambda url: f"RunPlugin({url})"
+    actions.update_view = lambda url: f"Container.Update({url})"
+    xbmcswift2 = types.ModuleType('xbmcswift2')
+    xbmcswift2.xbmc, xbmcswift2.xbmcgui, xbmcswift2.xbmcaddon = xbmc, xbmcgui, xbmcaddon
+    xbmcswift2.xbmcvfs, xbmcswift2.actions = xbmcvfs, actions
+    xbmcswift2.Plugin = lambda *args: Plugin(profile)
+    sys.modules.update({'xbmc': xbmc, 'xbmcgui': xbmcgui, 'xbmcaddon': xbmcaddon,
+                        'xbmcvfs': xbmcvfs, 'xbmcswift2': xbmcswift2})
@@ -0,0 +1,50 @@
+"""
+Fixtures shared by test modules importing add-on modules without Kodi.
+"""
+# Standard imports
+import importlib
+import sys
+import types
+from unittest.mock import Mock
+# pylint: disable=import-error
+import pytest
+
+# settings of the add-on returned by plugin.get_setting
+SETTINGS = {'lang': 'fr', 'quality': 'High', 'loglevel': 'DEFAULT'}
+
+
+def build_fake_xbmcswift2(profile):
+    """Return a stand-in of xbmcswift2 and Kodi modules, storing add-on data in profile"""
+    xbmc = types.ModuleType('xbmc')
+    xbmc.LOGDEBUG, xbmc.LOGINFO, xbmc.LOGWARNING, xbmc.LOGERROR = range(4)
+    xbmc.log = lambda msg, level=0: None
+    xbmc.Monitor = Mock(return_value=Mock(abortRequested=Mock(return_value=False)))
+    xbmc.Player = type('Player', (), {})
+    xbmcaddon = types.ModuleType('xbmcaddon')
+    xbmcaddon.Addon = Mock(return_value=Mock(getAddonInfo=Mock(return_value=profile)))
+    xbmcswift2 = types.ModuleType('xbmcswift2')
+    xbmcswift2.xbmc, xbmcswift2.xbmcaddon = xbmc, xbmcaddon
+    xbmcswift2.xbmcvfs = types.SimpleNamespace(translatePath=lambda path: path)
+    xbmcswift2.xbmcgui = types.ModuleType('xbmcgui')
+    xbmcswift2.actions = types.SimpleNamespace(
+        background=lambda url: f"RunPlugin({url})",
+        update_view=lambda url: f"Container.Update({url})")
+    xbmcswift2.Plugin = Mock(return_value=Mock(
+        get_setting=lambda key, *args, **kwargs: SETTINGS.get(key)))
+    return xbmcswift2
+
+
+@pytest.fixture(name="import_addon_module")
+def import_addon_module_fixture(tmp_path, monkeypatch):
+    """
+    Return a function importing an add-on module with stand-ins of Kodi modules.
+    Forget modules imported this way after test.
+    """
+    monkeypatch.setitem(sys.modules, 'xbmcswift2', build_fake_xbmcswift2(str(tmp_path)))
+    modules = set(sys.modules)
+    yield importlib.import_module
+    for name in set(sys.modules) - modules:
+        package, _, module = name.rpartition('.')
+        if package in sys.modules and getattr(sys.modules[package], module, None):
+            delattr(sys.modules[package], module)
+        del sys.modules[name]
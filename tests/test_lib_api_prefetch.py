@@ -0,0 +1,88 @@
+"""
+Test module for requests sent by the API module to look up streams, in background or not.
+"""
+# Standard imports
+import json
+from unittest.mock import Mock
+# pylint: disable=import-error
+import pytest
+import requests
+
+
+@pytest.fixture(name="api")
+def api_fixture(import_addon_module):
+    """Return api module imported with stand-ins of Kodi modules"""
+    api = import_addon_module('resources.lib.api')
+    yield api
+    api.finish_prefetch()
+
+
+def build_reply(status_code, content):
+    """Return a reply of Arte with status_code and content"""
+    reply = Mock(status_code=status_code, headers={}, content=content)
+    if status_code >= 400:
+        reply.raise_for_status.side_effect = requests.exceptions.HTTPError(
+            str(status_code), response=reply)
+    return reply
+
+
+def record_requests(api, monkeypatch, content=b'{"videoStreams": []}', replies=None):
+    """
+    Replace api._send with a function replying content, or the next one of replies if any.
+    Return the requests sent.
+    """
+    sent = []
+
+    def send(request_scope, method, url, retries=0, **kwargs):
+        sent.append({'scope': request_scope, 'method': method, 'url': url,
+                     'retries': retries, 'timeout': kwargs.get('timeout')})
+        if replies:
+            return replies.pop(0)
+        return build_reply(200, content)
+
+    monkeypatch.setattr(api, '_send', send)
+    return sent
+
+
+def test_prefetched_streams_are_requested_without_retry_and_short_timeout(api, monkeypatch):
+    """Test that program and clip streams of a prefetched video respect prefetch bounds."""
+    sent = record_requests(api, monkeypatch)
+
+    api.prefetch_streams([('SHOW', '110342-012-A')], 'fr')
+    api.finish_prefetch()
+
+    assert [request['url'].split('/')[-2] for request in sent] == ['SHOW', 'CLIP']
+    for request in sent:
+        assert request['retries'] == 0
+        assert request['timeout'] == (api.resilience.CONNECT_TIMEOUT, 5)
+
+
+def test_streams_played_are_requested_with_retries(api, monkeypatch):
+    """Test that streams requested for a video being played are retried on errors."""
+    sent = record_requests(api, monkeypatch)
+
+    api.playable_streams('SHOW', '110342-012-A', 'fr')
+
+    assert len(sent) == 2
+    for request in sent:
+        assert request['retries'] == 2
+        assert request['timeout'] is None
+
+
+def test_streams_are_known_missing_only_after_a_successful_reply(api, monkeypatch):
+    """Test that an error reply is not cached as a program without stream."""
+    stream = {'quality': 'SQ', 'url': 'https://arte.tv/video.m3u8'}
+    sent = record_requests(api, monkeypatch, replies=[
+        build_reply(500, b'{"error": "internal"}'), build_reply(500, b'{"error": "internal"}'),
+        build_reply(200, f'{{"videoStreams": [{json.dumps(stream)}]}}'.encode('utf-8'))])
+
+    assert not api.playable_streams('SHOW', '110342-012-A', 'fr')
+    assert api.playable_streams('SHOW', '110342-012-A', 'fr') == [stream]
+    # clip request may still be running. program was requested again
+    assert [request['url'].split('/')[-2] for request in sent].count('SHOW') == 2
+
+    record_requests(api, monkeypatch)
+    assert not api.playable_streams('SHOW', '110342-013-A', 'fr')
+    sent = record_requests(api, monkeypatch)
+    assert not api.playable_streams('SHOW', '110342-013-A', 'fr')
+    assert not sent
@@ -0,0 +1,70 @@
+"""
+Test module for the SQLite storage of cached categories.
+"""
+# Standard imports
+import sqlite3
+import time
+# pylint: disable=import-error
+import pytest
+from resources.lib import categorystore
+from resources.lib.categorystore import CategoryStore
+
+
+def test_categories_expire_and_are_written_if_changed(tmp_path):
+    """Test that a category expires after its TTL and unchanged categories are not written."""
+    store = CategoryStore(str(tmp_path / 'categories.sqlite'))
+    store.update({'zone-1': {'records': [('110342-012-A', 'SHOW')]}, 'zone-2': {}})
+    store.set('zone-3', [], ttl=0.05)
+
+    assert store['zone-1'] == {'records': [('110342-012-A', 'SHOW')]}
+    assert sorted(store) == ['zone-1', 'zone-2', 'zone-3']
+    time.sleep(0.1)
+    assert 'zone-3' not in store
+    with pytest.raises(KeyError):
+        del store['zone-3']
+
+    # first update drops expired zone-3
+    store.update({'zone-1': {'records': [('110342-012-A', 'SHOW')]}, 'zone-2': {}})
+    changes = store._connect().total_changes  # pylint: disable=protected-access
+    store.update({'zone-1': {'records': [('110342-012-A', 'SHOW')]}, 'zone-2': {}})
+    assert store._connect().total_changes == changes  # pylint: disable=protected-access
+    store['zone-2'] = {'records': []}
+    assert CategoryStore(str(tmp_path / 'categories.sqlite'))['zone-2'] == {'records': []}
+
+
+def test_least_recently_used_categories_are_dropped(tmp_path, monkeypatch):
+    """Test that categories beyond max bytes are dropped, least recently used first."""
+    monkeypatch.setattr(categorystore, '_USE_INTERVAL', 0)
+    store = CategoryStore(str(tmp_path / 'categories.sqlite'), max_bytes=2500)
+    store['zone-1'] = 'a' * 1000
+    store['zone-2'] = 'b' * 1000
+    time.sleep(0.01)
+    assert store['zone-1'] == 'a' * 1000
+
+    store['zone-3'] = 'c' * 1000
+
+    assert sorted(store) == ['zone-1', 'zone-3']
+    assert len(store) == 2
+
+
+def test_categories_are_read_while_database_is_written(tmp_path, monkeypatch):
+    """Test that reading a category neither waits for a writer nor fails while it writes."""
+    monkeypatch.setattr(categorystore, '_USE_INTERVAL', 0)
+    file_path = str(tmp_path / 'categories.sqlite')
+    store = CategoryStore(file_path)
+    store['zone-1'] = {'records': []}
+    writer = sqlite3.connect(file_path)
+    writer.execute('BEGIN IMMEDIATE')
+
+    started_at = time.monotonic()
+    assert store['zone-1'] == {'records': []}
+    assert time.monotonic() - started_at < 1
+    writer.rollback()
+
+    store.close()
+    writer.execute('PRAGMA locking_mode=EXCLUSIVE')
+    writer.execute('BEGIN EXCLUSIVE')
+    with pytest.raises(KeyError):
+        _ = store['zone-1']
+    writer.close()
+    assert store['zone-1'] == {'records': []}
@@ -0,0 +1,117 @@
+"""
+Test module for the local mirror of user history.
+"""
+# Standard imports
+from concurrent.futures import ThreadPoolExecutor
+# pylint: disable=import-error
+import pytest
+
+from resources.lib import historymirror
+from resources.lib.historymirror import HistoryMirror
+
+TOKEN = {'token_type': 'Bearer', 'access_token': 'abc', 'user': 'user@example.com'}
+
+
+def build_pages(timecodes, page_size=2):
+    """Build pages of last viewed items from a list of (program id, timecode)."""
+    data = [{'programId': program_id, 'durationSeconds': 100,
+             'lastviewed': {'timecode': timecode, 'progress': timecode / 100}}
+            for program_id, timecode in timecodes]
+    pages_count = (len(data) + page_size - 1) // page_size
+    return [{'data': data[idx * page_size:(idx + 1) * page_size],
+             'meta': {'page': idx + 1, 'pages': pages_count}}
+            for idx in range(pages_count)]
+
+
+@pytest.fixture(name="mirror_path")
+def mirror_path_fixture(tmp_path):
+    """Return a folder with a mirror fully synchronized with 3 pages of history."""
+    pages = build_pages([('A', 10), ('B', 20), ('C', 30), ('D', 40), ('E', 50), ('F', 60)])
+    HistoryMirror(str(tmp_path), TOKEN, 'fr').sync(
+        lambda idx: pages[idx - 1], lambda: [item for page in pages for item in page['data']])
+    return str(tmp_path)
+
+
+def test_delta_sync_stops_on_first_known_page(mirror_path):
+    """Test that only new pages are fetched, when user watched 1 new item."""
+    pages = build_pages([('G', 5), ('A', 10), ('B', 20), ('C', 30), ('D', 40), ('E', 50),
+                         ('F', 60)])
+    fetched = []
+
+    def fetch_page(page_idx):
+        fetched.append(page_idx)
+        return pages[page_idx - 1]
+
+    items = HistoryMirror(mirror_path, TOKEN, 'fr').sync(fetch_page, lambda: [])
+
+    assert fetched == [1, 2]
+    assert [item['programId'] for item in items] == ['G', 'A', 'B', 'C', 'D', 'E', 'F']
+
+
+def test_record_progress_moves_item_first(mirror_path):
+    """Test that progress synchronized by the add-on is visible without request."""
+    assert HistoryMirror(mirror_path, TOKEN, 'fr').record_progress('C', 80)
+
+    items = HistoryMirror(mirror_path, TOKEN, 'fr').items
+
+    assert items[0]['programId'] == 'C'
+    assert items[0]['lastviewed'] == {'timecode': 80, 'progress': 0.8}
+
+
+def test_queued_progress_is_kept_on_sync(mirror_path):
+    """Test that progress not sent to Arte yet is not replaced by the older one of Arte."""
+    assert HistoryMirror(mirror_path, TOKEN, 'fr').record_progress('C', 80)
+    pages = build_pages([('C', 30), ('A', 10), ('B', 20), ('D', 40), ('E', 50), ('F', 60)])
+    fetched = []
+
+    def fetch_page(page_idx):
+        fetched.append(page_idx)
+        return pages[page_idx - 1]
+
+    items = HistoryMirror(mirror_path, TOKEN, 'fr').sync(fetch_page, lambda: [], {'C': 80})
+
+    assert fetched == [1]
+    assert [item['programId'] for item in items] == ['C', 'A', 'B', 'D', 'E', 'F']
+    assert items[0]['lastviewed'] == {'timecode': 80, 'progress': 0.8}
+    assert HistoryMirror(mirror_path, TOKEN, 'fr').items[0]['lastviewed']['timecode'] == 80
+
+
+def test_progress_of_arte_is_kept_once_sent(mirror_path):
+    """Test that progress of Arte prevails once no progress is queued anymore."""
+    assert HistoryMirror(mirror_path, TOKEN, 'fr').record_progress('C', 80)
+    pages = build_pages([('C', 90), ('A', 10), ('B', 20), ('D', 40), ('E', 50), ('F', 60)])
+
+    items = HistoryMirror(mirror_path, TOKEN, 'fr').sync(lambda idx: pages[idx - 1],
+                                                         lambda: [])
+
+    assert items[0]['lastviewed'] == {'timecode': 90, 'progress': 0.9}
+
+
+def test_mirror_is_kept_when_token_is_refreshed(mirror_path):
+    """Test that the mirror of a user is found with the token refreshed for that user."""
+    refreshed_token = dict(TOKEN, access_token='def')
+
+    assert len(HistoryMirror(mirror_path, refreshed_token, 'fr').items) == 6
+
+
+def test_legacy_mirror_files_are_removed(tmp_path):
+    """Test that mirror files keyed on access token are removed on first use."""
+    legacy_file = tmp_path / '0123456789abcdef_fr.json'
+    legacy_file.write_text('{"items": []}')
+
+    HistoryMirror(str(tmp_path), TOKEN, 'fr')
+
+    assert not legacy_file.exists()
+
+
+def test_progress_recorded_concurrently_is_kept(mirror_path):
+    """Test that progress of a collection recorded by several threads is not lost."""
+    program_ids = ['A', 'B', 'C', 'D', 'E', 'F']
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for program_id in program_ids:
+            executor.submit(historymirror.record_progress, mirror_path, TOKEN, program_id, 100)
+
+    items = HistoryMirror(mirror_path, TOKEN, 'fr').items
+
+    assert sorted(item['programId'] for item in items if item['lastviewed']['timecode'] == 100) \
+        == program_ids
@@ -0,0 +1,59 @@
+"""
+Test module for the persistent HTTP cache based on conditional requests.
+"""
+import os
+import time
+# pylint: disable=import-error
+import pytest
+
+from resources.lib import httpcache
+
+
+@pytest.fixture(name="cache")
+def cache_fixture(tmp_path):
+    """Create an empty cache in a temporary folder with a budget of 3 small replies."""
+    return httpcache.HttpCache(str(tmp_path), max_bytes=250)
+
+
+def test_put_and_get_with_validators(cache):
+    """Test that a reply with validators is stored and revalidated with them."""
+    key = httpcache.build_key('https://api.arte.tv/api/emac/v4/fr/tv/pages/HOME/')
+    assert cache.put(key, {'ETag': '"abc"', 'Last-Modified': 'Wed, 01 Jul 2026'}, b'{"a": 1}')
+
+    cached_reply = cache.get(key)
+
+    assert cached_reply.content == b'{"a": 1}'
+    assert httpcache.conditional_headers(cached_reply) == {
+        'If-None-Match': '"abc"', 'If-Modified-Since': 'Wed, 01 Jul 2026'}
+
+
+def test_reply_without_validator_is_not_stored(cache):
+    """Test that nothing is stored, when reply cannot be revalidated."""
+    key = httpcache.build_key('https://api.arte.tv/api/player/v2/config/fr/LIVE')
+    assert not cache.put(key, {}, b'{}')
+    assert cache.get(key) is None
+    assert not httpcache.conditional_headers(cache.get(key))
+
+
+def test_key_depends_on_token_and_client():
+    """Test that personal content is never shared between tokens or clients."""
+    url = 'https://api.arte.tv/api/sso/v3/favorites/fr?page=1&limit=50'
+    key_user1 = httpcache.build_key(url, {'authorization': 'Bearer 1', 'client': 'web'})
+    key_user2 = httpcache.build_key(url, {'authorization': 'Bearer 2', 'client': 'web'})
+    key_tv = httpcache.build_key(url, {'authorization': 'Bearer 1', 'client': 'tv'})
+    assert len({key_user1, key_user2, key_tv}) == 3
+
+
+def test_least_recently_used_is_evicted(cache):
+    """Test that the oldest reply is removed, when the byte budget is exceeded."""
+    keys = [httpcache.build_key(f"https://api.arte.tv/{idx}") for idx in range(3)]
+    for idx, key in enumerate(keys):
+        cache.put(key, {'ETag': str(idx)}, b'x' * 30)
+        # make modification times distinct and ordered
+        os.utime(os.path.join(cache.path, key + '.http'), (time.time() - 10 + idx,) * 2)
+    cache.touch(keys[0])
+
+    cache.put(httpcache.build_key('https://api.arte.tv/3'), {'ETag': '3'}, b'x' * 30)
+
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
@@ -0,0 +1,38 @@
+"""
+Test module for the menus of zones, e.g. of home page, mapped by ArteZone.
+"""
+# Standard imports
+from unittest.mock import Mock
+# pylint: disable=import-error
+import pytest
+
+
+@pytest.fixture(name="artezone")
+def artezone_fixture(import_addon_module):
+    """Return artezone module imported with stand-ins of Kodi modules"""
+    return import_addon_module('resources.lib.mapper.artezone')
+
+
+def test_next_page_of_cached_zone_is_prefetched(artezone, monkeypatch):
+    """Test that a zone displayed from home page cache prefetches its next page."""
+    prefetched = []
+    zone_pages = []
+    monkeypatch.setattr(artezone.api, 'prefetch', lambda fctn, *args: prefetched.append(
+        (fctn, args)))
+    monkeypatch.setattr(artezone.api, 'get_zone_page', lambda *args: zone_pages.append(args))
+    plugin = Mock(url_for=lambda endpoint, **items: f"plugin://{endpoint}/{items}")
+    plugin.addon.getLocalizedString = str
+    settings = Mock(language='fr', prefetch_streams=0)
+    cached_categories = {}
+    zone = artezone.ArteZone(plugin, settings, cached_categories)
+    zone.build_item({'id': 'zone-1', 'title': 'Zone 1', 'content': {
+        'data': [{'programId': '110342-012-A', 'kind': {'code': 'SHOW'}, 'title': 'Title'}],
+        'pagination': {'page': 1, 'pages': 3}}})
+
+    items = zone.build_cached_menu('zone-1')
+
+    assert len(items) == 2
+    assert len(prefetched) == 1
+    fctn, args = prefetched[0]
+    fctn(*args)
+    assert zone_pages == [('fr', 'zone-1', 2)]
@@ -0,0 +1,37 @@
+"""
+Test module for latency histograms and counters of cache events.
+"""
+# pylint: disable=import-error
+from resources.lib import metrics
+from resources.lib.metrics import Metrics
+
+
+def test_percentiles_are_upper_bounds_of_buckets():
+    """Test that percentiles are within the precision of logarithmic buckets."""
+    measures = Metrics()
+    for milliseconds in range(1, 101):
+        measures.record('route/index', milliseconds / 1000)
+
+    histograms, _ = metrics.summarize({'histograms': measures.histograms})
+
+    assert histograms[0]['count'] == 100
+    assert 50 <= histograms[0]['p50'] <= 60
+    assert 95 <= histograms[0]['p95'] <= 114
+    assert 99 <= histograms[0]['p99'] <= 119
+
+
+def test_save_merges_invocations_of_the_same_build(tmp_path):
+    """Test that measures are accumulated per build and reset by a new build."""
+    file_path = str(tmp_path / 'metrics.json')
+    for build in ('1.6.0', '1.6.0', '1.6.1'):
+        measures = Metrics()
+        measures.record('api/artetv_home', 0.2, error=build == '1.6.1', size=2048)
+        measures.count('cache/http', 'hit')
+        measures.count('cache/http', 'miss')
+        measures.save(file_path, build)
+
+    histograms, counters = metrics.summarize(metrics.load(file_path))
+
+    assert histograms == [{'name': 'api/artetv_home', 'count': 1, 'errors': 1, 'bytes': 2048,
+                           'p50': 237, 'p95': 237, 'p99': 237}]
+    assert counters == [{'name': 'cache/http', 'hit': 1, 'miss': 1, 'ratio': 0.5}]
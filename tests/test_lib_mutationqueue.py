@@ -0,0 +1,59 @@
+"""
+Test module for the durable queue of changes of user content.
+"""
+# pylint: disable=import-error
+from resources.lib.mutationqueue import MutationQueue
+
+
+def test_flush_sends_last_change_of_each_key(tmp_path):
+    """Test that add then remove of a favorite and successive progress are coalesced."""
+    queue = MutationQueue(str(tmp_path))
+    queue.append('favorite_A', 'add_favorite', ['A', 'fr'])
+    queue.append('lastviewed_B', 'sync_last_viewed', ['B', 10])
+    queue.append('favorite_A', 'remove_favorite', ['A'])
+    queue.append('lastviewed_B', 'sync_last_viewed', ['B', 70])
+    sent = []
+
+    results = queue.flush(lambda mutation: sent.append(
+        (mutation['op'], mutation['args'])) or 200)
+
+    assert sent == [('remove_favorite', ['A']), ('sync_last_viewed', ['B', 70])]
+    assert results == {'favorite_A': 200, 'lastviewed_B': 200}
+    assert not queue.pending()
+
+
+def test_flush_retries_with_backoff(tmp_path):
+    """Test that a change failing with a network error is kept and retried after a backoff."""
+    queue = MutationQueue(str(tmp_path))
+    queue.append('lastviewed_B', 'sync_last_viewed', ['B', 10])
+
+    assert queue.flush(lambda mutation: None, now=1000) == {'lastviewed_B': None}
+    # still waiting for backoff: nothing sent
+    assert not queue.flush(lambda mutation: 200, now=1001)
+    # a new instance, like another add-on invocation, finds the change on disk
+    assert MutationQueue(str(tmp_path)).flush(lambda mutation: 200, now=1100) == \
+        {'lastviewed_B': 200}
+    assert not queue.pending()
+
+
+def test_flush_drops_rejected_change(tmp_path):
+    """Test that a change rejected by Arte is not retried."""
+    queue = MutationQueue(str(tmp_path))
+    queue.append('favorite_A', 'add_favorite', ['A', 'fr'])
+
+    assert queue.flush(lambda mutation: 404) == {'favorite_A': 404}
+    assert not queue.pending()
+
+
+def test_flush_keeps_change_appended_while_sending(tmp_path):
+    """Test that a change recorded by another invocation during a flush is not lost."""
+    queue = MutationQueue(str(tmp_path))
+    queue.append('favorite_A', 'add_favorite', ['A', 'fr'])
+
+    def send(_):
+        MutationQueue(str(tmp_path)).append('favorite_C', 'add_favorite', ['C', 'fr'])
+        return 200
+
+    queue.flush(send)
+
+    assert [mutation['key'] for mutation in queue.pending()] == ['favorite_C']
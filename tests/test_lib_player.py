@@ -0,0 +1,42 @@
+"""
+Test module for the player tracking playback progress with Arte TV.
+"""
+# Standard imports
+import threading
+import time
+# pylint: disable=import-error
+import pytest
+
+
+# pylint: disable=too-few-public-methods
+class Monitor:
+    """xbmc.Monitor of Kodi never exiting"""
+
+    def waitForAbort(self, timeout):
+        # pylint: disable=invalid-name
+        """Wait for timeout seconds and return False"""
+        time.sleep(timeout)
+        return False
+
+
+@pytest.fixture(name="player")
+def player_fixture(import_addon_module, monkeypatch):
+    """Return player module imported with stand-ins of Kodi modules"""
+    player = import_addon_module('resources.lib.player')
+    monkeypatch.setattr(player.xbmc, 'Monitor', Monitor)
+    return player
+
+
+def test_tracking_ends_soon_after_playback_stopped(player):
+    """Test that tracking does not wait for the next sample, once playback stopped."""
+    synched_player = player.Player(None, '110342-012-A')
+    synched_player.started = True
+    synched_player.interval = 30
+    tracking = threading.Thread(target=synched_player.track)
+    tracking.start()
+
+    time.sleep(0.1)
+    synched_player.onPlayBackStopped()
+    tracking.join(timeout=3)
+
+    assert not tracking.is_alive()
@@ -0,0 +1,48 @@
+"""
+Test module for the local index of facts about programs.
+"""
+# pylint: disable=import-error
+from resources.lib.programindex import ProgramIndex
+
+
+def test_update_keeps_known_facts(tmp_path):
+    """Test that an item without some facts does not erase facts indexed before."""
+    index = ProgramIndex(str(tmp_path / 'programs.sqlite'))
+    index.update('fr', [{
+        'programId': '110342-012-A', 'durationSeconds': 3120,
+        'kind': {'code': 'SHOW', 'isCollection': False},
+        'parentCollections': [{'programId': 'RC-023217'}], 'ageRating': 12}])
+
+    assert index.update('fr', [{'programId': '110342-012-A', 'duration': {'seconds': 3121}},
+                               {'title': 'no program id'}]) == 1
+
+    assert index.get('fr', '110342-012-A') == {
+        'duration': 3121, 'kind': 'SHOW',
+        'parents': [{'programId': 'RC-023217'}], 'age_rating': 12}
+    assert index.get('de', '110342-012-A') is None
+
+
+def test_update_keeps_most_recently_seen_programs(tmp_path):
+    """Test that the index is trimmed to its max number of programs."""
+    index = ProgramIndex(str(tmp_path / 'programs.sqlite'), max_programs=2)
+    for program_id in ('A', 'B', 'C'):
+        index.update('en', [{'programId': program_id, 'durationSeconds': 60}])
+
+    assert index.get('en', 'A') is None
+    assert index.get('en', 'B') == {
+        'duration': 60, 'kind': None, 'parents': None, 'age_rating': None}
+    assert index.get('en', 'C') is not None
+    index.close()
+
+
+def test_update_trims_index_beyond_a_margin_only(tmp_path):
+    """Test that the index is not trimmed on every update past its max number of programs."""
+    index = ProgramIndex(str(tmp_path / 'programs.sqlite'), max_programs=10)
+    for program_id in range(12):
+        index.update('en', [{'programId': str(program_id), 'durationSeconds': 60}])
+        if program_id == 10:
+            assert index.get('en', '0') is not None
+
+    assert index.get('en', '1') is None
+    assert index.get('en', '2') is not None
+    index.close()
@@ -0,0 +1,61 @@
+"""
+Test module for the records of programs projected from API items.
+"""
+# Standard imports
+import pickle
+# pylint: disable=import-error
+from resources.lib import programrecord
+
+
+def test_from_artetv_resolves_fields_once():
+    """Test that kind, images, dates, age rating and progress of Arte TV items are resolved."""
+    record = programrecord.from_artetv({
+        'programId': '110342-012-A', 'kind': {'code': 'SHOW', 'isCollection': False},
+        'title': 'Title', 'subtitle': 'Subtitle', 'fullDescription': 'Plot',
+        'mainImage': {'url': 'https://api-cdn.arte.tv/img/v2/image/abc/__SIZE__?type=TEXT'},
+        'duration': {'seconds': 3120}, 'ageRating': 12, 'beginsAt': '2026-07-14T11:35:07Z',
+        'lastviewed': {'progress': 0.5, 'timecode': 1560}, 'unused': ['field'] * 100})
+
+    assert record.kind == 'SHOW'
+    assert record.plot == 'Plot'
+    assert record.duration == 3120
+    assert record.mpaa == 'PG-13'
+    assert record.thumbnail == 'https://api-cdn.arte.tv/img/v2/image/abc/480x270?type=TEXT'
+    assert record.fanart == 'https://api-cdn.arte.tv/img/v2/image/abc/1920x1080'
+    assert record.aired == '2026-07-14 11:35:07+00:00'
+    assert (record.progress, record.timecode) == (0.5, 1560)
+    assert record.countries is None
+    assert record.get_playable_video() == ('SHOW', '110342-012-A')
+
+
+def test_from_hbbtv_keeps_details():
+    """Test that HBB TV items keep genre, countries and director, and that records pickle."""
+    record = programrecord.from_hbbtv({
+        'programId': 'RC-023217', 'kind': 'TV_SERIES', 'title': 'Series',
+        'imageUrl': 'https://api-cdn.arte.tv/img/v2/image/def/480x270',
+        'broadcastBegin': '2026-07-14T11:35:07+02:00', 'genrePresse': 'Series',
+        'productionCountries': [{'label': 'France'}, {'label': 'Germany'}]})
+
+    assert record.mpaa == 'Unknown'
+    assert record.thumbnail == record.fanart
+    assert record.aired == '2026-07-14 11:35:07+02:00'
+    assert record.countries == ('France', 'Germany')
+    assert record.is_playlist()
+    assert record.get_playable_video() is None
+    assert programrecord.from_cached(pickle.loads(pickle.dumps(
+        programrecord.to_cached(record)))) == record
+
+
+def test_records_cached_by_another_version_are_read():
+    """Test that cached records with missing or unknown fields are read back."""
+    record = programrecord.from_artetv({'programId': '110342-012-A', 'kind': 'SHOW',
+                                        'title': 'Title', 'duration': {'seconds': 3120}})
+    values = programrecord.to_cached(record)
+    del values['director']
+    values['removed_field'] = 'value'
+
+    cached = programrecord.from_cached(values)
+
+    assert cached == record._replace(director=None)
+    assert programrecord.from_cached(tuple(record)) == record
+    assert programrecord.from_cached(tuple(record)[:-1]).director is None
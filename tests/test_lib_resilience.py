@@ -0,0 +1,40 @@
+"""
+Test module for latency budgets and circuit breakers of Arte APIs.
+"""
+# Standard imports
+import json
+# pylint: disable=import-error
+from resources.lib.resilience import CircuitBreakers
+from resources.lib.resilience import FAILURE_THRESHOLD
+from resources.lib.resilience import LatencyBudgets
+
+
+def test_latencies_of_invocations_are_merged_on_save(tmp_path):
+    """Test that latencies are written once per invocation, without losing other ones."""
+    file_path = str(tmp_path / 'latencies.json')
+    first = LatencyBudgets(file_path)
+    second = LatencyBudgets(file_path)
+    first.observe('scope', 0.1)
+    second.observe('scope', 0.2)
+
+    assert not (tmp_path / 'latencies.json').exists()
+    first.save()
+    second.save()
+
+    assert json.loads((tmp_path / 'latencies.json').read_text()) == {'scope': [0.1, 0.2]}
+
+
+def test_breaker_states_are_read_once_and_written_on_change(tmp_path):
+    """Test that successful requests neither read nor write breaker states."""
+    file_path = tmp_path / 'breakers.json'
+    breakers = CircuitBreakers(str(file_path))
+    assert breakers.allow('api.arte.tv')
+    for _ in range(FAILURE_THRESHOLD):
+        breakers.record_failure('api.arte.tv')
+    assert not breakers.allow('api.arte.tv')
+
+    file_path.write_text('{}')
+    breakers.record_success('www.arte.tv')
+
+    assert not breakers.allow('api.arte.tv')
+    assert file_path.read_text() == '{}'
@@ -0,0 +1,45 @@
+"""
+Test module for requests deduplicated between add-on invocations.
+"""
+# Standard imports
+import threading
+import time
+from unittest.mock import Mock
+# pylint: disable=import-error
+from resources.lib.singleflight import SingleFlight
+
+
+def test_reply_is_not_shared_without_waiter(tmp_path):
+    """Test that a reply nobody waited for is not kept for later requests."""
+    fetch = Mock(return_value=(b'reply', True))
+    flights = SingleFlight(str(tmp_path))
+
+    assert flights.do('key', fetch) == b'reply'
+    assert flights.do('key', fetch) == b'reply'
+
+    assert fetch.call_count == 2
+    assert flights.coalesced == 0
+
+
+def test_waiter_reads_reply_of_slow_fetch(tmp_path):
+    """Test that a request sent during a fetch longer than the wait reads its reply."""
+    fetching = threading.Event()
+
+    def slow_fetch():
+        fetching.set()
+        time.sleep(0.3)
+        return b'reply', True
+
+    owner = SingleFlight(str(tmp_path), wait=1)
+    waiter = SingleFlight(str(tmp_path), wait=1)
+    thread = threading.Thread(target=owner.do, args=('key', slow_fetch))
+    thread.start()
+    fetching.wait()
+    fetch = Mock(return_value=(b'other reply', True))
+
+    content = waiter.do('key', fetch)
+    thread.join()
+
+    assert content == b'reply'
+    fetch.assert_not_called()
+    assert waiter.coalesced == 1
@@ -0,0 +1,72 @@
+"""
+Test module for the builder of plugin URLs from templates.
+"""
+# Standard imports
+from urllib.parse import quote_plus
+# pylint: disable=import-error
+from resources.lib.urlbuilder import UrlBuilder
+from resources.lib.urlbuilder import get_url_builder
+from resources.lib.urlbuilder import quote
+
+
+# pylint: disable=too-few-public-methods
+class FakePlugin:
+    """Build URLs like xbmcswift2: values in path, other values in query string"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def url_for(self, endpoint, **items):
+        """Return URL of endpoint with a path made of program_id and label"""
+        self.calls += 1
+        path = f"plugin://plugin.video.arteplussept/{endpoint}/{{x}}/" + '/'.join(
+            quote_plus(str(items.pop(key))) for key in ('program_id', 'label') if key in items)
+        query = '&'.join(f"{key}={quote_plus(str(value))}" for key, value in items.items())
+        return f"{path}?{query}" if query else path
+
+
+def test_url_for_is_same_as_plugin_url_for():
+    """Test that URLs are the ones of plugin, which is called only to compile and check."""
+    plugin = FakePlugin()
+    urls = UrlBuilder(plugin)
+    for program_id, label in (('110342-012-A', '[B]Title[/B] - a/b {c}'), ('RC-1', 'é & ?')):
+        items = {'program_id': program_id, 'label': label, 'mpaa': 'PG-13'}
+        assert urls.url_for('add_favorite', **items) == FakePlugin().url_for(
+            'add_favorite', **items)
+    assert plugin.calls == 2
+
+
+def test_url_for_falls_back_to_plugin_for_other_values():
+    """Test that values which are not strings are left to plugin."""
+    plugin = FakePlugin()
+    urls = UrlBuilder(plugin)
+
+    base_url = 'plugin://plugin.video.arteplussept/play/{x}'
+    assert urls.url_for('play', program_id=None) == f"{base_url}/None"
+    assert urls.url_for('play', program_id=12) == f"{base_url}/12"
+    assert plugin.calls == 2
+
+
+def test_url_for_falls_back_to_plugin_when_template_differs():
+    """Test that a route with URLs not made of escaped values is always built by plugin."""
+    plugin = FakePlugin()
+    plugin.url_for = lambda endpoint, **items: f"plugin://{endpoint}/{items['label'].lower()}"
+    urls = UrlBuilder(plugin)
+
+    assert urls.url_for('search', label='ABC') == 'plugin://search/abc'
+    assert urls.url_for('search', label='DEF') == 'plugin://search/def'
+
+
+def test_quote_is_same_as_encode_string():
+    """Test that ids are left as is and other values escaped like utils.encode_string."""
+    for value in ('110342-012-A', 'RC-023217', 'TV_SERIES', 'a~b.c', ''):
+        assert quote(value) is value
+    for value in ('[B]Title[/B] - 1', 'a+b', '50%', 'été'):
+        assert quote(value) == quote_plus(value)
+
+
+def test_get_url_builder_is_shared_by_process():
+    """Test that templates are compiled once per plugin."""
+    plugin = FakePlugin()
+
+    assert get_url_builder(plugin) is get_url_builder(plugin)
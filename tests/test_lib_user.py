@@ -0,0 +1,104 @@
+"""
+Test module for tokens refreshed ahead of their expiry, and shared between add-on invocations.
+"""
+# Standard imports
+import os
+import pickle
+import stat
+import time
+from unittest.mock import Mock
+# pylint: disable=import-error
+import pytest
+
+USER = 'user@example.com'
+
+
+def build_tokens(access_token, obtained_at, grant=None):
+    """Return tokens created at obtained_at, expiring an hour later."""
+    return {'access_token': access_token, 'refresh_token': f"refresh-{access_token}",
+            'expires_in': 3600, 'obtained_at': obtained_at, 'grant': grant, 'user': USER}
+
+
+@pytest.fixture(name="user")
+def user_fixture(import_addon_module):
+    """Return user module imported with stand-ins of Kodi modules"""
+    return import_addon_module('resources.lib.user')
+
+
+@pytest.fixture(name="plugin")
+def plugin_fixture():
+    """Return a plugin with storages in memory, with tokens of USER expiring in 1 min."""
+    storages = {'token': {USER: build_tokens('expiring', time.time() - 3540, 'password')}}
+    plugin = Mock()
+    plugin.get_storage = lambda key, **kwargs: storages.setdefault(key, {})
+    return plugin
+
+
+def forget_invocation(user):
+    """Forget tokens read by an invocation, like a new add-on invocation would."""
+    user._tokens_memo.clear()  # pylint: disable=protected-access
+    user._refresh_not_before.clear()  # pylint: disable=protected-access
+
+
+def test_token_refreshed_by_another_invocation_is_used(user, plugin, monkeypatch):
+    """Test that tokens already refreshed by another invocation are not refreshed again."""
+    refreshed = build_tokens('refreshed', time.time(), 'password')
+    with open(user.storage.get_storage_file('token.refreshed'), 'wb') as refreshed_file:
+        pickle.dump({USER: {'tokens': refreshed}}, refreshed_file)
+    monkeypatch.setattr(user.api, 'refresh_tokens', Mock(side_effect=AssertionError))
+
+    tokens = user.get_cached_token(plugin, USER)
+
+    assert tokens == refreshed
+    assert plugin.get_storage('token')[USER] == refreshed
+
+
+def test_expired_refresh_token_falls_back_to_other_grant(user, plugin, monkeypatch):
+    """Test that tokens cached without grant are refreshed with the grant accepting them."""
+    plugin.get_storage('token')[USER]['grant'] = None
+    grants = []
+
+    def refresh_tokens(tokens, grant):
+        grants.append((tokens['refresh_token'], grant))
+        return {'access_token': 'refreshed', 'expires_in': 3600} if grant == 'device' else None
+
+    monkeypatch.setattr(user.api, 'refresh_tokens', refresh_tokens)
+
+    tokens = user.get_cached_token(plugin, USER)
+
+    assert grants == [('refresh-expiring', 'password'), ('refresh-expiring', 'device')]
+    assert tokens['access_token'] == 'refreshed'
+    assert tokens['refresh_token'] == 'refresh-expiring'
+    assert tokens['grant'] == 'device'
+    assert plugin.get_storage('token')[USER] == tokens
+
+
+def test_failed_refresh_is_not_retried_by_other_invocations(user, plugin, monkeypatch):
+    """Test that current tokens are used after a failure, and refresh is not tried again."""
+    refresh_tokens = Mock(return_value=None)
+    monkeypatch.setattr(user.api, 'refresh_tokens', refresh_tokens)
+
+    tokens = user.get_cached_token(plugin, USER)
+    forget_invocation(user)
+    user.get_cached_token(plugin, USER)
+
+    assert tokens['access_token'] == 'expiring'
+    assert refresh_tokens.call_count == 1
+
+
+def test_refreshed_tokens_are_stored_like_token_storage(user, plugin, monkeypatch):
+    """Test that refreshed tokens are shared next to token storage, and removed on logout."""
+    token_path = user.storage.get_storage_file('token')
+    with open(token_path, 'wb'):
+        pass
+    os.chmod(token_path, 0o640)
+    monkeypatch.setattr(user.api, 'refresh_tokens',
+                        lambda tokens, grant: {'access_token': 'refreshed', 'expires_in': 3600})
+
+    assert user.get_cached_token(plugin, USER)['access_token'] == 'refreshed'
+
+    refreshed_path = user.storage.get_storage_file('token.refreshed')
+    assert stat.S_IMODE(os.stat(refreshed_path).st_mode) == 0o640
+    assert os.path.isfile(token_path)
+    user.clear_cached_tokens(plugin)
+    assert not os.path.exists(refreshed_path)
@@ -0,0 +1,60 @@
+"""
+Test module for the home menu displayed from a snapshot, while it is refreshed in background.
+"""
+# Standard imports
+from unittest.mock import Mock
+# pylint: disable=import-error
+import pytest
+
+
+@pytest.fixture(name="storage")
+def storage_fixture(import_addon_module):
+    """Return storage module in a temporary folder"""
+    return import_addon_module('resources.lib.storage')
+
+
+@pytest.fixture(name="view")
+def view_fixture(import_addon_module, monkeypatch):
+    """Return view module with a live stream and home page zones mapped without Arte"""
+    view = import_addon_module('resources.lib.view')
+    monkeypatch.setattr(view, 'ArteSearch', lambda plugin, settings: Mock(
+        build_item=Mock(return_value={'label': 'Search'})))
+    monkeypatch.setattr(view, 'ArteLiveItem', lambda plugin, live: Mock(
+        build_item_live=Mock(return_value={'label': live})))
+
+    def map_zone_to_item(_plugin, _settings, zone, cached_categories):
+        cached_categories[zone] = {'records': [], 'pagination': None}
+        return {'label': zone}
+
+    monkeypatch.setattr(view.mapper, 'map_zone_to_item', map_zone_to_item)
+    return view
+
+
+def test_live_stream_is_not_kept_in_snapshot(view, storage, monkeypatch):
+    """Test that home menu displayed from a snapshot requests current live stream only."""
+    settings = Mock(language='fr', quality='High')
+    home_snapshots = storage.get_home_snapshots(60)
+    monkeypatch.setattr(view.api, 'player_video', lambda lang, program_id: 'Live at 20:00')
+    monkeypatch.setattr(view.api, 'page_content', lambda lang: {'zones': ['zone-1', 'zone-2']})
+    view.build_home_page_snapshot(Mock(), settings, {}, home_snapshots)
+    page_content = Mock(side_effect=AssertionError)
+    monkeypatch.setattr(view.api, 'player_video', lambda lang, program_id: 'Live at 21:00')
+    monkeypatch.setattr(view.api, 'page_content', page_content)
+    cached_categories = {}
+
+    menu = view.get_home_page_snapshot(Mock(), settings, cached_categories, home_snapshots)
+
+    assert [item['label'] for item in menu] == ['Search', 'Live at 21:00', 'zone-1', 'zone-2']
+    assert set(cached_categories) == {'zone-1', 'zone-2'}
+    page_content.assert_not_called()
+
+
+def test_stale_snapshot_is_not_displayed(view, storage, monkeypatch):
+    """Test that a snapshot older than max staleness is ignored."""
+    settings = Mock(language='fr', quality='High')
+    monkeypatch.setattr(view.api, 'player_video', lambda lang, program_id: 'Live')
+    monkeypatch.setattr(view.api, 'page_content', lambda lang: {'zones': ['zone-1']})
+    view.build_home_page_snapshot(Mock(), settings, {}, storage.get_home_snapshots(60))
+
+    assert view.get_home_page_snapshot(
+        Mock(), settings, {}, storage.get_home_snapshots(-1)) is None